@@ -45,14 +45,9 @@ def main(argv=None):
     madeFlushes = [0] * 4
 
     for deal in range(options.numDeals):
-        deck = startingDeck.copy()
-        deck.shuffle()
-        board = Board()
-        # Deal out and save flop
-        deck.deal(board, 3)
-        flop = board.copy()
-        # Deal turn and river
-        deck.deal(board, 2)
+        board = Board(startingDeck.sample(5))
+        # First three cards are flop
+        flop = Board(board[:3])
         # Find highest number of cards of same suit
         flushCount = 0
         flopCount = flop.suitCount(suit)
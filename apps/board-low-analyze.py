@@ -2,8 +2,10 @@
 """Simulate chances five card board making eight low."""
 
 from optparse import OptionParser
+from pyPoker.BitField import popCount
 from pyPoker.Hand import Board
 from pyPoker.Deck import Deck
+from pyPoker.LowRanker import EightLowRanker
 import sys
 
 def main(argv=None):
@@ -34,13 +36,13 @@ def main(argv=None):
         board = Board()
         # Deal out flop and count low cards
         deck.deal(board, 3)
-        flopLowCount = board.countEightOrLower()
+        flopLowCount = popCount(EightLowRanker.lowRankMask(board))
         if flopLowCount == 2:
             lowDraw += 1
         # Finish dealing turn and river
         deck.deal(board, 2)
         # Analyze
-        lowCount = board.countEightOrLower()
+        lowCount = popCount(EightLowRanker.lowRankMask(board))
         if lowCount > 2:
             lowPossible += 1
             if flopLowCount == 3:
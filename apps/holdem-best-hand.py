@@ -6,7 +6,7 @@ import sys
 import string
 from pyPoker.Cards import Card, Cards, Suit, Rank
 from pyPoker import HoldEm
-from pyPoker.HoldEmStartingHandRanker import HoldEmStartingHandRanker
+from pyPoker.HoldEm import StartingHandRanker
 from pyPoker.Deck import Deck
 
 ######################################################################
@@ -18,8 +18,14 @@ def printHeader(numHands):
 	print " %3d " % (i+1),
     print
 
-def evaluateHand(hand, numDeals, numHands):
-    handRank = HoldEmStartingHandRanker.rankHand(hand)
+def evaluateHand(hand, numDeals, numHands, table=None):
+    """Return array with, for 1 to numHands other hands, percentage of
+    deals hand is the best starting hand, or with a table its equity
+    against that many random hands."""
+    if table is not None:
+        return [100.0 * table.getEquity(hand, players)
+                for players in range(2, numHands + 2)]
+    handRank = StartingHandRanker.rankHand(hand)
     betterThan = [ 0 ] * numHands
     for deal in range(numDeals):
 	deck = Deck()
@@ -30,12 +36,12 @@ def evaluateHand(hand, numDeals, numHands):
 	    hands.append(HoldEm.Hand())
 	deck.dealHands(hands)
 	for h in range(numHands):
-	    rank = HoldEmStartingHandRanker.rankHand(hands[h])
+	    rank = StartingHandRanker.rankHand(hands[h])
 	    if handRank > rank:
 		betterThan[h] += 1
 	    else:
 		break
-    return betterThan
+    return [100.0 * count / numDeals for count in betterThan]
 
 ######################################################################
 
@@ -52,11 +58,22 @@ def main(argv=None):
         parser.add_option("-N", "--numHands", type="int", dest="numHands",
                           default=8,
                           help="number of hands to compare against (Default is 8)")
+        parser.add_option("-t", "--table", type="string", dest="table",
+                          default=None, metavar="file",
+                          help="show equities from preflop table (see holdem-preflop-table.py)")
 
         (options, args) = parser.parse_args()
 
-        print "Testing up to %d opposing hands, %d simulated deals" % (options.numHands,
-                                                                       options.numDeals)
+        if options.table is not None:
+            table = StartingHandRanker.loadTable(options.table)
+            if options.numHands >= table.maxPlayers:
+                parser.error("Table only has up to %d other hands" %
+                             (table.maxPlayers - 1))
+            print "Equity against up to %d random hands" % options.numHands
+        else:
+            table = None
+            print "Testing up to %d opposing hands, %d simulated deals" % (options.numHands,
+                                                                           options.numDeals)
 
         count = 0
         printHeader(options.numHands)
@@ -71,10 +88,11 @@ def main(argv=None):
             cards = Cards([Card((topRank, Suit.CLUBS)),
                            Card((lowRank, Suit.SPADE))])
             hand = HoldEm.Hand(cards)
-            betterThan = evaluateHand(hand, options.numDeals, options.numHands)
+            betterThan = evaluateHand(hand, options.numDeals, options.numHands,
+                                      table)
             print hand,
             for h in range(options.numHands):
-                print " %3d%%" % ((100 * betterThan[h]) / options.numDeals),
+                print " %3d%%" % betterThan[h],
             print
             count += 1
 
@@ -84,10 +102,11 @@ def main(argv=None):
         cards = Cards([Card((rank, Suit.CLUBS)),
                        Card((rank, Suit.SPADE))])
         hand = HoldEm.Hand(cards)
-        betterThan = evaluateHand(hand, options.numDeals, options.numHands)
+        betterThan = evaluateHand(hand, options.numDeals, options.numHands,
+                                  table)
         print hand,
         for h in range(options.numHands):
-            print " %3d%%" % ((100 * betterThan[h]) / options.numDeals),
+            print " %3d%%" % betterThan[h],
         print
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@ from pyPoker import HoldEm
 from pyPoker.Cards import Card, Rank
 from pyPoker.Deck import Deck
 from pyPoker.PredefinedCards import *
-from pyPoker.HoldEmStartingHandRanker import HoldEmStartingHandRanker
+from pyPoker.HoldEm import StartingHandRanker
 import sys
 
 def main(argv=None):
@@ -19,9 +19,17 @@ def main(argv=None):
     parser.add_option("-n", "--numDeals", type="int", dest="numDeals",
                       default=1000,
                       help="number of deals to simulate (Default is 1000)")
+    parser.add_option("-t", "--table", type="string", dest="table",
+                      default=None, metavar="file",
+                      help="compare hands by equity from preflop table (see holdem-preflop-table.py)")
 
     (options, args) = parser.parse_args()
 
+    if options.table is not None:
+        table = StartingHandRanker.loadTable(options.table)
+    else:
+        table = None
+
     print "Testing for %d deals" % options.numDeals
 
     for rank1 in range(Eight, King):
@@ -29,7 +37,7 @@ def main(argv=None):
             hand = HoldEm.Hand([Card((rank1, Clubs)),
                                 Card((rank2, Clubs))])
 
-            rank = HoldEmStartingHandRanker.rankHand(hand)
+            rank = StartingHandRanker.rankHand(hand)
 
             # Build starting deck
             startingDeck = Deck()
@@ -38,9 +46,9 @@ def main(argv=None):
             dominatedCount = 0
 
             for deal in range(options.numDeals):
-                deck = startingDeck.copy()
-                deck.shuffle()
-                hands = deck.createHands(8, HoldEm.Hand)
+                cards = startingDeck.sample(16)
+                hands = [HoldEm.Hand(cards[index:index + 2])
+                         for index in range(0, 16, 2)]
                 dominated = False
                 for h in hands:
                     if ((h[0].rank == hand[0].rank) or
@@ -48,7 +56,11 @@ def main(argv=None):
                         (h[1].rank == hand[0].rank) or
                         (h[1].rank == hand[1].rank)):
                         # We have domination
-                        if (HoldEmStartingHandRanker.rankHand(h) > rank):
+                        if table is not None:
+                            # Dealt hand is better if it's a favourite
+                            if table.getHeadsUpEquity(h, hand) > 0.5:
+                                dominated = True
+                        elif (StartingHandRanker.rankHand(h) > rank):
                             # Dealt hand is better
                             dominated = True
                 if dominated:
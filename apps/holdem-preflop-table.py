@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""Generate or show the table of hold'em preflop equities."""
+
+from optparse import OptionParser
+import sys
+from pyPoker.StartingHandTable import StartingHandTable
+
+######################################################################
+
+def showProgress(done, total):
+    sys.stdout.write("\r%d/%d" % (done, total))
+    sys.stdout.flush()
+
+def showTable(table):
+    print "Hand",
+    for players in range(2, table.maxPlayers + 1):
+        print " %5d" % players,
+    print
+    for index in range(StartingHandTable.NUM_CLASSES):
+        print "%-4s" % StartingHandTable.className(index),
+        for players in range(2, table.maxPlayers + 1):
+            print " %4.1f%%" % (100.0 * table.getEquity(index, players)),
+        print
+
+######################################################################
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    usage = "usage: %prog [<options>]"
+    version = "%prog version 1.0"
+    parser = OptionParser(usage=usage, version=version)
+    parser.add_option("-f", "--file", type="string", dest="filename",
+                      default=StartingHandTable.DEFAULT_FILENAME,
+                      help="table file (Default is %default)")
+    parser.add_option("-g", "--generate", action="store_true",
+                      dest="generate", default=False,
+                      help="generate table instead of showing it")
+    parser.add_option("-j", "--jobs", type="int", dest="jobs",
+                      default=1, help="number of processes to simulate with")
+    parser.add_option("-m", "--maxPlayers", type="int", dest="maxPlayers",
+                      default=10,
+                      help="maximum number of players (Default is 10)")
+    parser.add_option("-n", "--numGames", type="int", dest="numGames",
+                      default=1000,
+                      help="number of games per equity (Default is 1000)")
+    parser.add_option("-p", "--showProgress", action="store_true",
+                      dest="showProgress", default=False,
+                      help="show progress")
+    parser.add_option("-s", "--seed", type="int", dest="seed",
+                      default=None, help="seed for repeatable tables")
+
+    (options, args) = parser.parse_args()
+
+    if options.generate:
+        if options.showProgress:
+            progress = showProgress
+        else:
+            progress = None
+        table = StartingHandTable.generate(number_of_games=options.numGames,
+                                           maxPlayers=options.maxPlayers,
+                                           seed=options.seed,
+                                           jobs=options.jobs,
+                                           progress=progress)
+        table.save(options.filename)
+        if options.showProgress:
+            print
+        print "Wrote %s" % options.filename
+    else:
+        table = StartingHandTable.load(options.filename)
+        showTable(table)
+        table.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
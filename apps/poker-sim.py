@@ -8,6 +8,8 @@ from pyPoker import FiveCardStud, HoldEm, Omaha, SevenCardStud
 from pyPoker.Hand import Hand, Board
 from pyPoker.Hands import Hands
 from pyPoker.Cards import Cards
+from pyPoker.EquityCache import EquityCache
+from pyPoker.ResultWriter import open_writer
 
 ######################################################################
 #
@@ -26,11 +28,18 @@ def showProgressCallback(simulator, result):
 #
 # Output routines
 
-def output_stats(simulation, stats):
+def output_stats(simulation, stats, confidence=None):
+    """Print stats for each hand.
+
+    If confidence is given, also print the confidence interval of each
+    hand's equity."""
     high_winners = stats.get_high_winners()
     low_winners = stats.get_low_winners()
     scoops = stats.get_scoops()
     number_of_games = stats.get_number_of_games()
+    equities = stats.get_equities()
+    if confidence is not None:
+        intervals = stats.get_confidence_intervals(confidence)
     predefined_hands = simulation.get_predefined_hands()
     for index in range(stats.get_number_of_hands()):
         print "%2d:" % (index + 1),
@@ -48,6 +57,9 @@ def output_stats(simulation, stats):
                 100.0 * low_winners[index] / number_of_games),
         if (low_winners is not None) and (high_winners is not None):
             print " Scoops: %d" % scoops[index],
+        print " Equity %5.1f%%" % (100.0 * equities[index]),
+        if confidence is not None:
+            print "+/- %.2f%%" % (100.0 * intervals[index]),
         print
 
 
@@ -81,20 +93,42 @@ def main(argv=None):
     parser = OptionParser(usage)
     parser.add_option("-B", "--board", type="string", dest="board",
                       metavar="cards", help="specify the flop")
+    parser.add_option("-c", "--cache", type="string", dest="cache",
+                      metavar="file", default=None,
+                      help="cache results in given file")
+    parser.add_option("-e", "--enumerate", action="store_true",
+                      dest="enumerate", default=False,
+                      help="enumerate all games instead of simulating")
+    parser.add_option("--format", type="choice", dest="format",
+                      choices=["fixed", "parquet"], default=None,
+                      help="format for --output, fixed or parquet (Default is parquet if pyarrow is available)")
     parser.add_option("-g", "--game", type="string", dest="game",
                       default="holdem", help="game to simulate")
     parser.add_option("-H", "--hand", type="string", dest="hands",
                       metavar="cards", action="append", help="add a hand")
+    parser.add_option("-j", "--jobs", type="int", dest="jobs",
+                      default=1, help="number of processes to simulate with")
     parser.add_option("-n", "--numGames", type="int", dest="numGames",
                       default=100, help="number of games to simulate")
     parser.add_option("-N", "--numHands", type="int", dest="numHands",
                       default=10, help="number of hands in play")
+    parser.add_option("-o", "--output", type="string", dest="output",
+                      metavar="file", default=None,
+                      help="write results of each game to given file")
+    parser.add_option("--precision", type="float", dest="precision",
+                      metavar="percent", default=None,
+                      help="stop once equities are known to +/- percent")
+    parser.add_option("--confidence", type="float", dest="confidence",
+                      metavar="percent", default=95.0,
+                      help="confidence level for --precision (Default is 95)")
     parser.add_option("-p", "--showProgress", action="store_true",
                       dest="showProgress", default=False, help="show progress")
     parser.add_option("-P", "--profile", type="string", dest="profile",
                       default=None, help="enable profiling")
     parser.add_option("-q", "--quiet", action="store_true",
                       dest="quiet", default=False, help="run quietly")
+    parser.add_option("-s", "--seed", type="int", dest="seed",
+                      default=None, help="seed for reproducible results")
     parser.add_option("-v", "--verbose", action="store_true", dest="verbose",
                       default=False, help="show results of each hand")
 
@@ -162,7 +196,31 @@ def main(argv=None):
                                predefined_hands = hands,
                                predefined_board = board)
 
-    cmd="simulator.simulate_games(number_of_games=options.numGames, callback=callback)"
+    if options.output is not None:
+        if options.cache or options.enumerate:
+            print "--output cannot be used with --cache or --enumerate"
+            sys.exit(1)
+        output = open_writer(options.output, simulator,
+                             format=options.format)
+    else:
+        output = None
+
+    if options.precision is not None:
+        precision_args = ", precision=options.precision / 100.0, confidence=options.confidence / 100.0"
+    else:
+        precision_args = ""
+
+    if options.cache:
+        # Cached results can't be passed to callbacks
+        cache = EquityCache(options.cache)
+        if options.enumerate:
+            cmd="cache.enumerate_games(simulator)"
+        else:
+            cmd="cache.simulate_games(simulator, number_of_games=options.numGames, jobs=options.jobs, seed=options.seed" + precision_args + ")"
+    elif options.enumerate:
+        cmd="simulator.enumerate_games(suit_isomorphism=True)"
+    else:
+        cmd="simulator.simulate_games(number_of_games=options.numGames, callback=callback, jobs=options.jobs, seed=options.seed, output=output" + precision_args + ")"
 
     if options.profile:
         import cProfile
@@ -173,12 +231,29 @@ def main(argv=None):
     else:
         stats=eval(cmd)
 
+    if options.cache:
+        cache.close()
+
+    if output is not None:
+        output.close()
+        if options.verbose:
+            print "Wrote %d games to %s" % (output.rows_written,
+                                            options.output)
+
     if options.showProgress:
         print
 
+    if (options.precision is not None) and not options.quiet:
+        print "Simulated %d games" % stats.get_number_of_games()
+
     if not options.quiet:
+        if options.precision is not None:
+            confidence = options.confidence / 100.0
+        else:
+            confidence = None
         output_stats(simulation=simulator,
-                     stats=stats)
+                     stats=stats,
+                     confidence=confidence)
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -7,6 +7,7 @@ import string
 import os
 from pyPoker import HoldEm
 from pyPoker.slanskyHands import SlanskyHand
+from pyPoker.EquityCache import EquityCache
 from pyPoker.Hand import Board
 from pyPoker.Hands import Hands
 
@@ -28,6 +29,7 @@ def output_stats(simulation, stats):
     low_winners = stats.get_low_winners()
     scoops = stats.get_scoops()
     number_of_games = stats.get_number_of_games()
+    equities = stats.get_equities()
     predefined_hands = simulation.get_predefined_hands()
     for index in range(stats.get_number_of_hands()):
         print "%2d:" % (index + 1),
@@ -45,6 +47,7 @@ def output_stats(simulation, stats):
                 100.0 * low_winners[index] / number_of_games),
         if (low_winners is not None) and (high_winners is not None):
 		print " Scoops: %d" % scoops[index],
+        print " Equity %5.1f%%" % (100.0 * equities[index]),
 	print
 
 def output_game(result):
@@ -70,6 +73,11 @@ def output_game(result):
 
 usage = "usage: %prog [<options>] <input file>"
 parser = OptionParser(usage)
+parser.add_option("-c", "--cache", type="string", dest="cache",
+		  metavar="file", default=None,
+		  help="cache results in given file")
+parser.add_option("-j", "--jobs", type="int", dest="jobs",
+		  default=1, help="number of processes to simulate with")
 parser.add_option("-n", "--numGames", type="int", dest="numGames",
 		  default=100, help="number of games to simulate")
 parser.add_option("-v", "--verbose", action="store_true", dest="verbose",
@@ -142,7 +150,8 @@ while True:
 		    print hands
 #	else:
 #	    print "Can't parse: %s = %s" % (attribute, value)
-    predefined_hands.append(hg)
+    # Deal from a HandRange so card removal between hands is exact
+    predefined_hands.append(HoldEm.HandRange.fromHandGenerator(hg))
 
 if len(predefined_hands) == 0:
 	print "No hands read from %s. Quitting." % configFileName
@@ -173,8 +182,16 @@ if options.verbose:
 simulator = HoldEm.Simulator(predefined_hands=predefined_hands,
 			     predefined_board=predefined_board)
 
-stats = simulator.simulate_games(number_of_games=options.numGames,
-				 callback=callback)
+if options.cache:
+    cache = EquityCache(options.cache)
+    stats = cache.simulate_games(simulator,
+				 number_of_games=options.numGames,
+				 jobs=options.jobs)
+    cache.close()
+else:
+    stats = simulator.simulate_games(number_of_games=options.numGames,
+				     callback=callback,
+				     jobs=options.jobs)
 
 output_stats(simulation=simulator,
 	     stats=stats)
@@ -10,66 +10,7 @@ Based on method described in Harrington on Hold'em vol 3, page 2559.
 import optparse
 import sys
 
-def calculateEquity(stackArray):
-    """Given an array of stack sizes, return an 2-D array giving
-    percentages of probably player placement. stackArray should be
-    an array giving the stack size for each player."""
-
-    totalChips = sum(stackArray)
-    numPlayers = len(stackArray)
-
-    # If the the total number of chips is zero, result is just a 2-D
-    # array of 0%. (This serves to terminate recursion.)
-    if totalChips == 0:
-        chancesArray = [ 0.0 ] * numPlayers
-        return [ chancesArray ] * numPlayers
-
-    # Array that will hold each player's array giving their chances of
-    # finishing in each position. Note: Don't use "[ [0.0]*numPlayers]
-    # *numPlayers" here as that will simply create N references of a
-    # single array instead of N copies.
-    playerArray = [ ]
-    for player in range(numPlayers):
-        # Each interior array is the chance the player will take Nth
-        # place.
-        playerArray.append([ 0.0 ] * numPlayers)
-
-    # Now got through, calculate chance each player will finish first
-    # and if so, chances of other players finishing 2nd through
-    # Nth. Add those to playerArray.
-    for player in range(numPlayers):
-        firstPlaceChance = float(stackArray[player])/totalChips
-        playerArray[player][0] += firstPlaceChance
-
-        if firstPlaceChance == 0.0:
-            # This player has no chance of taking first, so we're done
-            # with this possibility.
-            continue
-
-        # Given this player finishes first, figure out chances for
-        # other players finishing 2nd, 3rd, etc. by calling ourself
-        # recursively.
-        
-        # First make a copy of our array of stack sizes so we don't
-        # mess it up.
-        stacks = []
-        stacks.extend(stackArray)
-
-        # Set the stack size of the player who just finished first to
-        # zero to remove them from the calculations.
-        stacks[player] = 0
-
-        # And call ourselves recursively to figure out 2nd through Nth
-        # place.
-        playerSecondPlaceArray = calculateEquity(stacks)
-
-        # Add these results back to our original array, offset by one
-        # sice they where calculating second place
-        for playerIndex in range(numPlayers):
-            for placeIndex in range(numPlayers - 1):
-                playerArray[playerIndex][placeIndex + 1 ] += firstPlaceChance * playerSecondPlaceArray[playerIndex][placeIndex]
-        
-    return playerArray
+from pyPoker import ICM
 
 def parseIntVarArgs(option, opt_str, value, parser):
     """optparse callback to handle variable number of integers."""
@@ -102,18 +43,35 @@ def main(argv=None):
                       action="callback", callback=parseIntVarArgs)
     parser.add_option("-s", "--stacks", dest="stacks",
                       action="callback", callback=parseIntVarArgs)
+    parser.add_option("-m", "--monteCarlo", action="store_true",
+                      dest="monteCarlo", default=False,
+                      help="estimate chances by simulation")
+    parser.add_option("-n", "--trials", type="int", dest="trials",
+                      default=ICM.DEFAULT_TRIALS,
+                      help="number of finishing orders to simulate (Default is %default)")
     (options, args) = parser.parse_args(argv)
 
-    playerChances = calculateEquity(options.stacks)
     numPlayers = len(options.stacks)
+    payout = options.payout or []
+    # Show every place if feasible, otherwise just those paid
+    places = numPlayers
+    if ICM.numSubproblems(numPlayers, places) > ICM.MAX_SUBPROBLEMS:
+        places = min(max(len(payout), 1), numPlayers)
+        if ICM.numSubproblems(numPlayers, places) > ICM.MAX_SUBPROBLEMS:
+            options.monteCarlo = True
+    if options.monteCarlo:
+        playerChances = ICM.simulatePlaceProbabilities(options.stacks, places,
+                                                       options.trials)
+    else:
+        playerChances = ICM.placeProbabilities(options.stacks, places)
     for player in range(numPlayers):
         print "%8d: " % options.stacks[player],
-        for place in range(numPlayers):
+        for place in range(places):
             print " %4.1f%%" % (playerChances[player][place] * 100),
         equity = 0.0
-        for place in range(numPlayers):
-            if place < len(options.payout):
-                equity += playerChances[player][place] * options.payout[place]
+        for place in range(places):
+            if place < len(payout):
+                equity += playerChances[player][place] * payout[place]
         print "  $%.2f" % equity
     return 0
 
@@ -0,0 +1,173 @@
+"""Class for ranking large batches of poker hands with NumPy.
+
+Requires the numpy module, which is otherwise optional for pyPoker."""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from Cards import Card, Cards, Rank, Suit
+from LookupRanker import LookupRanker
+from LowRanker import EightLowRanker, LowRanker
+
+class BatchRanker(object):
+    """Rank arrays of hands at once.
+
+    Hands are given as an (N, k) array of card codes (see Card.code),
+    where k is five to seven, and ranks are returned as an N-length
+    int64 array. Ranks are the integer values of the PokerRank the
+    corresponding non-batch ranker would return for the same cards, so
+    they may be compared with PokerRank instances directly.
+
+    Keys for each hand are computed with vectorized table lookups, the
+    distinct keys found with numpy.unique() and only those are looked up
+    in (and if needed added to) the LookupRanker tables, so the Python
+    overhead per batch is bounded by the number of distinct hands rather
+    than the number of rows."""
+
+    # Rank returned by rankEightLowCodes() for hands without a qualifying
+    # low. All real PokerRank values are positive.
+    NO_RANK = -1
+
+    # Per-code tables as numpy arrays. Filled in by _initTables().
+    _codeRankKeys = None
+    _codeSuitKeys = None
+    _codeSuits = None
+    _codeRankBits = None
+    _codeLowRankKeys = None
+    _codeEightLowBits = None
+
+    # Bitmask of distinct ranks eight or lower -> rank for 8-low
+    _eightLowTable = None
+
+    # Low rank key -> PokerRank for low
+    _lowTable = {}
+
+    @classmethod
+    def rankCodes(cls, codes):
+        """Return array of high ranks for (N, k) array of card codes.
+
+        Ranks match those returned by Ranker.rankHand() for a Hand
+        holding the same cards."""
+        codes = cls._checkCodes(codes)
+        numCards = codes.shape[1]
+        ranks = numpy.empty(len(codes), dtype=numpy.int64)
+        rankKeys = cls._codeRankKeys[codes].sum(axis=1)
+        suitKeys = cls._codeSuitKeys[codes].sum(axis=1)
+        flushes = ((suitKeys + LookupRanker._flushAdd) &
+                   LookupRanker._flushMask) != 0
+        noFlushes = ~flushes
+        ranks[noFlushes] = cls._lookup(
+            rankKeys[noFlushes], LookupRanker._rankTable,
+            lambda key: LookupRanker._fillRankTable(key, numCards))
+        if flushes.any():
+            flushCodes = codes[flushes]
+            flushSuitKeys = suitKeys[flushes]
+            # Index of suit with five or more cards
+            shifts = 4 * numpy.arange(len(Suit.suits))
+            suitCounts = (flushSuitKeys[:, None] >> shifts) & 0xf
+            flushSuits = suitCounts.argmax(axis=1)
+            inFlush = cls._codeSuits[flushCodes] == flushSuits[:, None]
+            flushBits = numpy.where(inFlush,
+                                    cls._codeRankBits[flushCodes],
+                                    0).sum(axis=1)
+            ranks[flushes] = cls._lookup(flushBits,
+                                         LookupRanker._flushTable,
+                                         LookupRanker._fillFlushTable)
+        return ranks
+
+    @classmethod
+    def rankLowCodes(cls, codes):
+        """Return array of low ranks for (N, k) array of card codes.
+
+        Ranks match those returned by LowRanker.rankHand()."""
+        codes = cls._checkCodes(codes)
+        lowKeys = cls._codeLowRankKeys[codes].sum(axis=1)
+        return cls._lookup(lowKeys, cls._lowTable, cls._fillLowTable)
+
+    @classmethod
+    def rankEightLowCodes(cls, codes):
+        """Return array of 8-low ranks for (N, k) array of card codes.
+
+        Ranks match those returned by EightLowRanker.rankHand(), with
+        NO_RANK for hands that do not qualify."""
+        codes = cls._checkCodes(codes)
+        bits = numpy.bitwise_or.reduce(cls._codeEightLowBits[codes], axis=1)
+        return cls._eightLowTable[bits]
+
+    @classmethod
+    def codesFromCards(cls, cardsList):
+        """Return (N, k) array of card codes given N sets of k Cards."""
+        cls._initTables()
+        return numpy.array([[card.code for card in cards]
+                            for cards in cardsList],
+                           dtype=numpy.uint8)
+
+    @classmethod
+    def _checkCodes(cls, codes):
+        """Validate array of card codes and return it as a numpy array."""
+        cls._initTables()
+        codes = numpy.asarray(codes)
+        if codes.ndim != 2:
+            raise ValueError("Expected two dimensional array of card codes")
+        if codes.shape[1] > 7:
+            raise ValueError("Hand has too many cards (%d > 7)" %
+                             codes.shape[1])
+        if codes.shape[1] < 5:
+            raise ValueError("Hand has too few cards (%d < 5)" %
+                             codes.shape[1])
+        if len(codes) and ((codes.min() < 0) or
+                           (codes.max() >= Card.numCodes)):
+            raise ValueError("Invalid card code in array")
+        return codes
+
+    @staticmethod
+    def _lookup(keys, table, fill):
+        """Map array of keys through table, calling fill() for missing keys."""
+        uniqueKeys, inverse = numpy.unique(keys, return_inverse=True)
+        values = numpy.array([table[key] if key in table else fill(key)
+                              for key in uniqueKeys.tolist()],
+                             dtype=numpy.int64)
+        return values[inverse]
+
+    @classmethod
+    def _fillLowTable(cls, lowKey):
+        """Rank a low hand with the ranks given by lowKey and add it to table."""
+        cards = Cards()
+        for rank in range(Rank.ACE_LOW, Rank.KING + 1):
+            count = (lowKey >> (3 * (rank - Rank.ACE_LOW))) & 0x7
+            for index in range(count):
+                suit = Suit.suits[len(cards) % len(Suit.suits)]
+                cards.append(Card((rank, suit)))
+        rank = LowRanker._rankHand(cards)
+        cls._lowTable[lowKey] = rank
+        return rank
+
+    @classmethod
+    def _initTables(cls):
+        """Build numpy tables on first use."""
+        if cls._codeRankKeys is not None:
+            return
+        if numpy is None:
+            raise ImportError("BatchRanker requires the numpy module")
+        cards = [Card.fromCode(code) for code in range(Card.numCodes)]
+        lowRanks = [Rank.ACE_LOW if card.rank == Rank.ACE else card.rank
+                    for card in cards]
+        cls._codeRankKeys = numpy.array(LookupRanker._codeRankKeys,
+                                        dtype=numpy.int64)
+        cls._codeSuitKeys = numpy.array(LookupRanker._codeSuitKeys,
+                                        dtype=numpy.int64)
+        cls._codeSuits = numpy.array([card.suit - Suit.CLUBS
+                                      for card in cards], dtype=numpy.int64)
+        cls._codeRankBits = numpy.array([1 << card.rank for card in cards],
+                                        dtype=numpy.int64)
+        cls._codeLowRankKeys = numpy.array(
+            [1 << (3 * (rank - Rank.ACE_LOW)) for rank in lowRanks],
+            dtype=numpy.int64)
+        cls._codeEightLowBits = numpy.array(
+            [EightLowRanker._lowRankBits[card.rank] for card in cards],
+            dtype=numpy.int64)
+        cls._eightLowTable = numpy.array(
+            [cls.NO_RANK if rank is None else rank
+             for rank in EightLowRanker._lowTable], dtype=numpy.int64)
@@ -31,14 +31,7 @@ class BitField(int):
 
     def setCount(self):
         """Return number of bits set."""
-        # Kudos Brian Kernighan
-        # http://graphics.stanford.edu/~seander/bithacks.html#CountBitsSetKernighan
-        count = 0
-        value = self.toInt()
-        while (value):
-            value &= value - 1 # This clears lowest bit
-            count += 1
-        return count
+        return popCount(int(self))
 
     def lowestSet(self):
         """Returns offset of lowest bit set.
@@ -76,23 +69,14 @@ class BitField(int):
         if value is zero, a ValueError is thrown."""
         if self == 0:
             raise ValueError("Tried to determine highest bit of zero.")
-        return shiftsUntilZero(self) - 1
+        return highestBit(int(self))
 
     def highestNSet(self, n):
         """Return array of offsets of highest n bits set.
 
         Array will be ordered from high to low.
         If value has less than n bits set, returns array of less than length n."""
-        if (n == 0) or (self == 0):
-            return []
-        highestOffset = self.highestSet()
-        bits = [highestOffset]
-        offset = highestOffset - 1
-        while ((len(bits) < n) & (offset >= 0)):
-            if self.testBit(offset):
-                bits.append(offset)
-            offset -= 1
-        return bits        
+        return highestNBits(int(self), n)
 
     def testBit(self, offset):
         """Return True if bit at given offset is set."""
@@ -176,10 +160,59 @@ class BitField(int):
 #
 # Supporting functions
 #
+# These operate on plain ints, avoiding the allocation of a new BitField
+# for every operation, and use lookup tables for values which fit in
+# TABLE_BITS bits. That covers rank masks with a bit set for each
+# rank (1 << rank, so bits 1 through 14 including low aces).
+#
+
+TABLE_BITS = 15
+
+# For each value, number of bits set
+_popCountTable = [0] * (1 << TABLE_BITS)
+
+# For each value, tuple of offsets of bits set, ordered high to low
+_setBitsTable = [()] * (1 << TABLE_BITS)
+
+for _value in range(1, 1 << TABLE_BITS):
+    _high = _value.bit_length() - 1
+    _popCountTable[_value] = _popCountTable[_value ^ (1 << _high)] + 1
+    _setBitsTable[_value] = (_high,) + _setBitsTable[_value ^ (1 << _high)]
+del _value, _high
+
+def popCount(value):
+    """Return number of bits set in non-negative int value."""
+    if value < (1 << TABLE_BITS):
+        return _popCountTable[value]
+    # Kudos Brian Kernighan
+    # http://graphics.stanford.edu/~seander/bithacks.html#CountBitsSetKernighan
+    count = 0
+    while (value):
+        value &= value - 1 # This clears lowest bit
+        count += 1
+    return count
+
+def highestBit(value):
+    """Return offset of highest bit set in positive int value."""
+    if value < (1 << TABLE_BITS):
+        return _setBitsTable[value][0]
+    return shiftsUntilZero(value) - 1
+
+def highestNBits(value, n):
+    """Return list of offsets of highest n bits set in non-negative int value.
+
+    List will be ordered from high to low.
+    If value has less than n bits set, returns list of less than length n."""
+    if value < (1 << TABLE_BITS):
+        return list(_setBitsTable[value][:n])
+    bits = []
+    offset = shiftsUntilZero(value) - 1
+    while (len(bits) < n) and (offset >= 0):
+        if value & (1 << offset):
+            bits.append(offset)
+        offset -= 1
+    return bits
+
 def shiftsUntilZero(value):
     """How many times does value have to be shifted right until it is zero?"""
-    shifts = 0
-    while(value):
-        value >>= 1
-        shifts += 1
-    return shifts
+    return int(value).bit_length()
@@ -0,0 +1,91 @@
+"""Class for reducing poker situations to their suit-isomorphic class"""
+
+import itertools
+
+from Cards import Card
+from HandGenerator import HandGenerator
+from HandRange import HandRange
+
+class Canonicalizer(object):
+    """Map hands, boards and hand ranges to a canonical form.
+
+    Two situations which differ only by a relabeling of suits (e.g. AsKs
+    vs. QsQd and AhKh vs. QhQc) have the same outcomes, so they are given
+    the same canonical form: the smallest, over all 24 permutations of
+    the suits, of the situation written as tuples of card codes.
+
+    Card order within a hand, board or range doesn't matter, but the
+    order of the hands does, since statistics are kept per hand."""
+
+    # Tables mapping card code to card code for each permutation of suits,
+    # identity first. Filled in below the class definition.
+    permutations = []
+
+    @classmethod
+    def canonicalCards(cls, cardSets):
+        """Return canonical form of a list of sets of Cards.
+
+        Returns a tuple with a sorted tuple of codes for each set."""
+        codeSets = [[card.code for card in cards] for cards in cardSets]
+        return min(tuple(tuple(sorted(table[code] for code in codes))
+                         for codes in codeSets)
+                   for table in cls.permutations)
+
+    @classmethod
+    def canonicalSituation(cls, hands, board=None):
+        """Return canonical form of hands with the given board.
+
+        hands may contain Hand, HandGenerator or HandRange instances,
+        allowing canonicalization of hand ranges. The result is a hashable tuple
+        suitable for use as a dictionary key."""
+        forms = [cls._situationForm(hands, board, table)
+                 for table in cls.permutations]
+        return min(forms)
+
+    @classmethod
+    def stabilizer(cls, cardSets):
+        """Return the permutation tables which leave every set in cardSets
+        unchanged.
+
+        Always includes the identity permutation."""
+        codeSets = [set(card.code for card in cards) for cards in cardSets]
+        tables = []
+        for table in cls.permutations:
+            for codes in codeSets:
+                if set(table[code] for code in codes) != codes:
+                    break
+            else:
+                tables.append(table)
+        return tables
+
+    @staticmethod
+    def _codes(cards, table):
+        """Return sorted tuple of codes of cards mapped through table."""
+        return tuple(sorted(table[card.code] for card in cards))
+
+    @classmethod
+    def _situationForm(cls, hands, board, table):
+        """Return situation written as tuples after mapping through table."""
+        form = []
+        for hand in hands:
+            if isinstance(hand, HandGenerator):
+                form.append(("range",) + tuple(
+                        (percentage,
+                         tuple(sorted(cls._codes(h, table) for h in group)))
+                        for percentage, group in hand.hands))
+            elif isinstance(hand, HandRange):
+                form.append(("weighted",) + tuple(sorted(
+                        (cls._codes(h, table), weight)
+                        for mask, h, weight in hand.combos)))
+            else:
+                form.append(("hand",) + cls._codes(hand, table))
+        if board is not None:
+            form.append(("board",) + cls._codes(board, table))
+        return tuple(form)
+
+# Card codes are four times the rank plus a suit index (see Card.toCode())
+for _permutation in itertools.permutations(range(4)):
+    Canonicalizer.permutations.append(
+        [code - code % 4 + _permutation[code % 4]
+         for code in range(Card.numCodes)])
+del _permutation
@@ -41,18 +41,20 @@ class Suit(int):
     suitsLongString =  { CLUBS:"clubs", DIAMONDS:"diamonds",
 			 HEARTS:"hearts", SPADES:"spades" }
 
+    suitsFromString = dict((string, suit) for suit, string
+                           in suitsShortString.items())
+
     def __init__(self, value):
 	# At this point self has already been set
-	if Suit.suits.count(self) == 0:
+	if not (Suit.CLUBS <= self <= Suit.SPADES):
 	    raise BadSuitException("Invalud value %d" % self)
 
     @staticmethod
     def fromString(string):
 	char = string.upper()
-	for key in Suit.suitsShortString.keys():
-	    if Suit.suitsShortString[key] == char:
-		break
-	else:
+	try:
+	    key = Suit.suitsFromString[char]
+	except KeyError:
 	    raise BadRankException("Bad suit \"%s\"" % char)
 	return Suit(key)
 
@@ -121,19 +123,15 @@ class Rank(int):
 
     def __init__(self, value):
 	# At this point self has already been set
-	if Rank.rankRange.count(self) == 0:
+	if not (Rank.ACE_LOW <= self <= Rank.ACE):
 	    raise BadRankException("Invalid rank value %d" % value)
 
     @staticmethod
     def fromString(string):
 	char = string.upper()
-        # Special case "A" to it doesn't become ACE_LOW
-        if char == "A":
-            return Rank(Rank.ACE)
-	for key in Rank.ranksShortString.keys():
-	    if Rank.ranksShortString[key] == char:
-		break
-	else:
+	try:
+	    key = Rank.ranksFromString[char]
+	except KeyError:
 	    raise BadRankException("Bad rank \"%s\"" % char)
 	return Rank(key)
 
@@ -158,29 +156,89 @@ class Rank(int):
     def pluralString(self):
 	return self.ranksPluralString[self]
 
+# Map from short string to rank. "A" always maps to ACE, never ACE_LOW.
+Rank.ranksFromString = dict((string, rank) for rank, string
+                            in Rank.ranksShortString.items()
+                            if rank != Rank.ACE_LOW)
+
 ######################################################################
 
-class Card:
-    def __init__(self, tuple=None):
-	"""Create a Card. Single argument can have following values:
+class Card(object):
+    """A playing card.
+
+    Cards are immutable flyweights: there is a single cached instance
+    of each card, so creating a Card is just a lookup. Each card has an
+    integer code from 0 to 51 which is its canonical identity and is
+    what Deck and the rankers use internally, and a mask with just the
+    bit for that code set, for representing sets of cards as integers.
+    An ace made low shares its code with the same ace made high."""
+
+    __slots__ = ("rank", "suit", "code", "mask")
+
+    # Number of distinct card codes
+    numCodes = 52
+
+    # Cached instances. Filled in below the class definition.
+    _byRankSuit = {}
+    _byCode = []
+
+    def __new__(cls, tuple=None):
+        """Create a Card. Single argument can have following values:
+
+        None - create uninitialized card.
+        (rank,suit) - tuple of rank and suit, e.g. (10, CLUBS), (ACE, SPADES)
+        """
+        if tuple is None:
+            return object.__new__(cls)
+        try:
+            return cls._byRankSuit[tuple]
+        except (KeyError, TypeError):
+            pass
+        rank, suit = tuple
+        # Raise appropriate exception for invalid values
+        Rank(rank)
+        Suit(suit)
+        # Valid values we haven't cached, e.g. rank or suit is a float
+        return cls._byRankSuit[(int(rank), int(suit))]
+
+    @classmethod
+    def _create(cls, rank, suit):
+        """Create a new instance. Only used to fill the cache."""
+        card = object.__new__(cls)
+        object.__setattr__(card, "rank", Rank(rank))
+        object.__setattr__(card, "suit", Suit(suit))
+        object.__setattr__(card, "code", cls.toCode(rank, suit))
+        object.__setattr__(card, "mask", 1 << card.code)
+        return card
+
+    @staticmethod
+    def toCode(rank, suit):
+        """Return the integer code for the given rank and suit."""
+        if rank == Rank.ACE_LOW:
+            rank = Rank.ACE
+        return (rank - Rank.TWO) * 4 + (suit - Suit.CLUBS)
 
-	None - create uninitialized card.
-	(rank,suit) - tuple of rank and suit, e.g. (10, CLUBS), (ACE, SPADES)
-	"""
-	if tuple:
-	    rank, suit = tuple
-	    self.rank = Rank(rank)
-	    self.suit = Suit(suit)
+    @classmethod
+    def fromCode(cls, code):
+        """Return the card with the given integer code."""
+        return cls._byCode[code]
 
     @staticmethod
     def fromString(string):
 	if len(string) != 2:
-	    raise BadCardValueException("Bad card string (%s) - wrong length (!=2)" % desc)
+	    raise BadCardValueException("Bad card string (%s) - wrong length (!=2)" % string)
 	string = string.upper()
-	c = Card()
-	c.rank = Rank.fromString(string[0])
-	c.suit = Suit.fromString(string[1])
-	return c
+	return Card((Rank.fromString(string[0]), Suit.fromString(string[1])))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Card instances are immutable")
+
+    def __reduce__(self):
+        # Unpickle to the cached instance
+        try:
+            return (Card, ((self.rank, self.suit),))
+        except AttributeError:
+            return (Card, ())
 
     def __str__(self):
 	return str(self.rank) + str(self.suit)
@@ -205,25 +263,36 @@ class Card:
 	return (self.suit == other.suit) and (self.rank == other.rank)
 
     def copy(self):
-	"""Return a copy of myself."""
-	import copy
-	return copy.copy(self)
+	"""Return a copy of myself. Since Cards are immutable, this is myself."""
+	return self
 
     def makeAcesLow(self):
-        """Make any ace low."""
+        """Return this card with any ace made low."""
         if self.rank == Rank.ACE:
-            self.rank = Rank(Rank.ACE_LOW)
+            return Card((Rank.ACE_LOW, self.suit))
+        return self
 
     def makeAcesHigh(self):
-        """Make any ace high."""
+        """Return this card with any ace made high."""
         if self.rank == Rank.ACE_LOW:
-            self.rank = Rank(Rank.ACE)
+            return Card((Rank.ACE, self.suit))
+        return self
 
     def isEightOrLower(self):
         """Return True if this card is an eight or lower (including ace)"""
         return  ((self.rank <= Rank.EIGHT) or
                  (self.rank == Rank.ACE))
 
+for _suit in Suit.suits:
+    for _rank in Rank.rankRange:
+        Card._byRankSuit[(_rank, _suit)] = Card._create(_rank, _suit)
+Card._byCode = [None] * Card.numCodes
+for _suit in Suit.suits:
+    for _rank in Rank.ranks:
+        _card = Card._byRankSuit[(_rank, _suit)]
+        Card._byCode[_card.code] = _card
+del _suit, _rank, _card
+
 ######################################################################
 #
 # Cards Object
@@ -273,13 +342,36 @@ class Cards(list):
 
     def makeAcesLow(self):
         """Make aces low."""
-        for card in self:
-            card.makeAcesLow()
+        for index, card in enumerate(self):
+            if card.rank == Rank.ACE:
+                self[index] = card.makeAcesLow()
 
     def makeAcesHigh(self):
         """Make aces high."""
-        for card in self:
-            card.makeAcesHigh()
+        for index, card in enumerate(self):
+            if card.rank == Rank.ACE_LOW:
+                self[index] = card.makeAcesHigh()
+
+    @classmethod
+    def fromCodes(cls, codes):
+        """Create an object from an array of integer card codes."""
+        byCode = Card._byCode
+        return cls([byCode[code] for code in codes])
+
+    def codes(self):
+        """Return an array of the integer codes of the cards."""
+        return [card.code for card in self]
+
+    @classmethod
+    def fromMask(cls, mask):
+        """Create an object from a mask of card codes (see getMask())."""
+        byCode = Card._byCode
+        return cls([byCode[code] for code in range(Card.numCodes)
+                    if mask & (1 << code)])
+
+    def getMask(self):
+        """Return the cards as an integer with the bit for each card's code set."""
+        return cardsMask(self)
 
     def str(self):
 	return self.__str__()
@@ -395,3 +487,17 @@ class Cards(list):
     def getEightOrLower(self):
         """Return subset of cards that are eight or lower in rank (including ace)"""
         return Cards(filter(lambda card: card.isEightOrLower(), self))
+
+######################################################################
+#
+# Supporting functions
+#
+
+def cardsMask(cards):
+    """Return mask with bit for each card's code set.
+
+    cards may be any iterable of Card instances."""
+    mask = 0
+    for card in cards:
+        mask |= card.mask
+    return mask
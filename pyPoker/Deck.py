@@ -1,9 +1,10 @@
 """Class for representing a deck of playing cards."""
 
 from PokerException import PokerException
-from Cards import Cards, Card, Suit, Rank
-from Hand import Hand
+from Cards import Cards, Card, Suit, Rank, cardsMask
+from Hand import Hand, InvalidHandTypeException
 from Hands import Hands
+from Utils import get_rng
 
 ######################################################################
 #
@@ -24,13 +25,33 @@ class CardNotFoundException(PokerException):
 #
 
 class Deck(Cards):
+    """A deck of cards.
+
+    In addition to the list of cards, a Deck keeps the mask of the
+    cards it contains (see Cards.getMask()) in self.mask, so that
+    membership can be tested with a single integer operation. The
+    mask is kept up to date by all the list methods that change the
+    contents of the deck."""
+
     # Number of cards in full deck
     numCards = 52
 
-    def __init__(self, cards = None):
+    # Mask of a full deck
+    fullMask = (1 << numCards) - 1
+
+    def __init__(self, cards = None, rng = None):
 	"""Create a new deck of cards. Note that deck is not shuffled.  Deck
 	will have standards 52 cards, unless arguments cards is not None, it
-	should be a Cards object which the deck should contain."""
+	should be a Cards object which the deck should contain.
+
+	rng is the random number generator (e.g. a random.Random instance)
+	used to shuffle the deck. If None, the random module is used."""
+	self.mask = 0
+	self.rng = rng
+	# Buffer of cards used by sample() and the deck mask it was built
+	# for, None if the deck has been reordered since
+	self._sampleBuffer = None
+	self._sampleBufferMask = None
 	if cards is None:
 	    self.reset()
 	else:
@@ -38,16 +59,138 @@ class Deck(Cards):
 
     def reset(self):
 	"""Reset to a fresh deck of 52 cards."""
-	del self[:]
-	for suit in Suit.suits:
-	    for rank in Rank.ranks:
-		self.append(Card((rank, suit)))
+	list.__delslice__(self, 0, len(self))
+	list.extend(self, [Card.fromCode(code) for code in range(Card.numCodes)])
+	self.mask = self.fullMask
+	self._sampleBufferMask = None
+
+    #
+    # List methods overridden to maintain self.mask
+    #
+
+    def append(self, card):
+	list.append(self, card)
+	self.mask |= card.mask
+
+    def extend(self, cards):
+	cards = list(cards)
+	list.extend(self, cards)
+	self.mask |= cardsMask(cards)
+
+    def insert(self, index, card):
+	list.insert(self, index, card)
+	self.mask |= card.mask
+
+    def pop(self, index=-1):
+	card = list.pop(self, index)
+	self.mask &= ~card.mask
+	return card
+
+    def remove(self, card):
+	list.remove(self, card)
+	self._updateMask()
+
+    def __delitem__(self, index):
+	list.__delitem__(self, index)
+	self._updateMask()
+
+    def __delslice__(self, start, stop):
+	list.__delslice__(self, start, stop)
+	self._updateMask()
+
+    def __setitem__(self, index, value):
+	list.__setitem__(self, index, value)
+	self._updateMask()
+	self._sampleBufferMask = None
+
+    def __setslice__(self, start, stop, cards):
+	list.__setslice__(self, start, stop, cards)
+	self._updateMask()
+	self._sampleBufferMask = None
+
+    def __iadd__(self, cards):
+	self.extend(cards)
+	return self
 
-    def shuffle(self):
+    def __imul__(self, count):
+	list.__imul__(self, count)
+	self._updateMask()
+	self._sampleBufferMask = None
+	return self
+
+    def sort(self, reverse=False):
+	Cards.sort(self, reverse=reverse)
+	self._sampleBufferMask = None
+
+    def reverse(self):
+	list.reverse(self)
+	self._sampleBufferMask = None
+
+    def getMask(self):
+	"""Return mask of cards in deck."""
+	return self.mask
+
+    def _updateMask(self):
+	"""Recompute self.mask from scratch."""
+	self.mask = cardsMask(self)
+
+    def shuffle(self, rng = None):
 	"""Shuffle cards in deck. Note that this does not restore any dealt
-	cards."""
-	from random import shuffle
-	shuffle(self)
+	cards.
+
+	rng overrides the deck's random number generator if given."""
+	if rng is None:
+	    rng = self.rng
+	# Shuffle a plain list so mask isn't recomputed for every swap
+	cards = list(self)
+	get_rng(rng).shuffle(cards)
+	list.__setslice__(self, 0, len(self), cards)
+	self._sampleBufferMask = None
+
+    def sample(self, numCards, rng=None, excludeMask=0):
+	"""Return Cards with numCards random cards from the deck.
+
+	Cards are not removed from the deck, so successive calls are
+	independent deals from the same deck. Any cards in excludeMask
+	(see Cards.getMask()) are not returned.
+
+	This is a partial Fisher-Yates shuffle of a buffer kept with the
+	deck, so only numCards random numbers are drawn and the deck is
+	not copied. The swaps are undone afterwards so the result depends
+	only on the deck and the random numbers drawn. rng overrides the
+	deck's random number generator if given."""
+	if rng is None:
+	    rng = self.rng
+	random = get_rng(rng).random
+	if self._sampleBufferMask != self.mask:
+	    self._sampleBuffer = list(self)
+	    self._sampleBufferMask = self.mask
+	buffer = self._sampleBuffer
+	swaps = []
+	# Cards in buffer[:dealt] have been chosen, buffer[size:] excluded
+	size = len(buffer)
+	dealt = 0
+	try:
+	    while dealt < numCards:
+		if dealt == size:
+		    raise NotEnoughCardsException(
+			"Asked for %d cards, only %d available" %
+			(numCards, dealt))
+		index = dealt + int(random() * (size - dealt))
+		card = buffer[index]
+		if card.mask & excludeMask:
+		    size -= 1
+		    swap = size
+		else:
+		    swap = dealt
+		    dealt += 1
+		buffer[index] = buffer[swap]
+		buffer[swap] = card
+		swaps.append((index, swap))
+	    return Cards(buffer[:numCards])
+	finally:
+	    for index, swap in reversed(swaps):
+		buffer[index], buffer[swap] = buffer[swap], buffer[index]
 
     def deal(self, hands, numCards=1):
 	"""Deal numCards to given hands. hands may be a single Hand or
@@ -68,12 +211,13 @@ class Deck(Cards):
 	    h = hands
 	    hands = Hands()
 	    hands.addHand(h)
+	for hand in hands:
+	    if not isinstance(hand, Hand):
+		raise InvalidHandTypeException("Bad hand type (%s)"
+					       % hand.__class__)
         while True:
             cardDealt = False
             for hand in hands:
-		if not isinstance(hand, Hand):
-		    raise InvalidHandTypeException("Bad hand type (%s)"
-						   % hand.__class__)
                 if len(hand) < hand.getMaxCards():
 		    try:
 			hand.addCard(self.pop())
@@ -99,25 +243,27 @@ class Hand, but this can be overridden with handClass."""
 
     def findCard(self, card):
 	"""Return index of given card in deck."""
-	index = None
-	for i in range(len(self)):
-	    if self[i].eq(card):
-		index = i
-		break
-	else:
+	if not (self.mask & card.mask):
 	    raise CardNotFoundException("Card %s not found in deck." % card)
-	return index
+	code = card.code
+	for index, c in enumerate(self):
+	    if c.code == code:
+		return index
+	# Should never get here
+	raise CardNotFoundException("Card %s not found in deck." % card)
+
+    def cardInDeck(self, card):
+	"""Return True if card is in deck, False otherwise."""
+	return (self.mask & card.mask) != 0
 
     def cardsInDeck(self, cards):
 	"""Return True if all cards are in deck, False otherwise."""
-	result = True
-	for card in cards:
-	    try:
-		self.findCard(card)
-	    except:
-		result = False
-		break
-	return result
+	mask = cardsMask(cards)
+	return (self.mask & mask) == mask
+
+    def maskInDeck(self, mask):
+	"""Return True if all cards in mask (see Cards.getMask()) are in deck."""
+	return (self.mask & mask) == mask
 
     def dealCard(self, hand, card):
 	"""Deal a specific card to the given hand."""
@@ -130,12 +276,19 @@ class Hand, but this can be overridden with handClass."""
 	    return
 	if isinstance(cards, Card):
 	    cards = [ cards ]
-	for card in cards:
-	    index = self.findCard(card)
-	    self.pop(index)
+	mask = cardsMask(cards)
+	if (self.mask & mask) != mask:
+	    missing = Cards.fromMask(mask & ~self.mask)
+	    raise CardNotFoundException("Card %s not found in deck." % missing)
+	self.removeMask(mask)
+
+    def removeMask(self, mask):
+	"""Remove and discard any cards in mask (see Cards.getMask())."""
+	if self.mask & mask:
+	    list.__setslice__(self, 0, len(self),
+			      [card for card in self if not (card.mask & mask)])
+	    self.mask &= ~mask
 
     def copy(self):
 	"""Return a copy of this Deck."""
-	import copy
-	return copy.copy(self)
-
+	return Deck(self, rng = self.rng)
@@ -0,0 +1,89 @@
+"""Class for persistently caching simulation results"""
+
+import shelve
+
+from Canonicalizer import Canonicalizer
+
+class EquityCache(object):
+    """Persistent cache of Stats from simulations, keyed by situation.
+
+    Situations are reduced with Canonicalizer, so a cached result is
+    reused for any situation which differs only by a relabeling of
+    suits. Results are stored with shelve in the given file.
+
+    Results from simulate_games() are only reused for the same number of
+    games; results from enumerate_games() are exact and reused always.
+    The cache can be used as a context manager to close it when done.
+
+    Keys include FORMAT_VERSION, so results cached by versions of Stats
+    with different attributes are treated as missing."""
+
+    # Version of pickled Stats in the cache. Must be increased whenever
+    # attributes of Stats change.
+    FORMAT_VERSION = 2
+
+    def __init__(self, filename):
+        """Open (or create) cache in filename."""
+        self.shelf = shelve.open(filename)
+
+    def simulate_games(self, simulator, number_of_games=100,
+                       precision=None, confidence=0.95, **kwargs):
+        """Return Stats for simulator.simulate_games(), from cache if possible.
+
+        Additional keyword arguments (e.g. jobs) are passed on to
+        simulate_games(). Results are not available for callbacks."""
+        key = self.key(simulator, "simulate", number_of_games,
+                       precision, confidence)
+        stats = self.shelf.get(key)
+        if stats is None:
+            stats = simulator.simulate_games(number_of_games=number_of_games,
+                                             precision=precision,
+                                             confidence=confidence,
+                                             **kwargs)
+            self.shelf[key] = stats
+        return stats
+
+    def enumerate_games(self, simulator, suit_isomorphism=True):
+        """Return Stats for simulator.enumerate_games(), from cache if possible."""
+        key = self.key(simulator, "enumerate")
+        stats = self.shelf.get(key)
+        if stats is None:
+            stats = simulator.enumerate_games(
+                suit_isomorphism=suit_isomorphism)
+            self.shelf[key] = stats
+        return stats
+
+    def key(self, simulator, method, number_of_games=None,
+            precision=None, confidence=None):
+        """Return cache key for given simulator and method."""
+        situation = Canonicalizer.canonicalSituation(
+            simulator.get_predefined_hands() or [], simulator.board)
+        simulatorClass = simulator.__class__
+        key = (self.FORMAT_VERSION,
+               "%s.%s" % (simulatorClass.__module__,
+                          simulatorClass.__name__),
+               simulator.number_of_hands,
+               situation,
+               method,
+               number_of_games)
+        if precision is not None:
+            key += (precision, confidence)
+        return repr(key)
+
+    def __len__(self):
+        return len(self.shelf)
+
+    def clear(self):
+        """Remove all cached results."""
+        self.shelf.clear()
+
+    def close(self):
+        """Close the cache, writing any changes to disk."""
+        self.shelf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+        return False
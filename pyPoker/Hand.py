@@ -224,6 +224,10 @@ class CommunityCardHand(Hand):
 
     boardClass = Board
 
+    # Number of hole cards which must be used in every combination with
+    # the board, or 0 if any of the cards may be used (e.g. HoldEm)
+    requiredHoleCards = 0
+
     def __init__(self, cards = None, board=None):
 	"""Create a new hand. Arguments:
 
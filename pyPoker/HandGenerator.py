@@ -9,7 +9,9 @@
 
 from PokerException import PokerException
 from Hand import Hand
+from Cards import cardsMask
 from Deck import Deck
+from Utils import get_rng
 
 ######################################################################
 #
@@ -31,6 +33,13 @@ class HandGenerator:
     # Type of hand generated
     handClass = Hand
 
+    # Number of hands drawn which are not available before
+    # generateHand() falls back to considering only available hands
+    MAX_ATTEMPTS = 100
+
+    # Allowed rounding error in sum of non-integer percentages
+    _EPSILON = 1e-9
+
     def __init__(self, hands=None):
 	"""Arguments: [hands, [name]]
 
@@ -40,53 +49,126 @@ class HandGenerator:
 	self.hands = []
 	self.totalPercentage = 0
 	self.name = None
+	# Alias table built from self.hands by _compile()
+	self._combos = None
 	if hands:
 	    self.addHands(hands)
 
-    def generateHand(self, deck=None):
-	"""Generate a hand.
+    def generateHand(self, deck=None, rng=None, excludeMask=None):
+        """Generate a hand.
 
-	If deck is provided, then it is a Deck from which hand is drawn."""
-	from random import choice, shuffle
-	hands = self._pickHands()
-	if deck is None:
-	    # No deck to constrian choices, just pick a hand at random
-	    hand = self.handClass(cards = choice(hands))
-	else:
-	    # We need to ensure our choice can be drawn from the deck
-	    # Put hands in random order and try in sequence
-	    shuffle(hands)
-	    for h in hands:
-		if deck.cardsInDeck(h):
-		    deck.removeCards(h)
-		    hand = self.handClass(cards = h)
-		    break
-	    else:
-		raise HandGenerationException("Couldn't find hand in deck.")
-	return hand
+        If deck is provided, then it is a Deck from which hand is drawn.
+
+        If excludeMask is provided (and deck is not), it is a mask of
+        cards (see Cards.getMask()) which may not be in the generated hand.
+        The caller is responsible for adding the hand's cards to the mask.
+
+        rng is the random number generator to use. If None, the deck's
+        generator is used, or the random module if there is no deck.
+
+        Each hand is generated with probability equal to its share of
+        the percentage of the group it was added with, summed over
+        groups. Hands which are not available are redrawn, so the
+        remaining hands keep their relative probabilities."""
+        if (rng is None) and (deck is not None):
+            rng = deck.rng
+        rng = get_rng(rng)
+        if self._combos is None:
+            self._compile()
+        for attempt in xrange(self.MAX_ATTEMPTS):
+            mask, cards = self._combos[self._pickCombo(rng)]
+            if self._available(cards, mask, deck, excludeMask):
+                break
+        else:
+            # Most hands are unavailable, pick from those that are
+            combos = [(mask, cards, weight) for (mask, cards), weight
+                      in zip(self._combos, self._weights)
+                      if self._available(cards, mask, deck, excludeMask)]
+            if not combos:
+                raise HandGenerationException("Couldn't find hand in deck.")
+            choice = rng.random() * sum(weight for mask, cards, weight
+                                        in combos)
+            for mask, cards, weight in combos:
+                choice -= weight
+                if choice < 0:
+                    break
+        if deck is not None:
+            deck.removeCards(cards)
+        return self.handClass(cards = cards)
 
     def addHands(self, hands, percentage=100):
-	if (percentage < 0) or (percentage > 100):
-	    raise InvalidArgument("Percentage (%d) out of range." % percentage)
-	if self.totalPercentage + percentage > 100:
-	    raise ValueError("Percent total greater than 100")
-	self.hands.append((percentage, hands))
-	self.totalPercentage += percentage
-
-    def _pickHands(self):
-	from random import randint
-	# check hands and make sure percentage adds up to 100
-	if self.totalPercentage != 100:
-	    raise HandGenerationException("Bad total percentage for hand (%d%%)" % self.totalPercentage)
-	rand = randint(1,100)
-	total = 0
-	for h in self.hands:
-	    (percent, hands) = h
-	    if total + percent >= rand:
-		return hands
-	    total += percent
-	# Should never get here
-	raise HandGenerationException("Didn't match a hand.")
+        """Add a group of hands generated percentage percent of the time.
+
+        percentage need not be an integer."""
+        if (percentage < 0) or (percentage > 100):
+            raise ValueError("Percentage (%s) out of range." % percentage)
+        if self.totalPercentage + percentage > 100 + self._EPSILON:
+            raise ValueError("Percent total greater than 100")
+        self.hands.append((percentage, hands))
+        self.totalPercentage += percentage
+        self._combos = None
+
+    def _compile(self):
+        """Build alias table for picking a hand in O(1) time.
+
+        Sets self._combos to a list of (mask, cards) for each distinct
+        hand, self._weights to its percentage and self._probabilities
+        and self._aliases to Walker's alias table for picking one."""
+        # check hands and make sure percentage adds up to 100
+        if abs(self.totalPercentage - 100) > self._EPSILON:
+            raise HandGenerationException("Bad total percentage for hand (%s%%)" % self.totalPercentage)
+        combos = []
+        weights = []
+        indexes = {}
+        for percentage, hands in self.hands:
+            for cards in hands:
+                mask = cardsMask(cards)
+                if not indexes.has_key(mask):
+                    indexes[mask] = len(combos)
+                    combos.append((mask, cards))
+                    weights.append(0.0)
+                weights[indexes[mask]] += float(percentage) / len(hands)
+        if not combos:
+            raise HandGenerationException("No hands to generate")
+        # Scale weights so they average one, then pair each underfull
+        # slot with an overfull one which fills the rest of it.
+        total = sum(weights)
+        probabilities = [weight * len(weights) / total for weight in weights]
+        aliases = range(len(weights))
+        small = [index for index, p in enumerate(probabilities) if p < 1.0]
+        large = [index for index, p in enumerate(probabilities) if p >= 1.0]
+        while small and large:
+            index = small.pop()
+            alias = large.pop()
+            aliases[index] = alias
+            probabilities[alias] -= 1.0 - probabilities[index]
+            if probabilities[alias] < 1.0:
+                small.append(alias)
+            else:
+                large.append(alias)
+        # Anything left is one up to rounding error
+        for index in small + large:
+            probabilities[index] = 1.0
+        self._combos = combos
+        self._weights = weights
+        self._probabilities = probabilities
+        self._aliases = aliases
+
+    def _pickCombo(self, rng):
+        """Return index into self._combos of a hand picked by weight."""
+        index = int(rng.random() * len(self._combos))
+        if rng.random() < self._probabilities[index]:
+            return index
+        return self._aliases[index]
+
+    @staticmethod
+    def _available(cards, mask, deck, excludeMask):
+        """Can cards with the given mask be generated?"""
+        if deck is not None:
+            return deck.cardsInDeck(cards)
+        if excludeMask is not None:
+            return not (mask & excludeMask)
+        return True
 
     def setName(self, name):
 	self.name = name
@@ -100,4 +182,4 @@ class HandGenerator:
     def dump(self):
 	for h in self.hands:
 	    per, hand = h
-	    print "%d%%: %s" % (per, hand)
+	    print "%s%%: %s" % (per, hand)
@@ -0,0 +1,343 @@
+"""Compact binary hand histories of PokerGame.Game and their replay
+
+A Game given a HandHistoryWriter writes every hand it plays to a
+stream as one binary record holding the deck order, the seats and
+stacks of the players, every action and the showdown ranks and final
+stacks. HandHistory maps such a file into memory, indexes its hands
+without parsing them and parses each hand only when it is accessed, so
+large runs of bot play can be stored and re-analysed cheaply.
+replay() re-executes a recorded hand with a Game.
+
+The stream starts with MAGIC, followed by records which are a type
+byte and length of the body (RECORD_HEADER) and then the body. There
+are two types of record:
+
+RECORD_SEATS, written before the first hand and whenever the players
+seated change, holds the number of seats and of players at the table
+(SEATS_HEADER) and then for each player the seat, the length of the
+name and the name (SEAT).
+
+RECORD_HAND holds HAND_HEADER (hand number, dealer seat, number of
+cards in deck, players, actions and results), the codes of the cards
+in the deck in the order it was dealt from, then for each seated player
+PLAYER (seat, status and stack at the start of the hand), for each
+action ACTION (betting round, seat, type with ALL_IN_FLAG for an all-in
+and amount) and for each seated player RESULT (seat, high rank shown or
+0 and stack at the end of the hand)."""
+
+import array
+import mmap
+import random
+import struct
+
+from Action import Action
+from Cards import Card
+from Deck import Deck
+from PokerException import PokerException
+from PokerRank import PokerRank
+from Player import Player, Table
+import PokerGame
+
+######################################################################
+#
+# Exceptions
+#
+
+class HandHistoryException(PokerException):
+    """Hand history is invalid or could not be replayed."""
+    pass
+
+######################################################################
+#
+# File format
+#
+
+# First bytes of a hand history stream
+MAGIC = "pyPokHH1"
+
+RECORD_SEATS = 0x01
+RECORD_HAND = 0x02
+
+RECORD_HEADER = struct.Struct("<BI")
+SEATS_HEADER = struct.Struct("<BB")
+SEAT = struct.Struct("<BB")
+HAND_HEADER = struct.Struct("<IBBBHB")
+PLAYER = struct.Struct("<BBq")
+ACTION = struct.Struct("<BBBq")
+RESULT = struct.Struct("<BIq")
+
+# Set in the type of an ACTION for an all-in
+ALL_IN_FLAG = 0x80
+
+######################################################################
+
+class HandHistoryWriter(object):
+    """Write hands played by a Game to a binary stream.
+
+    Pass an instance as the history argument to Game. HandState calls
+    start_hand(), BettingRound calls record_action() for each action and
+    Game calls record_rank() at showdown and end_hand() when the hand is
+    over, which writes the hand to the stream."""
+
+    def __init__(self, stream):
+        """stream must be a file-like object opened for binary writing."""
+        self.stream = stream
+        self.hands_written = 0
+        self._seat_names = None
+        self._number_of_seats = None
+        self._table = None
+        stream.write(MAGIC)
+
+    def start_hand(self, table, deck):
+        """Start recording a hand at table to be dealt from deck."""
+        players = table.get_seated_players()
+        seat_names = [(table.get_player_seat(player), str(player))
+                      for player in players]
+        if (seat_names != self._seat_names) or \
+                (table.number_of_seats != self._number_of_seats):
+            self._write_seats(table.number_of_seats, seat_names)
+        self._table = table
+        self._dealer_seat = table.get_player_seat(table.get_dealer())
+        self._deck = "".join([chr(card.code) for card in deck])
+        self._players = "".join([PLAYER.pack(table.get_player_seat(player),
+                                             player.status,
+                                             player.stack)
+                                 for player in players])
+        self._actions = []
+        self._ranks = {}
+
+    def record_action(self, betting_round, player, action):
+        """Record action by player in betting round with given number."""
+        action_type = action.type
+        if action.is_all_in():
+            action_type |= ALL_IN_FLAG
+        self._actions.append(
+            ACTION.pack(betting_round,
+                        self._table.get_player_seat(player),
+                        action_type,
+                        action.amount))
+
+    def record_rank(self, player, rank):
+        """Record high rank of player's hand at showdown."""
+        self._ranks[player] = rank
+
+    def end_hand(self):
+        """Finish recording the hand and write it to the stream."""
+        table = self._table
+        players = table.get_seated_players()
+        results = "".join([RESULT.pack(table.get_player_seat(player),
+                                       self._ranks.get(player, 0),
+                                       player.stack)
+                           for player in players])
+        header = HAND_HEADER.pack(self.hands_written,
+                                  self._dealer_seat,
+                                  len(self._deck),
+                                  len(players),
+                                  len(self._actions),
+                                  len(players))
+        self._write_record(RECORD_HAND,
+                           header + self._deck + self._players +
+                           "".join(self._actions) + results)
+        self.hands_written += 1
+        self._actions = None
+        self._ranks = None
+
+    def _write_seats(self, number_of_seats, seat_names):
+        """Write a RECORD_SEATS record."""
+        body = [SEATS_HEADER.pack(number_of_seats, len(seat_names))]
+        for seat, name in seat_names:
+            name = name[:255]
+            body.append(SEAT.pack(seat, len(name)) + name)
+        self._write_record(RECORD_SEATS, "".join(body))
+        self._seat_names = seat_names
+        self._number_of_seats = number_of_seats
+
+    def _write_record(self, record_type, body):
+        self.stream.write(RECORD_HEADER.pack(record_type, len(body)) + body)
+
+######################################################################
+
+class HandRecord(object):
+    """A hand read from a hand history.
+
+    Has the following attributes:
+    number - hand number, counting from zero
+    number_of_seats - number of seats at the table
+    names - dictionary of player names by seat
+    dealer_seat - seat of the dealer
+    deck - Deck in the order it was at the start of the hand
+    players - list of (seat, status, stack) at the start of the hand
+    actions - list of (betting round, seat, Action)
+    results - list of (seat, high rank or None, stack) at the end"""
+
+    def __init__(self, data, offset, number_of_seats, names):
+        """Parse hand from RECORD_HAND body at offset in data."""
+        self.number_of_seats = number_of_seats
+        self.names = names
+        (self.number, self.dealer_seat, deck_size, num_players,
+         num_actions, num_results) = HAND_HEADER.unpack_from(data, offset)
+        offset += HAND_HEADER.size
+        self.deck = Deck([Card.fromCode(ord(code))
+                          for code in data[offset:offset + deck_size]])
+        offset += deck_size
+        self.players = []
+        for index in xrange(num_players):
+            self.players.append(PLAYER.unpack_from(data, offset))
+            offset += PLAYER.size
+        self.actions = []
+        for index in xrange(num_actions):
+            betting_round, seat, action_type, amount = \
+                ACTION.unpack_from(data, offset)
+            offset += ACTION.size
+            action = Action(action_type & ~ALL_IN_FLAG, amount=amount,
+                            all_in=bool(action_type & ALL_IN_FLAG))
+            self.actions.append((betting_round, seat, action))
+        self.results = []
+        for index in xrange(num_results):
+            seat, rank, stack = RESULT.unpack_from(data, offset)
+            offset += RESULT.size
+            if rank == 0:
+                rank = None
+            else:
+                rank = PokerRank.fromValue(rank)
+            self.results.append((seat, rank, stack))
+
+    def get_winnings(self):
+        """Return dictionary of chips won (or lost) by seat."""
+        starting_stacks = dict([(seat, stack)
+                                for seat, status, stack in self.players])
+        return dict([(seat, stack - starting_stacks[seat])
+                     for seat, rank, stack in self.results])
+
+######################################################################
+
+class ReplayPlayer(Player):
+    """Player who makes the actions recorded for them in a HandRecord."""
+
+    def __init__(self, name=None, stack=0, actions=None):
+        """actions is the list of Actions to make, in order."""
+        Player.__init__(self, name=name, stack=stack)
+        if actions is None:
+            actions = []
+        self._actions = list(reversed(actions))
+
+    def get_action(self, request, game, hand_state):
+        """Return next recorded action."""
+        if not self._actions:
+            raise HandHistoryException("%s has no more recorded actions" %
+                                       self)
+        return self._actions.pop()
+
+######################################################################
+
+class HandHistory(object):
+    """Hands in the format written by HandHistoryWriter.
+
+    Creating a HandHistory only indexes the records, reading the type
+    and length of each, and a hand is parsed into a HandRecord when
+    accessed by index or iteration."""
+
+    def __init__(self, data):
+        """Create from data in the file format (e.g. from an mmap).
+
+        Use load() to read a file."""
+        if data[:len(MAGIC)] != MAGIC:
+            raise HandHistoryException("Not a hand history")
+        self._data = data
+        # Offset of each hand's body and of the body of the seats
+        # record in effect for it
+        self._hand_offsets = array.array("L")
+        self._seat_offsets = array.array("L")
+        seat_offset = None
+        offset = len(MAGIC)
+        size = len(data)
+        while offset < size:
+            if offset + RECORD_HEADER.size > size:
+                raise HandHistoryException("Truncated record header")
+            record_type, length = RECORD_HEADER.unpack_from(data, offset)
+            offset += RECORD_HEADER.size
+            if offset + length > size:
+                raise HandHistoryException("Truncated record")
+            if record_type == RECORD_SEATS:
+                seat_offset = offset
+            elif record_type == RECORD_HAND:
+                if seat_offset is None:
+                    raise HandHistoryException("Hand before seats")
+                self._hand_offsets.append(offset)
+                self._seat_offsets.append(seat_offset)
+            else:
+                raise HandHistoryException("Unknown record type %d" %
+                                           record_type)
+            offset += length
+        self._seats_cache = (None, None)
+
+    @classmethod
+    def load(cls, filename):
+        """Map hand history in given file into memory."""
+        with open(filename, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(data)
+
+    def close(self):
+        """Release memory mapping, if any."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __len__(self):
+        return len(self._hand_offsets)
+
+    def __getitem__(self, index):
+        """Return HandRecord of hand with given index."""
+        number_of_seats, names = self._get_seats(self._seat_offsets[index])
+        return HandRecord(self._data, self._hand_offsets[index],
+                          number_of_seats, names)
+
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield self[index]
+
+    def replay(self, index, structure, GameClass=None):
+        """Re-execute hand with given index, returning the Game.
+
+        structure is the Structure of the recorded game and GameClass
+        the Game class which played it (default PokerGame.Game). Players
+        are ReplayPlayers at the recorded seats with the recorded stacks
+        and the hand is dealt from the recorded deck, so at the end of
+        it the players' stacks should match the recorded results."""
+        if GameClass is None:
+            GameClass = PokerGame.Game
+        record = self[index]
+        table = Table(number_of_seats=record.number_of_seats)
+        for seat, status, stack in record.players:
+            actions = [action
+                       for betting_round, action_seat, action in record.actions
+                       if (action_seat == seat) and not action.is_blind()]
+            player = ReplayPlayer(name=record.names.get(seat), stack=stack,
+                                  actions=actions)
+            table.seat_player(player, seat_number=seat)
+            if status == Player.STATUS_SITTING_OUT:
+                player.sit_out()
+        # Game picks a random dealer, which we replace
+        game = GameClass(table, structure, rng=random.Random(0))
+        table.set_dealer(table.get_player_by_seat(record.dealer_seat))
+        game.play_hand(deck=Deck(record.deck))
+        return game
+
+    def _get_seats(self, offset):
+        """Return number of seats and names by seat from RECORD_SEATS body
+        at offset, caching the last one parsed."""
+        cached_offset, seats = self._seats_cache
+        if cached_offset == offset:
+            return seats
+        data = self._data
+        number_of_seats, count = SEATS_HEADER.unpack_from(data, offset)
+        offset_in_record = offset + SEATS_HEADER.size
+        names = {}
+        for index in xrange(count):
+            seat, length = SEAT.unpack_from(data, offset_in_record)
+            offset_in_record += SEAT.size
+            names[seat] = data[offset_in_record:offset_in_record + length]
+            offset_in_record += length
+        seats = (number_of_seats, names)
+        self._seats_cache = (offset, seats)
+        return seats
@@ -0,0 +1,194 @@
+######################################################################
+#
+# HandRange.py
+#
+# Class representing a weighted range of hands a player may hold.
+#
+#
+######################################################################
+
+import bisect
+import fractions
+
+from PokerException import PokerException
+from Hand import Hand
+from Cards import cardsMask
+from Utils import get_rng
+
+######################################################################
+#
+# Exceptions
+#
+
+class EmptyRangeException(PokerException):
+    """No combination of hands from ranges can be dealt."""
+    pass
+
+######################################################################
+#
+# HandRange class
+#
+
+class HandRange(object):
+    """A set of hands, each with a weight, a player may hold.
+
+    Unlike HandGenerator, which picks a group of hands and then looks
+    for a hand in that group still in the deck, a Simulator deals hands
+    from HandRanges jointly: a combination of one hand from each range
+    is dealt with probability proportional to the product of their
+    weights, among the combinations which don't share a card with each
+    other or with known cards. So card removal between ranges is
+    accounted for exactly, and Simulator.enumerate_games() can compute
+    exact range-vs-range equities."""
+
+    # Type of hand generated
+    handClass = Hand
+
+    def __init__(self, hands=None, weight=1):
+        """hands should be an array of Cards or Hands to add with the
+        given weight."""
+        # List of (mask, cards, weight) for each hand
+        self.combos = []
+        # Mask -> index into self.combos
+        self._index = {}
+        self.name = None
+        if hands:
+            self.addHands(hands, weight)
+
+    @classmethod
+    def fromHandGenerator(cls, generator):
+        """Create a HandRange dealing hands with the same probabilities as
+        the given HandGenerator does (ignoring card removal).
+
+        Each hand in a group gets an equal share of the group's
+        percentage. Weights are scaled to be integers so results of
+        Simulator.enumerate_games() stay exact."""
+        scale = 1
+        for percentage, hands in generator.hands:
+            if len(hands):
+                scale = scale * len(hands) / fractions.gcd(scale, len(hands))
+        handRange = cls()
+        for percentage, hands in generator.hands:
+            if len(hands):
+                handRange.addHands(hands, percentage * scale / len(hands))
+        handRange.setName(generator.name)
+        return handRange
+
+    def addHands(self, hands, weight=1):
+        """Add each of an array of Cards or Hands with the given weight."""
+        for hand in hands:
+            self.addHand(hand, weight)
+
+    def addHand(self, hand, weight=1):
+        """Add hand with the given weight.
+
+        If hand is already in the range, weight is added to its weight."""
+        if weight < 0:
+            raise ValueError("Weight (%s) is negative." % weight)
+        mask = cardsMask(hand)
+        if self._index.has_key(mask):
+            index = self._index[mask]
+            mask, cards, oldWeight = self.combos[index]
+            self.combos[index] = (mask, cards, oldWeight + weight)
+        else:
+            self._index[mask] = len(self.combos)
+            self.combos.append((mask, self.handClass(cards = hand), weight))
+
+    def getTotalWeight(self):
+        """Return sum of the weights of all hands in range."""
+        return sum(weight for mask, cards, weight in self.combos)
+
+    def getCombos(self, excludeMask=0):
+        """Return list of (mask, hand, weight) for each hand in range with
+        non-zero weight and no cards in excludeMask."""
+        return [(mask, hand, weight)
+                for mask, hand, weight in self.combos
+                if weight and not (mask & excludeMask)]
+
+    def setName(self, name):
+        self.name = name
+
+    def __len__(self):
+        return len(self.combos)
+
+    def __str__(self):
+        if self.name:
+            return self.name
+        else:
+            return "%s" % self.__class__
+
+######################################################################
+#
+# Dealing from a number of ranges
+#
+
+class RangeDealer(object):
+    """Deal a hand from each of a number of HandRanges jointly.
+
+    Simulator uses this to deal its predefined HandRanges."""
+
+    # Number of times dealHands() retries before giving up
+    MAX_ATTEMPTS = 10000
+
+    def __init__(self, ranges, excludeMask=0):
+        """ranges is a list of HandRanges. Hands with cards in excludeMask
+        (e.g. from known hands and the board) are never dealt."""
+        self.combos = [handRange.getCombos(excludeMask)
+                       for handRange in ranges]
+        for handRange, combos in zip(ranges, self.combos):
+            if not combos:
+                raise EmptyRangeException("No hands left in range %s" %
+                                          handRange)
+        # Running totals of weights for picking a hand by weight
+        self._cumulative = []
+        for combos in self.combos:
+            total = 0
+            cumulative = []
+            for mask, hand, weight in combos:
+                total += weight
+                cumulative.append(total)
+            self._cumulative.append(cumulative)
+
+    def dealHands(self, rng=None):
+        """Return a list of (mask, hand) with a hand from each range.
+
+        Each range's hand is picked by weight and the whole deal is
+        redone if any of them share a card, which deals every valid
+        combination with probability proportional to the product of
+        its weights."""
+        rng = get_rng(rng)
+        for attempt in xrange(self.MAX_ATTEMPTS):
+            usedMask = 0
+            hands = []
+            for combos, cumulative in zip(self.combos, self._cumulative):
+                index = bisect.bisect_right(cumulative,
+                                            rng.random() * cumulative[-1])
+                mask, hand, weight = combos[min(index, len(combos) - 1)]
+                if mask & usedMask:
+                    break
+                usedMask |= mask
+                hands.append((mask, hand))
+            else:
+                return hands
+        raise EmptyRangeException(
+            "Couldn't deal non-conflicting hands from ranges")
+
+    def combinations(self):
+        """Generate (weight, hands) for every combination of a hand from
+        each range which don't share a card.
+
+        weight is the product of the hands' weights and hands a tuple of
+        hands. Conflicting hands are pruned as soon as they are found."""
+        return _combinations(self.combos, 0)
+
+def _combinations(combos, usedMask):
+    """Generate (weight, hands) for combinations of hands in combos not
+    sharing a card with each other or usedMask."""
+    if len(combos) == 0:
+        yield 1, ()
+        return
+    for mask, hand, weight in combos[0]:
+        if mask & usedMask:
+            continue
+        for restWeight, rest in _combinations(combos[1:], usedMask | mask):
+            yield weight * restWeight, (hand,) + rest
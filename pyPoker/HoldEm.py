@@ -6,11 +6,13 @@ from PokerException import PokerException
 import PokerGame
 from PokerRank import PokerRank
 from Ranker import RankerBase
+from StartingHandTable import StartingHandTable
 from Utils import assertInstance
 
 # Import following using full names to avoid internal conflicts
 # with classes having same names
 import pyPoker.HandGenerator
+import pyPoker.HandRange
 import pyPoker.Hands
 
 
@@ -113,6 +115,9 @@ class Hands(pyPoker.Hands.Hands):
 class HandGenerator(pyPoker.HandGenerator.HandGenerator):
     handClass = Hand
 
+class HandRange(pyPoker.HandRange.HandRange):
+    handClass = Hand
+
 class Simulator(PokerGame.Simulator):
     """HoldEm Simulator"""
 
@@ -122,7 +127,8 @@ class Simulator(PokerGame.Simulator):
     def __init__(self,
                  number_of_hands=9,
                  predefined_hands=None,
-                 predefined_board=None):
+                 predefined_board=None,
+                 rng=None):
         """Initialize simulation.
 
         number_of_hands is number of hands total to simulate.
@@ -133,14 +139,21 @@ class Simulator(PokerGame.Simulator):
 
         predefined_board should be a predefined set of community cards.
         Setting this for a HandClass that doesn't support a board will
-        raise an error."""
+        raise an error.
+
+        rng is the random number generator to use (see
+        PokerGame.Simulator)."""
         PokerGame.Simulator.__init__(self,
                                      number_of_hands=number_of_hands,
                                      predefined_hands=predefined_hands,
-                                     predefined_board=predefined_board)
+                                     predefined_board=predefined_board,
+                                     rng=rng)
                                      
 class StartingHandRanker(RankerBase):
     """Rank starting HoldEm hands"""
+
+    # StartingHandTable used by equity methods, loaded when first needed
+    table = None
     
     @classmethod
     def rankHand(cls, hand):
@@ -152,6 +165,29 @@ class StartingHandRanker(RankerBase):
         else:
             return PokerRank.highCard(hand[1].rank, hand[:1])
 
+    @classmethod
+    def loadTable(cls, filename=None):
+        """Load StartingHandTable from filename, or its default file."""
+        cls.table = StartingHandTable.load(filename)
+        return cls.table
+
+    @classmethod
+    def getTable(cls):
+        """Return StartingHandTable, loading the default one if needed."""
+        if cls.table is None:
+            cls.loadTable()
+        return cls.table
+
+    @classmethod
+    def equity(cls, hand, players=2):
+        """Return preflop equity of hand against players-1 random hands."""
+        return cls.getTable().getEquity(hand, players)
+
+    @classmethod
+    def headsUpEquity(cls, hand, otherHand):
+        """Return preflop equity of hand against otherHand."""
+        return cls.getTable().getHeadsUpEquity(hand, otherHand)
+
 ######################################################################
 
 class InvalidHandTypeException(PokerException):
@@ -0,0 +1,179 @@
+"""Independent Chip Model (ICM) tournament equity.
+
+The ICM (see Harrington on Hold'em vol 3) assumes each player finishes
+first with probability proportional to their stack, and given the
+players finishing above them, finishes in each following place the same
+way among the players left. A player's equity is then the payouts
+weighted by their chance of finishing in each place.
+
+placeProbabilities() computes these chances exactly, memoizing the
+chance of each set of players taking the top places as a bitmask,
+and only for as many places as asked for, so it is practical for any
+number of players as long as few places are paid.
+simulatePlaceProbabilities() estimates them by sampling finishing
+orders, for large fields with deep payouts. equities() picks between
+the two. batchEquities() evaluates many stack vectors at once with
+numpy, e.g. for comparing possible deals at a final table."""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from Utils import get_rng
+
+# equities() uses simulation instead of exact computation when this
+# would be exceeded by the number of sets of players placing in the money
+MAX_SUBPROBLEMS = 200000
+
+# Default number of finishing orders sampled by simulation
+DEFAULT_TRIALS = 100000
+
+def placeProbabilities(stacks, places=None):
+    """Return 2-D array giving chance of each player finishing in each of
+    the first places places (default all).
+
+    Players with no chips share the places below the others equally."""
+    numPlayers = len(stacks)
+    if (places is None) or (places > numPlayers):
+        places = numPlayers
+    probabilities = [[0.0] * places for player in range(numPlayers)]
+    live = [player for player in range(numPlayers) if stacks[player] > 0]
+    busted = [player for player in range(numPlayers) if stacks[player] <= 0]
+    # Chance the players in each mask took the places so far, and the
+    # chips of the players left
+    level = { 0 : 1.0 }
+    chipsLeft = { 0 : float(sum(stacks[player] for player in live)) }
+    for place in range(min(places, len(live))):
+        nextLevel = {}
+        nextChipsLeft = {}
+        for mask, chance in level.iteritems():
+            chips = chipsLeft[mask]
+            for player in live:
+                bit = 1 << player
+                if mask & bit:
+                    continue
+                stack = stacks[player]
+                placeChance = chance * stack / chips
+                probabilities[player][place] += placeChance
+                key = mask | bit
+                if nextLevel.has_key(key):
+                    nextLevel[key] += placeChance
+                else:
+                    nextLevel[key] = placeChance
+                    nextChipsLeft[key] = chips - stack
+        level = nextLevel
+        chipsLeft = nextChipsLeft
+    for place in range(len(live), places):
+        for player in busted:
+            probabilities[player][place] = 1.0 / len(busted)
+    return probabilities
+
+def simulatePlaceProbabilities(stacks, places=None, trials=DEFAULT_TRIALS,
+                               rng=None):
+    """Like placeProbabilities(), but estimated from trials sampled
+    finishing orders.
+
+    Each player is given an exponentially distributed time with rate
+    equal to their stack, and players finish in order of time, which
+    gives the same distribution of finishing orders as the ICM. Uses
+    numpy, if available, to sample all trials at once.
+
+    rng is the random number generator to use (see Utils.get_rng())."""
+    numPlayers = len(stacks)
+    if (places is None) or (places > numPlayers):
+        places = numPlayers
+    rng = get_rng(rng)
+    live = [player for player in range(numPlayers) if stacks[player] > 0]
+    busted = [player for player in range(numPlayers) if stacks[player] <= 0]
+    livePlaces = min(places, len(live))
+    counts = [[0] * places for player in range(numPlayers)]
+    if numpy is not None:
+        state = numpy.random.RandomState(rng.getrandbits(32))
+        liveStacks = numpy.array([stacks[player] for player in live],
+                                 dtype=float)
+        times = state.standard_exponential((trials, len(live))) / liveStacks
+        orders = times.argsort(axis=1)[:, :livePlaces]
+        for place in range(livePlaces):
+            placeCounts = numpy.bincount(orders[:, place],
+                                         minlength=len(live))
+            for index, count in enumerate(placeCounts.tolist()):
+                counts[live[index]][place] = count
+    else:
+        for trial in xrange(trials):
+            order = sorted(live,
+                           key=lambda player: rng.expovariate(stacks[player]))
+            for place in range(livePlaces):
+                counts[order[place]][place] += 1
+    probabilities = [[float(count) / trials for count in row]
+                     for row in counts]
+    for place in range(len(live), places):
+        for player in busted:
+            probabilities[player][place] = 1.0 / len(busted)
+    return probabilities
+
+def equities(stacks, payouts, trials=DEFAULT_TRIALS, rng=None):
+    """Return array with each player's expected payout.
+
+    payouts gives the payout for each place, from first. Computed
+    exactly unless that would take more than MAX_SUBPROBLEMS sets of
+    players, in which case trials finishing orders are simulated."""
+    places = min(len(payouts), len(stacks))
+    if numSubproblems(len(stacks), places) > MAX_SUBPROBLEMS:
+        probabilities = simulatePlaceProbabilities(stacks, places,
+                                                   trials, rng)
+    else:
+        probabilities = placeProbabilities(stacks, places)
+    return [sum(chance * payout for chance, payout in zip(row, payouts))
+            for row in probabilities]
+
+def numSubproblems(numPlayers, places):
+    """Return number of sets of players placeProbabilities() considers
+    for the given number of players and places."""
+    total = 0
+    sets = 1
+    for size in range(min(places, numPlayers)):
+        total += sets
+        sets = sets * (numPlayers - size) / (size + 1)
+    return total
+
+def batchEquities(stackVectors, payouts):
+    """Return equities for each of a number of stack vectors.
+
+    stackVectors is an (N, players) array-like of positive stacks and
+    an (N, players) numpy array of expected payouts is returned. The
+    exact computation of placeProbabilities() is done for all vectors at
+    once, with the chance of each set of players taking the top places
+    held as an array over the vectors. Requires numpy."""
+    if numpy is None:
+        raise ImportError("batchEquities() requires the numpy module")
+    stacks = numpy.asarray(stackVectors, dtype=float)
+    if stacks.ndim != 2:
+        raise ValueError("Expected two dimensional array of stacks")
+    if (stacks <= 0).any():
+        raise ValueError("Stacks must be positive")
+    numVectors, numPlayers = stacks.shape
+    places = min(len(payouts), numPlayers)
+    results = numpy.zeros((numVectors, numPlayers))
+    level = { 0 : numpy.ones(numVectors) }
+    chipsLeft = { 0 : stacks.sum(axis=1) }
+    for place in range(places):
+        nextLevel = {}
+        nextChipsLeft = {}
+        for mask, chance in level.iteritems():
+            share = chance / chipsLeft[mask]
+            for player in range(numPlayers):
+                bit = 1 << player
+                if mask & bit:
+                    continue
+                placeChance = share * stacks[:, player]
+                results[:, player] += placeChance * payouts[place]
+                key = mask | bit
+                if nextLevel.has_key(key):
+                    nextLevel[key] += placeChance
+                else:
+                    nextLevel[key] = placeChance
+                    nextChipsLeft[key] = chipsLeft[mask] - stacks[:, player]
+        level = nextLevel
+        chipsLeft = nextChipsLeft
+    return results
@@ -0,0 +1,219 @@
+"""Class for ranking poker hands using precomputed lookup tables"""
+
+import sys
+
+from Cards import Card, Cards, Rank, Suit
+from PokerException import PokerInternalException
+from Ranker import Ranker
+
+class LookupRanker(Ranker):
+    """Given a Hand, return its PokerRank for its best high hand.
+
+    Drop-in replacement for Ranker that returns identical PokerRank values.
+    Instead of building bitfields for every hand, a hand is reduced to
+    two integers which are then used to look up its rank:
+
+    A rank key, which is the sum of a 3-bit counter per rank and so
+    uniquely identifies the multiset of ranks in the hand. As long as
+    the hand doesn't contain a flush, the multiset of ranks determines
+    the rank of the hand.
+
+    A suit key, which is the sum of a 4-bit counter per suit, used to
+    detect the presence of a flush. With seven or fewer cards a hand
+    containing a flush can't contain quads or a full house, so the rank
+    of such a hand is determined by the ranks of the flush suit alone.
+
+    Tables are filled in lazily the first time a given key is seen by
+    ranking a representative hand with Ranker. buildTables() may be used
+    to fill them in ahead of time."""
+
+    # Value added to rank key for each rank (indexed by rank)
+    _rankKeys = list((1 << (3 * (rank - Rank.TWO))) if rank >= Rank.TWO else 0
+                     for rank in range(Rank.ACE + 1))
+
+    # Values added to rank key and suit key and bit set in flush bits
+    # for each card (indexed by card code, which is the same for a low
+    # ace as a high one). Filled in below the class definition.
+    _codeRankKeys = []
+    _codeSuitKeys = []
+    _codeRankBits = []
+
+    # Adding this to a suit key sets the high bit of any counter >= 5
+    _flushAdd = 0x3333
+    _flushMask = 0x8888
+
+    # Rank key -> PokerRank for hands without a flush
+    _rankTable = {}
+
+    # BitField of ranks in flush suit -> PokerRank
+    _flushTable = {}
+
+    @classmethod
+    def rankHand(cls, hand):
+        """Given a Hand return a PokerRank for its best hand.
+
+        Limited to Hands of five to seven cards."""
+        highRank = None
+        for cards in hand.hands():
+            try:
+                rank = cls._rankCards(cards)
+            except Exception as e:
+                msg = "Error ranking hand %s: %s" % (cards, e)
+                raise PokerInternalException, msg, sys.exc_info()[2]
+            if (highRank is None) or (rank > highRank):
+                highRank = rank
+        return highRank
+
+    @classmethod
+    def _rankCards(cls, cards):
+        """Given a set of 5 to 7 cards, return a PokerRank for its best hand."""
+        if len(cards) > 7:
+            raise ValueError("Hand has too many cards (%d > 7)" % len(cards))
+        if len(cards) < 5:
+            raise ValueError("Hand has too few cards (%d < 5)" % len(cards))
+        rankKeys = cls._codeRankKeys
+        suitKeys = cls._codeSuitKeys
+        rankKey = 0
+        suitKey = 0
+        for card in cards:
+            code = card.code
+            rankKey += rankKeys[code]
+            suitKey += suitKeys[code]
+        if (suitKey + cls._flushAdd) & cls._flushMask:
+            return cls._rankFlush(cards, suitKey)
+        try:
+            return cls._rankTable[rankKey]
+        except KeyError:
+            return cls._fillRankTable(rankKey, len(cards))
+
+    @classmethod
+    def _analyzeBoard(cls, board, hands):
+        """Return rank key, suit key and rank bits by suit of board.
+
+        Only supported when any hole cards may be used and hands have
+        five to seven cards including the board."""
+        for hand in hands:
+            if hand.requiredHoleCards or not (5 <= len(hand) + len(board) <= 7):
+                return None
+        rankKey = 0
+        suitKey = 0
+        suitBits = [0] * (Suit.SPADES + 1)
+        for card in board:
+            rankKey += cls._codeRankKeys[card.code]
+            suitKey += cls._codeSuitKeys[card.code]
+            suitBits[card.suit] |= cls._codeRankBits[card.code]
+        return rankKey, suitKey, suitBits, len(board)
+
+    @classmethod
+    def _rankHoleCards(cls, holeCards, analysis):
+        """Return rank of holeCards with board analysis from _analyzeBoard()."""
+        rankKey, suitKey, suitBits, numCards = analysis
+        rankKeys = cls._codeRankKeys
+        suitKeys = cls._codeSuitKeys
+        for card in holeCards:
+            code = card.code
+            rankKey += rankKeys[code]
+            suitKey += suitKeys[code]
+        if (suitKey + cls._flushAdd) & cls._flushMask:
+            for suit in Suit.suits:
+                if (suitKey >> (4 * (suit - Suit.CLUBS))) & 0xf >= 5:
+                    break
+            flushBits = suitBits[suit]
+            rankBits = cls._codeRankBits
+            for card in holeCards:
+                if card.suit == suit:
+                    flushBits |= rankBits[card.code]
+            try:
+                return cls._flushTable[flushBits]
+            except KeyError:
+                return cls._fillFlushTable(flushBits)
+        try:
+            return cls._rankTable[rankKey]
+        except KeyError:
+            return cls._fillRankTable(rankKey, numCards + len(holeCards))
+
+    @classmethod
+    def _rankFlush(cls, cards, suitKey):
+        """Return PokerRank for cards known to contain a flush."""
+        for suit in Suit.suits:
+            if (suitKey >> (4 * (suit - Suit.CLUBS))) & 0xf >= 5:
+                break
+        flushBits = 0
+        rankBits = cls._codeRankBits
+        for card in cards:
+            if card.suit == suit:
+                flushBits |= rankBits[card.code]
+        try:
+            return cls._flushTable[flushBits]
+        except KeyError:
+            return cls._fillFlushTable(flushBits)
+
+    @classmethod
+    def _fillRankTable(cls, rankKey, numCards):
+        """Rank a hand with the ranks given by rankKey and add it to table."""
+        # Deal suits round robin so no suit gets more than two cards and
+        # cards of the same rank always get different suits.
+        cards = Cards()
+        for rank in Rank.ranks:
+            count = (rankKey >> (3 * (rank - Rank.TWO))) & 0x7
+            for index in range(count):
+                suit = Suit.suits[len(cards) % len(Suit.suits)]
+                cards.append(Card((rank, suit)))
+        if len(cards) != numCards:
+            raise PokerInternalException("Bad rank key %x" % rankKey)
+        if numCards == 5:
+            rank = Ranker._rankFiveCardHand(cards)
+        else:
+            rank = Ranker._rankSixOrSevenCardHand(cards)
+        cls._rankTable[rankKey] = rank
+        return rank
+
+    @classmethod
+    def _fillFlushTable(cls, flushBits):
+        """Rank a flush with the ranks in flushBits and add it to table."""
+        cards = Cards([Card((rank, Suit.SPADES)) for rank in Rank.ranks
+                       if flushBits & (1 << rank)])
+        rank = Ranker._rankSixOrSevenCardHand(cards)
+        cls._flushTable[flushBits] = rank
+        return rank
+
+    @classmethod
+    def buildTables(cls, minCards=5, maxCards=7):
+        """Fill in lookup tables for all hands of minCards to maxCards.
+
+        Useful before timing critical code or forking worker processes."""
+        def rankKeys(ranks, numCards):
+            # Generate all rank keys of numCards using given ranks
+            if numCards == 0:
+                yield 0
+                return
+            if len(ranks) == 0:
+                return
+            rank = ranks[0]
+            for count in range(min(4, numCards), -1, -1):
+                for key in rankKeys(ranks[1:], numCards - count):
+                    yield key + count * cls._rankKeys[rank]
+
+        def flushBits(ranks, numCards):
+            # Generate all bitfields of numCards bits using given ranks
+            if numCards == 0:
+                yield 0
+                return
+            for index in range(len(ranks) - numCards + 1):
+                for bits in flushBits(ranks[index + 1:], numCards - 1):
+                    yield bits | (1 << ranks[index])
+
+        for numCards in range(minCards, maxCards + 1):
+            for key in rankKeys(Rank.ranks, numCards):
+                if not cls._rankTable.has_key(key):
+                    cls._fillRankTable(key, numCards)
+            for bits in flushBits(Rank.ranks, numCards):
+                if not cls._flushTable.has_key(bits):
+                    cls._fillFlushTable(bits)
+
+for _code in range(Card.numCodes):
+    _card = Card.fromCode(_code)
+    LookupRanker._codeRankKeys.append(LookupRanker._rankKeys[_card.rank])
+    LookupRanker._codeSuitKeys.append(1 << (4 * (_card.suit - Suit.CLUBS)))
+    LookupRanker._codeRankBits.append(1 << _card.rank)
+del _code, _card
@@ -1,5 +1,7 @@
 """Class for ranking poker hands"""
 
+import itertools
+
 from Cards import Rank
 from PokerException import PokerInternalException
 from PokerRank import PokerRank
@@ -10,6 +12,10 @@ class LowRanker(RankerBase):
 
     Ignores straights and flushes (i.e. wheel is best low hand)."""
 
+    # Rank -> rank with aces low
+    _lowRanks = [Rank.ACE_LOW if rank == Rank.ACE else rank
+                 for rank in range(Rank.ACE + 1)]
+
     @classmethod
     def rankHand(cls, hand):
         """Given a Hand return a PokerRank for its best hand.
@@ -20,6 +26,8 @@ class LowRanker(RankerBase):
         # find the highest rank
         lowRank = None
         for cards in hand.hands():
+            # Board aces must be low as well
+            cards.makeAcesLow()
             rank = cls._rankHand(cards)
             if (lowRank is None) or (rank < lowRank):
                 lowRank = rank
@@ -33,8 +41,7 @@ class LowRanker(RankerBase):
         one) and the rank of those hands."""
         best_hands = []
         best_rank = None
-        for index, hand in enumerate(hands):
-            rank = cls.rankHand(hand)
+        for index, rank in enumerate(cls.rankHands(hands)):
             if rank is None:
                 continue
             if (best_rank is None) or (rank < best_rank):
@@ -53,7 +60,35 @@ class LowRanker(RankerBase):
             raise ValueError("Hand has too many cards (%d > 7)" % len(hand))
         if len(hand) < 5:
             raise ValueError("Hand has too few cards (%d < 5)" % len(hand))
-        rankCounts = hand.countRanks()
+        return cls._rankRankCounts(hand.countRanks(), hand)
+
+    @classmethod
+    def _analyzeBoard(cls, board, hands):
+        """Return count of each rank, with aces low, on board shared by hands.
+
+        Only supported when any hole cards may be used and hands have
+        five to seven cards including the board."""
+        for hand in hands:
+            if hand.requiredHoleCards or not (5 <= len(hand) + len(board) <= 7):
+                return None
+        rankCounts = [0] * (Rank.ACE + 1)
+        for card in board:
+            rankCounts[cls._lowRanks[card.rank]] += 1
+        return rankCounts
+
+    @classmethod
+    def _rankHoleCards(cls, holeCards, analysis):
+        """Return rank of holeCards with board rank counts from _analyzeBoard()."""
+        rankCounts = list(analysis)
+        for card in holeCards:
+            rankCounts[cls._lowRanks[card.rank]] += 1
+        return cls._rankRankCounts(rankCounts, holeCards)
+
+    @classmethod
+    def _rankRankCounts(cls, rankCounts, hand):
+        """Return PokerRank for best low hand given count of each rank.
+
+        hand is only used in error messages."""
         # Count ranks which we have at least one of
         atLeastOne = filter(lambda rank: rankCounts[rank] > 0, Rank.rankRange)
         # If we don't have at least two different ranks, we have five-of-a-kind
@@ -113,8 +148,26 @@ class LowRanker(RankerBase):
 class EightLowRanker(LowRanker):
     """Given a hand return its PokerRank if it qualifies for a 8-low or better.
 
-    Ignore straights and flushes (i.e. wheel is best low hand)."""
-    
+    Ignore straights and flushes (i.e. wheel is best low hand).
+
+    A qualifying low is made of five distinct ranks eight or lower, and
+    the best one is always the lowest five of them, so the best low
+    from any set of cards is determined by the mask of distinct ranks
+    eight or lower it contains (see lowRankMask()), which is used to
+    look up the rank in a 256-entry table. For hands which must use a
+    given number of hole cards (e.g. Omaha) each allowed choice of hole
+    ranks is completed with the lowest remaining board ranks."""
+
+    # Rank -> bit for the rank in a low rank mask, 0 if above eight
+    _lowRankBits = [0] * (Rank.ACE + 1)
+
+    # Low rank mask -> PokerRank of best low, or None if it doesn't
+    # qualify. Filled in below the class definition.
+    _lowTable = []
+
+    # Low rank mask -> tuple of its individual bits from low to high
+    _lowBitsTable = []
+
     @classmethod
     def rankHand(cls, hand):
         """Given a Hand returna a PokerRank for its best 8-low hand.
@@ -122,14 +175,56 @@ class EightLowRanker(LowRanker):
         Returns None if hand does not qualify for 8-low or better.
 
         Limted to Hands of five to seven cards."""
-        hand.makeAcesLow()
-        # Iterate through all the possible sets of cards in hand and
-        # find the highest rank
+        boardMask = cls.lowRankMask(hand.board) if hand.board else 0
+        return cls._rankHoleCards(hand, boardMask)
+
+    @classmethod
+    def lowRankMask(cls, cards):
+        """Return mask of distinct ranks eight or lower (aces low) in cards.
+
+        Bit 0 is set for an ace, bit 1 for a deuce and so on."""
+        lowRankBits = cls._lowRankBits
+        mask = 0
+        for card in cards:
+            mask |= lowRankBits[card.rank]
+        return mask
+
+    @classmethod
+    def _analyzeBoard(cls, board, hands):
+        """Return low rank mask of board shared by hands."""
+        return cls.lowRankMask(board)
+
+    @classmethod
+    def _rankHoleCards(cls, holeCards, analysis):
+        """Return 8-low rank of holeCards with board low rank mask analysis."""
+        holeMask = cls.lowRankMask(holeCards)
+        required = getattr(holeCards, "requiredHoleCards", 0)
+        if not required:
+            return cls._lowTable[holeMask | analysis]
+        lowBitsTable = cls._lowBitsTable
         lowRank = None
-        for cards in hand.combinations_of_eight_or_lower(5):
-            rank = cls._rankHand(cards)
+        for bits in itertools.combinations(lowBitsTable[holeMask], required):
+            mask = sum(bits)
+            boardBits = lowBitsTable[analysis & ~mask][:5 - required]
+            if len(boardBits) < 5 - required:
+                continue
+            rank = cls._lowTable[mask | sum(boardBits)]
             if (lowRank is None) or (rank < lowRank):
                 lowRank = rank
         return lowRank
 
-        
+for _rank in range(Rank.ACE_LOW, Rank.EIGHT + 1):
+    EightLowRanker._lowRankBits[_rank] = 1 << (_rank - Rank.ACE_LOW)
+EightLowRanker._lowRankBits[Rank.ACE] = 1
+for _mask in range(1 << 8):
+    _ranks = [_rank for _rank in range(Rank.ACE_LOW, Rank.EIGHT + 1)
+              if _mask & EightLowRanker._lowRankBits[_rank]]
+    EightLowRanker._lowBitsTable.append(
+        tuple(EightLowRanker._lowRankBits[_rank] for _rank in _ranks))
+    if len(_ranks) < 5:
+        EightLowRanker._lowTable.append(None)
+    else:
+        EightLowRanker._lowTable.append(
+            PokerRank.fromRanks(PokerRank.HIGH_CARD, _ranks[4], 0,
+                                _ranks[3::-1]))
+del _rank, _mask, _ranks
@@ -2,8 +2,9 @@
 
 import itertools
 
-from Cards import Rank, Suit
+from Cards import Cards, NotEnoughCardsException, Rank, Suit
 from Hand import CommunityCardHand, FiveCardBoard
+from LookupRanker import LookupRanker
 from LowRanker import EightLowRanker
 import PokerGame
 from Utils import assertInstance
@@ -11,6 +12,7 @@ from Utils import assertInstance
 class Hand(CommunityCardHand):
     maxCards = 4
     boardClass = FiveCardBoard
+    requiredHoleCards = 2
 
     def __init__(self, cards = None, board = None):
 	"""Create a Omaha hand.
@@ -169,16 +171,99 @@ Tenner and Krieger?"""
 	    return True
 	return False
 
+class Ranker(LookupRanker):
+    """Given an Omaha Hand, return its PokerRank for its best high hand.
+
+    Drop-in replacement for Ranker and LookupRanker that returns identical
+    ranks without building a Cards instance for each of the 60 ways to
+    combine two hole cards with three board cards. Instead the board is
+    reduced once to the LookupRanker rank key of each set of three board
+    cards, plus the rank bits of those that are suited, and each pair of
+    hole cards is combined with those using integer additions and table
+    lookups.
+
+    rankHands() and bestHand() reduce a board shared by all the hands
+    only once. Hands with less than three board cards are ranked by
+    LookupRanker."""
+
+    @classmethod
+    def rankHand(cls, hand):
+        """Given an Omaha Hand return a PokerRank for its best hand."""
+        board = hand.board
+        if (board is None) or (len(board) < 3):
+            return LookupRanker.rankHand(hand)
+        return cls._rankHoleCards(hand, cls._boardKeys(board))
+
+    @classmethod
+    def _analyzeBoard(cls, board, hands):
+        """Return board reduced by _boardKeys(), if it has three or more cards."""
+        if len(board) < 3:
+            return None
+        return cls._boardKeys(board)
+
+    @classmethod
+    def _boardKeys(cls, board):
+        """Reduce board to the information needed to rank hands against it.
+
+        Returns a list of distinct rank keys of every three board cards
+        and a dictionary mapping suit to list of rank bits of those three
+        cards which are all of that suit."""
+        rankKeys = cls._codeRankKeys
+        rankKeySet = set()
+        flushBits = {}
+        for cards in itertools.combinations(board, 3):
+            rankKeySet.add(rankKeys[cards[0].code] +
+                           rankKeys[cards[1].code] +
+                           rankKeys[cards[2].code])
+            suit = cards[0].suit
+            if cards[1].suit == suit and cards[2].suit == suit:
+                flushBits.setdefault(suit, []).append((1 << cards[0].rank) |
+                                                      (1 << cards[1].rank) |
+                                                      (1 << cards[2].rank))
+        return list(rankKeySet), flushBits
+
+    @classmethod
+    def _rankHoleCards(cls, holeCards, boardKeys):
+        """Return best PokerRank of holeCards with board given by boardKeys."""
+        boardRankKeys, boardFlushBits = boardKeys
+        rankKeys = cls._codeRankKeys
+        rankTable = cls._rankTable
+        flushTable = cls._flushTable
+        bestRank = None
+        for card1, card2 in itertools.combinations(holeCards, 2):
+            holeKey = rankKeys[card1.code] + rankKeys[card2.code]
+            for boardKey in boardRankKeys:
+                key = holeKey + boardKey
+                rank = rankTable.get(key)
+                if rank is None:
+                    rank = cls._fillRankTable(key, 5)
+                if (bestRank is None) or (rank > bestRank):
+                    bestRank = rank
+            # A flush always beats the same five cards not counted as
+            # a flush, so it is enough to take the higher of the two.
+            if (card1.suit == card2.suit) and (card1.suit in boardFlushBits):
+                holeBits = (1 << card1.rank) | (1 << card2.rank)
+                for bits in boardFlushBits[card1.suit]:
+                    bits |= holeBits
+                    rank = flushTable.get(bits)
+                    if rank is None:
+                        rank = cls._fillFlushTable(bits)
+                    if (bestRank is None) or (rank > bestRank):
+                        bestRank = rank
+        return bestRank
+
 class Simulator(PokerGame.Simulator):
     """Omaha Simulator"""
 
     HandClass=Hand
+    HighRankerClass=Ranker
     GAME_NAME="Omaha"
 
     def __init__(self,
                  number_of_hands=9,
                  predefined_hands=None,
-                 predefined_board=None):
+                 predefined_board=None,
+                 rng=None):
         """Initialize simulation.
 
         number_of_hands is number of hands total to simulate.
@@ -189,22 +274,29 @@ class Simulator(PokerGame.Simulator):
 
         predefined_board should be a predefined set of community cards.
         Setting this for a HandClass that doesn't support a board will
-        raise an error."""
+        raise an error.
+
+        rng is the random number generator to use (see
+        PokerGame.Simulator)."""
         PokerGame.Simulator.__init__(self,
                                      number_of_hands=number_of_hands,
                                      predefined_hands=predefined_hands,
-                                     predefined_board=predefined_board)
+                                     predefined_board=predefined_board,
+                                     rng=rng)
 
 class HiLoSimulator(PokerGame.Simulator):
     """Omaha HiLo (8-or-better) Simulator"""
 
+    HandClass=Hand
+    HighRankerClass=Ranker
     LowRankerClass=EightLowRanker
     GAME_NAME="Omaha Hi/Lo 8-or-better"
 
     def __init__(self,
                  number_of_hands=9,
                  predefined_hands=None,
-                 predefined_board=None):
+                 predefined_board=None,
+                 rng=None):
         """Initialize simulation.
 
         number_of_hands is number of hands total to simulate.
@@ -215,10 +307,14 @@ class HiLoSimulator(PokerGame.Simulator):
 
         predefined_board should be a predefined set of community cards.
         Setting this for a HandClass that doesn't support a board will
-        raise an error."""
+        raise an error.
+
+        rng is the random number generator to use (see
+        PokerGame.Simulator)."""
         PokerGame.Simulator.__init__(self,
                                      number_of_hands=number_of_hands,
                                      predefined_hands=predefined_hands,
-                                     predefined_board=predefined_board)
+                                     predefined_board=predefined_board,
+                                     rng=rng)
 
 
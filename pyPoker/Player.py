@@ -1,12 +1,11 @@
 """Module for classes representing a PokerGame player and table of players"""
 
-import random
 import sys
 
 from Action import Action, InvalidActionException
 from Hand import Hand
 from PokerException import PokerException
-from Utils import assertInstance, UserSelection
+from Utils import assertInstance, get_rng, UserSelection
 
 ######################################################################
 #
@@ -58,6 +57,9 @@ class Player(object):
         self.HandClass = HandClass
         # Amount bet in current hand not yet swept into pot
         self.bet = 0
+        # Table we are seated at, which tracks our status
+        self._table = None
+        self._status = None
         if self.stack > 0:
             self.status = self.STATUS_ACTIVE
         else:
@@ -94,25 +96,36 @@ class Player(object):
         """Change player's status to sitting out."""
         self.status = self.STATUS_SITTING_OUT
 
+    @property
+    def status(self):
+        """Player's status, one of the STATUS_* values."""
+        return self._status
+
+    @status.setter
+    def status(self, status):
+        if self._table is not None:
+            self._table._status_changed(self, self._status, status)
+        self._status = status
+
     def get_status(self):
         """Return status as string"""
-        return self.STATUS_STRINGS[self.status]
+        return self.STATUS_STRINGS[self._status]
 
     def is_sitting_out(self):
         """Is the player sitting out?"""
-        return (self.status == self.STATUS_SITTING_OUT)
+        return (self._status == self.STATUS_SITTING_OUT)
 
     def is_active(self):
         """Is the player still actively betting?"""
-        return (self.status == self.STATUS_ACTIVE)
+        return (self._status == self.STATUS_ACTIVE)
 
     def is_all_in(self):
         """Is the player all-in?"""
-        return (self.status == self.STATUS_ALL_IN)
+        return (self._status == self.STATUS_ALL_IN)
 
     def is_folded(self):
         """Is the player folded?"""
-        return (self.status == self.STATUS_FOLDED)
+        return (self._status == self.STATUS_FOLDED)
 
     def get_action(self, request, game, hand_state):
         """Get a players betting action.
@@ -145,7 +158,7 @@ class Player(object):
     def get_opening_bet_action(self, request, game, hand_state):
         """Get Action in response to opening bet request"""
         # No bet required, check 75%, bet 25%
-        random_number = random.random()
+        random_number = self._get_rng(game).random()
         if random_number < .75:
             action = Action.new_check()
         else:
@@ -156,7 +169,7 @@ class Player(object):
     def get_call_action(self, request, game, hand_state):
         """Get Action in response to call request"""
         # Bet in front of us, fold 50%, call 35%, raise 15% (if allowed)
-        random_number = random.random()
+        random_number = self._get_rng(game).random()
         if (random_number < .15) and \
                 (request.raise_amount is not None) and \
                 (self.stack > request.amount):
@@ -172,7 +185,7 @@ class Player(object):
     def get_option_action(self, request, game, hand_state):
         """Get Action in request to option request"""
         # Calls in front of us, raise 25%, check 75%
-        random_number = random.random()
+        random_number = self._get_rng(game).random()
         if (random_number < .25) and \
                 (self.stack > 0):
             action = Action.new_raise(min(request.raise_amount, self.stack),
@@ -181,6 +194,12 @@ class Player(object):
             action = Action.new_check()
         return action
 
+    def _get_rng(self, game):
+        """Return random number generator to use for decisions in game."""
+        if game is None:
+            return get_rng(None)
+        return get_rng(game.rng)
+
     def message(self, string):
         """Handle a message to the player.
 
@@ -315,17 +334,37 @@ class HumanPlayer(Player):
 ######################################################################
 
 class Table(object):
-    """Collection of players at a table"""
+    """Collection of players at a table
+
+    The table keeps the seats of players with each status up to date
+    as players change status, and the next occupied seat clockwise
+    from each seat as players are seated, so finding the active
+    players or the next player to act doesn't scan every seat."""
 
-    def __init__(self, number_of_seats=9, players=None):
+    def __init__(self, number_of_seats=9, players=None, rng=None):
         """Create a table with given number of seats.
 
-        Seat array of players if given."""
+        Seat array of players if given.
+
+        rng is the random number generator used for seating players and
+        picking the dealer. If None, the random module is used."""
         assertInstance(number_of_seats, int)
         self.number_of_seats = number_of_seats
+        self.rng = rng
         # One extra seat for seat 0 which we don't use to keep
         # indexing simple.
         self.players = [ None ] * (number_of_seats + 1)
+        # Seat of each seated player
+        self._seats = {}
+        # Next occupied seat clockwise from each occupied seat
+        self._next_seat = {}
+        # Seats of players with each status
+        self._status_seats = dict([(status, set())
+                                   for status in Player.STATUS_STRINGS])
+        # Seated players in seat order
+        self._seated_players = []
+        # Active and all-in players in seat order, None if out of date
+        self._active_players = None
         if players is not None:
             self.seat_players(players)
         self.dealer = None
@@ -334,18 +373,34 @@ class Table(object):
         """Seat the given player.
 
         If seat_number is given, seat player there, otherwise chose randomly."""
-        if player in self.players:
+        if player in self._seats:
             raise PlayerAlreadySeatedException(
                 "Player %s is already seated" % player)
         if seat_number is None:
             empty_seats = self.get_empty_seats()
             if len(empty_seats) == 0:
                 raise TableFullException()
-            seat_number = random.choice(empty_seats)
+            seat_number = get_rng(self.rng).choice(empty_seats)
         else:
             if self.players[seat_number] is not None:
                 raise SeatFullException()
         self.players[seat_number] = player
+        self._seats[player] = seat_number
+        self._status_seats[player.status].add(seat_number)
+        player._table = self
+        seats = sorted(self._seats.values())
+        self._next_seat = dict(zip(seats, seats[1:] + seats[:1]))
+        self._seated_players = [self.players[seat] for seat in seats]
+        self._active_players = None
+
+    def _status_changed(self, player, old_status, new_status):
+        """Handle a seated player changing status from old_status."""
+        seat = self._seats.get(player)
+        if (seat is None) or (old_status == new_status):
+            return
+        self._status_seats[old_status].discard(seat)
+        self._status_seats[new_status].add(seat)
+        self._active_players = None
 
     def seat_players(self, players, in_order=False):
         """Randomly seat the given players.
@@ -363,11 +418,14 @@ class Table(object):
 
     def get_seated_players(self):
         """Return an array of seated players"""
-        return filter(lambda p: p is not None, self.players)
+        return list(self._seated_players)
 
     def get_player_seat(self, player):
         """Given a player return their seat number"""
-        return self.players.index(player)
+        try:
+            return self._seats[player]
+        except KeyError:
+            raise ValueError("Player %s is not seated" % player)
 
     def get_player_by_seat(self, seat):
         """Given a seat number, return the player sitting there"""
@@ -375,15 +433,25 @@ class Table(object):
 
     def get_empty_seats(self):
         """Return an array of seat numbers which are empty"""
-        return filter(lambda n: self.players[n] is None,
-                      range(1, len(self.players)))
+        return [seat for seat in range(1, len(self.players))
+                if self.players[seat] is None]
 
     def get_active_players(self):
         """Return an array of players who are active in the hand.
 
         This means players are not sitting out or have folded."""
-        return filter(lambda p: p.is_active() or p.is_all_in(),
-                      self.get_seated_players())
+        if self._active_players is None:
+            seats = self._status_seats[Player.STATUS_ACTIVE] | \
+                self._status_seats[Player.STATUS_ALL_IN]
+            self._active_players = [self.players[seat]
+                                    for seat in sorted(seats)]
+        return list(self._active_players)
+
+    def get_players_with_status(self, status):
+        """Return an array of players with given status (e.g.
+        Player.STATUS_FOLDED) in seat order."""
+        return [self.players[seat]
+                for seat in sorted(self._status_seats[status])]
 
     def get_next_player(self, starting_player, filter=None):
         """Return the next player clockwise from given player.
@@ -394,21 +462,40 @@ class Table(object):
 
         May return given player if logic so dictates."""
         starting_seat = self.get_player_seat(starting_player)
-        seat = (starting_seat + 1) % len(self.players)
+        seat = starting_seat
         while True:
-            if (self.players[seat] is not None) and \
-                    ((filter is None) or filter(self.players[seat])):
-                break
+            seat = self._next_seat[seat]
+            player = self.players[seat]
+            if (filter is None) or filter(player):
+                return player
             if seat == starting_seat:
                 # We've go all the way around without a match
                 raise IndexError()
-            seat = (seat + 1) % len(self.players)
-        return self.players[seat]
 
-    def random_dealer(self):
-        """Make a random player the dealer."""
+    def get_next_active_player(self, starting_player):
+        """Return the next active player clockwise from given player.
+
+        Like get_next_player() with a filter of Player.is_active(), but
+        uses the table's record of active seats."""
+        starting_seat = self.get_player_seat(starting_player)
+        active_seats = self._status_seats[Player.STATUS_ACTIVE]
+        seat = starting_seat
+        while True:
+            seat = self._next_seat[seat]
+            if seat in active_seats:
+                return self.players[seat]
+            if seat == starting_seat:
+                # We've go all the way around without a match
+                raise IndexError()
+
+    def random_dealer(self, rng=None):
+        """Make a random player the dealer.
+
+        rng overrides the table's random number generator if given."""
+        if rng is None:
+            rng = self.rng
         # XXX Should we choose a player with a non-zero stack?
-        self.dealer = random.choice(self.get_seated_players())
+        self.dealer = get_rng(rng).choice(self.get_seated_players())
 
     def set_dealer(self, player):
         """Set the dealer to the given player."""
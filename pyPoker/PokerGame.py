@@ -1,19 +1,33 @@
 """Class for simulating poker games."""
 
 import copy
+import fractions
 import itertools
+import math
+import multiprocessing
 import random
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from Action import Action, ActionRequest
 from PokerException import PokerException
 from Hand import Hand, CommunityCardHand
 from Hands import Hands
-from Cards import Cards
+from Canonicalizer import Canonicalizer
+from Cards import Card, Cards, cardsMask
 from Deck import Deck
-from Utils import assertInstance
+from Player import Player
+from PokerRank import PokerRank
+from Utils import assertInstance, get_rng, random_stream, z_score
 from Ranker import Ranker
-from LowRanker import LowRanker
+from LookupRanker import LookupRanker
+from LowRanker import EightLowRanker, LowRanker
+from BatchRanker import BatchRanker
 from HandGenerator import HandGenerator
+from HandRange import HandRange, RangeDealer
 
 ######################################################################
 #
@@ -42,7 +56,7 @@ class Simulator(object):
     
     # Class to use for ranking high hands
     # Or None if high hand doesn't win
-    HighRankerClass=Ranker
+    HighRankerClass=LookupRanker
 
     # Class to use for rnaking low hands
     # Or None if low hand doesn't win
@@ -51,21 +65,38 @@ class Simulator(object):
     # String descrition of this game
     GAME_NAME="Poker"
 
+    # Number of games simulated per shard by simulate_games() when
+    # running in parallel or with a seed.
+    GAMES_PER_SHARD=1000
+
+    # Number of games between checks of whether simulate_games() has
+    # reached the requested precision. This is also the minimum number
+    # of games, so the variance estimate is meaningful.
+    PRECISION_CHECK_GAMES=1000
+
     def __init__(self,
                  number_of_hands=9,
                  predefined_hands=None,
-                 predefined_board=None):
+                 predefined_board=None,
+                 rng=None):
         """Initialize simulation.
 
         number_of_hands is number of hands total to simulate.
 
         predefined_hands should be a Hands instances and can containe
-        either Hand or HandGenerator instances. For a latter a new
-        hand will be generated for each simulation.
+        Hand, HandGenerator or HandRange instances. For the latter two
+        a new hand will be generated for each simulation. Hands from
+        HandRanges are dealt jointly, accounting for the cards they
+        share (see HandRange).
 
         predefined_board should be a predefined set of community cards.
         Setting this for a HandClass that doesn't support a board will
         raise an error.
+
+        rng is the random number generator (e.g. a random.Random
+        instance) used for shuffling and generating hands. If None, the
+        random module is used. See also the seed argument to
+        simulate_games().
         """
         # Todo: add argument sanity checking
         if number_of_hands > self.getMaxHands():
@@ -92,7 +123,10 @@ class Simulator(object):
                 self.board = predefined_board
         elif predefined_board is not None:
             raise InvalidBoardException("Given HandClass does not support a Board")
+        self.rng = rng
         self.deck = Deck()
+        # RangeDealer for predefined HandRanges, created when first needed
+        self._range_dealer = None
         
     @classmethod
     def getMaxHands(cls):
@@ -110,7 +144,13 @@ class Simulator(object):
     def simulate_games(self,
                        number_of_games = 100,
                        callback=None, callbackArg=None,
-                       stats=None):
+                       stats=None,
+                       jobs=1,
+                       seed=None,
+                       precision=None,
+                       confidence=0.95,
+                       batch_size=None,
+                       output=None):
         """Simulate a bunch of games with starting hands. Returns
 	a array with number of wins for each hand.
 
@@ -120,10 +160,64 @@ class Simulator(object):
 
         callback should be a function that takes the form:
         callback(game, result, *callbackarg)
+
+        If jobs is greater than one, games are split into shards of
+        GAMES_PER_SHARD games which are simulated by a pool of jobs
+        worker processes. Results are sent back a shard at a time, so
+        callback is still called for every game, in order, in this
+        process.
+
+        If seed is not None, game number N is played with the random
+        stream random_stream(seed, N) (see Utils.random_stream()), so the
+        same seed gives the same results regardless of the value of jobs,
+        and any single game can be replayed by passing that stream to
+        simulate_game(). Each Result passed to callback has game_number
+        set to N.
+
+        If precision is not None, number_of_games is a maximum and
+        simulation stops early once every hand's equity is known to
+        within plus or minus precision (a fraction of the pot, e.g.
+        0.0025 for 0.25%) with the given confidence (see
+        Stats.has_precision()). This is checked every
+        PRECISION_CHECK_GAMES games, or every shard.
+
+        If batch_size is not None, games are dealt, ranked and recorded
+        batch_size games at a time with numpy arrays and BatchRanker
+        instead of one at a time (see _simulate_games_in_batches()).
+        Results are only created if there is a callback. This requires
+        numpy, cannot be combined with jobs and doesn't support
+        HandGenerators. A seed gives repeatable results, but different
+        ones than without batch_size.
+
+        If output is not None, it should be a writer from
+        ResultWriter.open_writer() to which a row is written for every game. With batch_size, rows
+        are written from the batch arrays without creating Results.
         """
         assertInstance(number_of_games, int)
         if stats is None:
             stats = Stats(number_of_hands = self.number_of_hands)
+        if batch_size is not None:
+            if jobs > 1:
+                raise ValueError("batch_size cannot be combined with jobs")
+            return self._simulate_games_in_batches(number_of_games,
+                                                   batch_size,
+                                                   callback, callbackArg,
+                                                   stats, seed,
+                                                   precision, confidence,
+                                                   output)
+        if output is not None:
+            # Write each Result before passing it on to any callback
+            user_callback = callback
+            def callback(simulator, result, *args):
+                output.write(result)
+                if user_callback is not None:
+                    user_callback(simulator, result, *args)
+        if (jobs > 1) or (seed is not None):
+            return self._simulate_games_in_shards(number_of_games,
+                                                  callback, callbackArg,
+                                                  stats, jobs, seed,
+                                                  precision, confidence)
+        games_until_check = self.PRECISION_CHECK_GAMES
 	while number_of_games > 0:
 	    result = self.simulate_game()
             stats.record_game(result)
@@ -133,21 +227,282 @@ class Simulator(object):
                     args.append(callbackArg)
                 callback(*args)
             number_of_games -= 1
+            if precision is not None:
+                games_until_check -= 1
+                if games_until_check == 0:
+                    if stats.has_precision(precision, confidence):
+                        break
+                    games_until_check = self.PRECISION_CHECK_GAMES
         return stats
 
-    def simulate_game(self):
-	# Make a copy of deck, hands and board
-	deck = self.deck.copy()
-	deck.shuffle()
+    def _simulate_games_in_shards(self, number_of_games,
+                                  callback, callbackArg,
+                                  stats, jobs, seed,
+                                  precision=None, confidence=0.95):
+        """Simulate games in shards, in parallel if jobs > 1."""
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        want_results = callback is not None
+        shards = []
+        for first_game in xrange(0, number_of_games, self.GAMES_PER_SHARD):
+            games = min(number_of_games - first_game, self.GAMES_PER_SHARD)
+            shards.append((self, first_game, games, seed, want_results))
+        if jobs > 1:
+            pool = multiprocessing.Pool(min(jobs, len(shards)) or 1)
+            try:
+                self._record_shards(pool.imap(_simulate_shard, shards),
+                                    callback, callbackArg, stats,
+                                    precision, confidence)
+                pool.close()
+            finally:
+                pool.terminate()
+                pool.join()
+        else:
+            self._record_shards(itertools.imap(_simulate_shard, shards),
+                                callback, callbackArg, stats,
+                                precision, confidence)
+        return stats
+
+    def _record_shards(self, shard_results, callback, callbackArg, stats,
+                       precision=None, confidence=0.95):
+        """Merge shard results into stats, calling callback for each game.
+
+        Stops consuming shards once stats has the given precision."""
+        games = 0
+        for shard_stats, results in shard_results:
+            stats.merge(shard_stats)
+            if callback is not None:
+                for result in results:
+                    args = [self, result]
+                    if callbackArg is not None:
+                        args.append(callbackArg)
+                    callback(*args)
+            games += shard_stats.number_of_games
+            if (precision is not None) and \
+                    (games >= self.PRECISION_CHECK_GAMES) and \
+                    stats.has_precision(precision, confidence):
+                break
+
+    def _simulate_games_in_batches(self, number_of_games, batch_size,
+                                   callback, callbackArg,
+                                   stats, seed=None,
+                                   precision=None, confidence=0.95,
+                                   output=None):
+        """Simulate games batch_size at a time using numpy.
+
+        Each batch is dealt into an array of card codes by sorting a
+        random array over the cards not in predefined hands and board,
+        ranked with one BatchRanker call per ranker and reduced into
+        stats with Stats.record_batch() and, if given, written to
+        output with its write_batch()."""
+        if numpy is None:
+            raise ImportError("Batch simulation requires the numpy module")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least one")
+        layout = self._batch_layout()
+        if seed is None:
+            rng = get_rng(self.rng)
+        else:
+            rng = random_stream(seed)
+        state = numpy.random.RandomState(rng.getrandbits(32))
+        games = 0
+        while games < number_of_games:
+            size = min(batch_size, number_of_games - games)
+            codes = self._deal_batch(layout, size, state)
+            high_ranks, low_ranks = self._rank_batch(codes)
+            stats.record_batch(high_ranks, low_ranks)
+            if output is not None:
+                output.write_batch(codes, high_ranks, low_ranks)
+            if callback is not None:
+                for index in xrange(size):
+                    result = self._batch_result(codes[index], high_ranks,
+                                                low_ranks, index)
+                    args = [self, result]
+                    if callbackArg is not None:
+                        args.append(callbackArg)
+                    callback(*args)
+            games += size
+            if (precision is not None) and \
+                    (games >= self.PRECISION_CHECK_GAMES) and \
+                    stats.has_precision(precision, confidence):
+                break
+        return stats
+
+    def _batch_layout(self):
+        """Return how to deal a batch of games.
+
+        Returns a tuple of the array of available card codes and, for
+        each hand, a list of (column, codes) where column is the index
+        of the column in the batch array the hand's cards start at and
+        codes is either a tuple of fixed card codes or the number of
+        cards to be dealt. The board's cards follow each hand's."""
+        hands = []
+        if self.predefined_hands is not None:
+            for hand in self.predefined_hands:
+                if isinstance(hand, (HandGenerator, HandRange)):
+                    raise ValueError("Batch simulation does not support"
+                                     " HandGenerators or HandRanges")
+                hands.append(hand)
+        while len(hands) < self.number_of_hands:
+            hands.append(self.HandClass())
+        used_mask = 0
+        for hand in hands:
+            used_mask |= cardsMask(hand)
+        if self.board is not None:
+            used_mask |= cardsMask(self.board)
+        available = numpy.array([code for code in range(Card.numCodes)
+                                 if not used_mask & (1 << code)],
+                                dtype=numpy.uint8)
+        board_layout = []
+        if self.board is not None:
+            board_layout.append(tuple(card.code for card in self.board))
+            board_layout.append(self.board.maxCards - len(self.board))
+        layout = []
+        for hand in hands:
+            layout.append([tuple(card.code for card in hand),
+                           hand.maxCards - len(hand)] + board_layout)
+        return available, layout
+
+    def _deal_batch(self, layout, size, state):
+        """Return (size, hands, cards) array of card codes for size games.
+
+        Cards for each hand are its hole cards followed by the board."""
+        available, hand_layouts = layout
+        # Cards to deal to each hand, and then the board, in order
+        dealt_per_hand = [hand_layout[1] for hand_layout in hand_layouts]
+        dealt_to_board = 0
+        if len(hand_layouts[0]) > 2:
+            dealt_to_board = hand_layouts[0][3]
+        needed = sum(dealt_per_hand) + dealt_to_board
+        if needed > len(available):
+            raise TooManyHandsException("Not enough cards to deal")
+        order = state.random_sample((size, len(available))).argsort(axis=1)
+        dealt = available[order[:, :needed]]
+        board_dealt = dealt[:, needed - dealt_to_board:needed]
+        num_cards = sum(len(part) if isinstance(part, tuple) else part
+                        for part in hand_layouts[0])
+        codes = numpy.empty((size, len(hand_layouts), num_cards),
+                            dtype=numpy.uint8)
+        start = 0
+        for hand_index, hand_layout in enumerate(hand_layouts):
+            column = 0
+            for part_index, part in enumerate(hand_layout):
+                if isinstance(part, tuple):
+                    codes[:, hand_index, column:column + len(part)] = part
+                    column += len(part)
+                elif part_index == 1:
+                    codes[:, hand_index, column:column + part] = \
+                        dealt[:, start:start + part]
+                    start += part
+                    column += part
+                else:
+                    codes[:, hand_index, column:column + part] = board_dealt
+                    column += part
+        return codes
+
+    def _rank_batch(self, codes):
+        """Return high and low ranks for (games, hands, cards) array.
+
+        Returns two (games, hands) arrays, or None for one which isn't
+        ranked. Hands must use requiredHoleCards of their hole cards if
+        HandClass requires it, in which case every combination is
+        ranked and the best taken."""
+        games, number_of_hands, num_cards = codes.shape
+        required = getattr(self.HandClass, "requiredHoleCards", 0)
+        if required:
+            hole_cards = self.HandClass.maxCards
+            combinations = [hole + board
+                            for hole in itertools.combinations(
+                    range(hole_cards), required)
+                            for board in itertools.combinations(
+                    range(hole_cards, num_cards), 5 - required)]
+            codes = codes[:, :, combinations]
+        else:
+            codes = codes[:, :, None, :]
+        shape = codes.shape[:3]
+        codes = codes.reshape(-1, codes.shape[3])
+        high_ranks = low_ranks = None
+        if self.HighRankerClass is not None:
+            high_ranks = BatchRanker.rankCodes(codes).reshape(shape).max(
+                axis=2)
+        if self.LowRankerClass is not None:
+            if issubclass(self.LowRankerClass, EightLowRanker):
+                low_ranks = BatchRanker.rankEightLowCodes(codes)
+                # Best qualifying low of each hand
+                unqualified = numpy.iinfo(numpy.int64).max
+                low_ranks = numpy.where(low_ranks == BatchRanker.NO_RANK,
+                                        unqualified, low_ranks)
+                low_ranks = low_ranks.reshape(shape).min(axis=2)
+                low_ranks[low_ranks == unqualified] = BatchRanker.NO_RANK
+            elif issubclass(self.LowRankerClass, LowRanker):
+                low_ranks = BatchRanker.rankLowCodes(codes).reshape(
+                    shape).min(axis=2)
+            else:
+                raise ValueError("Batch simulation does not support %s" %
+                                 self.LowRankerClass.__name__)
+        return high_ranks, low_ranks
+
+    def _batch_result(self, codes, high_ranks, low_ranks, index):
+        """Return Result for game index of a batch.
+
+        codes is the (hands, cards) array of card codes for the game."""
+        hole_cards = codes.shape[1]
+        board = None
+        if self.board is not None:
+            hole_cards = self.HandClass.maxCards
+            board = self.board.__class__(Cards.fromCodes(
+                    codes[0, hole_cards:].tolist()))
+        hands = Hands()
+        for hand_codes in codes.tolist():
+            hand = self.HandClass(Cards.fromCodes(hand_codes[:hole_cards]))
+            if board is not None:
+                hand.setBoard(board)
+            hands.addHand(hand)
+        result = Result(hands, board=board)
+        if high_ranks is not None:
+            ranks = high_ranks[index]
+            best = ranks.max()
+            result.high_winners = numpy.flatnonzero(ranks == best).tolist()
+            result.winning_high_rank = PokerRank.fromValue(best)
+        if low_ranks is not None:
+            ranks = low_ranks[index]
+            qualified = ranks != BatchRanker.NO_RANK
+            if qualified.any():
+                best = ranks[qualified].min()
+                result.low_winners = numpy.flatnonzero(ranks == best).tolist()
+                result.winning_low_rank = PokerRank.fromValue(best)
+            else:
+                result.low_winners = []
+        return result
+
+    def simulate_game(self, rng=None):
+        """Simulate a single game and return its Result.
+
+        rng overrides the simulator's random number generator if given."""
+        if rng is None:
+            rng = self.rng
 	hands = Hands()
-        # Deal out predefined hands
+        # Cards already in use by predefined hands and board
+        used_mask = self._fixed_cards_mask()
+        # Deal hands from ranges first, jointly
+        range_hands = []
+        if self._has_ranges():
+            for mask, hand in self._get_range_dealer().dealHands(rng):
+                used_mask |= mask
+                range_hands.append(hand)
+            range_hands.reverse()
+        # Copy or generate predefined hands
         if self.predefined_hands is not None:
             for hand in self.predefined_hands:
-                if isinstance(hand, HandGenerator):
-                    hands.addHand(hand.generateHand(deck = deck))
+                if isinstance(hand, HandRange):
+                    hand = range_hands.pop().copy()
+                elif isinstance(hand, HandGenerator):
+                    hand = hand.generateHand(rng = rng,
+                                             excludeMask = used_mask)
+                    used_mask |= cardsMask(hand)
                 else:
-                    hands.addHand(hand.copy())
-                    deck.removeCards(hand)
+                    hand = hand.copy()
+                hands.addHand(hand)
 	# If we have less than numHands, fill it out
 	while len(hands) < self.number_of_hands:
 	    hands.addHand(self.HandClass())
@@ -155,13 +510,141 @@ class Simulator(object):
 	    board = None
 	else:
 	    board = self.board.copy()
-	# Fill out hands and board
-	deck.dealHands(hands)
+	# Fill out hands and board with just as many cards as needed
+        to_fill = list(hands)
+        if board is not None:
+            to_fill.append(board)
+        needed = [cards.maxCards - len(cards) for cards in to_fill]
+        cards = self.deck.sample(sum(needed), rng = rng,
+                                 excludeMask = used_mask)
+        start = 0
+        for hand, number in zip(to_fill, needed):
+            if number > 0:
+                hand.addCards(cards[start:start + number])
+                start += number
 	if board is not None:
-	    # Deal board
-	    deck.dealHands(board)
 	    for hand in hands:
 		hand.setBoard(board)
+        return self._rank_hands(hands, board)
+
+    def enumerate_games(self, suit_isomorphism=False, stats=None):
+        """Play out every possible completion of the hands and board once.
+
+        Returns a Stats instance with exact counts over all completions
+        (see Stats.get_fractions()). If a stats instance is passed in,
+        the same one, augmented, will be returned.
+
+        Predefined hands must be Hand or HandRange instances, not
+        HandGenerators. They and the board may be incomplete, in which
+        case all remaining cards are enumerated; note the number of
+        completions grows very quickly with the number of unknown cards.
+
+        For HandRanges, every combination of hands from the ranges which
+        don't share cards is enumerated, weighted by the product of the
+        hands' weights, giving exact range-vs-range statistics.
+
+        If suit_isomorphism is True, completions which are the same up to
+        a relabeling of suits that leaves the known cards unchanged are
+        only played once, weighted by the number of such completions."""
+        if stats is None:
+            stats = Stats(number_of_hands = self.number_of_hands)
+        predefined_hands = self.predefined_hands or []
+        for hand in predefined_hands:
+            if isinstance(hand, HandGenerator):
+                raise ValueError(
+                    "enumerate_games() does not support HandGenerators")
+        if not self._has_ranges():
+            self._enumerate_runouts(predefined_hands, stats,
+                                    suit_isomorphism)
+            return stats
+        for weight, range_hands in \
+                self._get_range_dealer().combinations():
+            range_hands = list(reversed(range_hands))
+            fixed_hands = [range_hands.pop() if isinstance(hand, HandRange)
+                           else hand
+                           for hand in predefined_hands]
+            self._enumerate_runouts(fixed_hands, stats, suit_isomorphism,
+                                    weight)
+        return stats
+
+    def _enumerate_runouts(self, fixed_hands, stats, suit_isomorphism=False,
+                           weight=1):
+        """Record every completion of fixed_hands and the board in stats.
+
+        fixed_hands is a list of Hands, filled out with empty hands to
+        number_of_hands. Each completion is recorded with the given
+        weight (times its number of equivalent completions)."""
+        fixed_hands = list(fixed_hands)
+        while len(fixed_hands) < self.number_of_hands:
+            fixed_hands.append(self.HandClass())
+        fixed_cards = list(fixed_hands)
+        if self.board is not None:
+            fixed_cards.append(self.board)
+        slot_sizes = [cards.maxCards - len(cards) for cards in fixed_cards]
+        used_mask = 0
+        for cards in fixed_cards:
+            used_mask |= cardsMask(cards)
+        available = [code for code in range(Card.numCodes)
+                     if not used_mask & (1 << code)]
+        if suit_isomorphism:
+            permutations = Canonicalizer.stabilizer(fixed_cards)
+        else:
+            permutations = None
+        for runout in _runouts(available, slot_sizes):
+            runout_weight = weight
+            if permutations is not None:
+                images = set(tuple(tuple(sorted(table[code] for code in slot))
+                                   for slot in runout)
+                             for table in permutations)
+                # Only play the smallest completion of each equivalent set
+                if runout != min(images):
+                    continue
+                runout_weight = weight * len(images)
+            hands = Hands()
+            for hand, codes in zip(fixed_hands, runout):
+                hand = hand.copy()
+                hand.addCards(Cards.fromCodes(codes))
+                hands.addHand(hand)
+            if self.board is None:
+                board = None
+            else:
+                board = self.board.copy()
+                board.addCards(Cards.fromCodes(runout[-1]))
+                for hand in hands:
+                    hand.setBoard(board)
+            stats.record_game(self._rank_hands(hands, board), runout_weight)
+
+    def _fixed_cards_mask(self):
+        """Return mask of cards in predefined Hands and the board."""
+        used_mask = 0
+        if self.predefined_hands is not None:
+            for hand in self.predefined_hands:
+                if not isinstance(hand, (HandGenerator, HandRange)):
+                    used_mask |= cardsMask(hand)
+        if self.board is not None:
+            used_mask |= cardsMask(self.board)
+        return used_mask
+
+    def _has_ranges(self):
+        """Are any of the predefined hands HandRanges?"""
+        if self.predefined_hands is None:
+            return False
+        for hand in self.predefined_hands:
+            if isinstance(hand, HandRange):
+                return True
+        return False
+
+    def _get_range_dealer(self):
+        """Return RangeDealer for predefined HandRanges, in order."""
+        if self._range_dealer is None:
+            self._range_dealer = RangeDealer(
+                [hand for hand in self.predefined_hands
+                 if isinstance(hand, HandRange)],
+                excludeMask = self._fixed_cards_mask())
+        return self._range_dealer
+
+    def _rank_hands(self, hands, board):
+        """Return Result with winners from given complete hands."""
         result = Result(hands, board=board)
 	# Find winning hands
 	if self.high_ranker is not None:
@@ -174,6 +657,36 @@ class Simulator(object):
             result.winning_low_rank = bestLowRank
         return result
 
+def _runouts(available, slot_sizes):
+    """Generate every way of dealing codes in available to slots.
+
+    Yields tuples with a sorted tuple of codes for each slot."""
+    if len(slot_sizes) == 0:
+        yield ()
+        return
+    for codes in itertools.combinations(available, slot_sizes[0]):
+        remaining = [code for code in available if code not in codes]
+        for rest in _runouts(remaining, slot_sizes[1:]):
+            yield (codes,) + rest
+
+def _simulate_shard(args):
+    """Simulate a shard of games for Simulator.simulate_games().
+
+    Module level so it can be called by multiprocessing workers.
+
+    Returns a tuple of the Stats for the shard and a list of Results for
+    each game (or None if they were not wanted)."""
+    simulator, first_game, number_of_games, seed, want_results = args
+    stats = Stats(number_of_hands = simulator.number_of_hands)
+    results = [] if want_results else None
+    for game_number in xrange(first_game, first_game + number_of_games):
+        result = simulator.simulate_game(rng=random_stream(seed, game_number))
+        stats.record_game(result)
+        if results is not None:
+            result.game_number = game_number
+            results.append(result)
+    return stats, results
+
 class Result(object):
     """Result from a hand of poker."""
     def __init__(self, hands, board=None,
@@ -190,13 +703,16 @@ class Result(object):
 
         hands should be a Hands instance with hands from game.
 
-        Values can all be accessed directly."""
+        Values can all be accessed directly. game_number is set by
+        Simulator.simulate_games() when games are seeded, and None
+        otherwise."""
         self.high_winners = high_winners
         self.winning_high_rank = winning_high_rank
         self.low_winners = low_winners
         self.winning_low_rank = winning_low_rank
         self.board = board
         self.hands = hands
+        self.game_number = None
                  
 class Stats(object):
     """Object from holding stats from a series of poker games."""
@@ -213,35 +729,175 @@ class Stats(object):
         self.low_winners = [0] * self.number_of_hands
         # For each hand, number of scoops (wins both ways)
         self.scoops = [0] * self.number_of_hands
+        # For each hand, number of high wins which were ties
+        self.high_ties = [0] * self.number_of_hands
+        # For each hand, number of low wins which were ties
+        self.low_ties = [0] * self.number_of_hands
+        # For each hand, sum of share of the pot won in each game (see
+        # get_pot_shares()) and sum of the squares of those shares, from
+        # which equity and its variance are computed
+        self.pot_shares = [0.0] * self.number_of_hands
+        # For each hand, the parts of pot_shares won with high and low
+        self.high_pot_shares = [0.0] * self.number_of_hands
+        self.low_pot_shares = [0.0] * self.number_of_hands
+        self.pot_share_squares = [0.0] * self.number_of_hands
         # How many games have we recorded?
         self.number_of_games = 0
 
-    def record_game(self, results):
+    def record_game(self, results, weight=1):
         """Record the winners of a game
 
-        results should be a Results instance."""
-        self.number_of_games += 1
-        if results.high_winners is not None:
-            for winner in results.high_winners:
-                if winner >= len(self.high_winners):
+        results should be a Results instance.
+
+        weight is the number of games the result counts as (e.g. for
+        equivalent games in Simulator.enumerate_games())."""
+        self.number_of_games += weight
+        high_winners = results.high_winners
+        low_winners = results.low_winners
+        if high_winners and low_winners:
+            pot = 0.5 * weight
+        else:
+            pot = weight
+        if high_winners is not None:
+            tie = len(high_winners) > 1
+            if high_winners:
+                share = float(pot) / len(high_winners)
+            for winner in high_winners:
+                if winner >= self.number_of_hands:
                     raise IndexError(\
                         "High winner #%d larger than number of hands (%d)" %
                         (winner, self.number_of_hands))
-                self.high_winners[winner] += 1
-        if results.low_winners is not None:
-            for winner in results.low_winners:
-                if winner >= len(self.low_winners):
+                self.high_winners[winner] += weight
+                self.high_pot_shares[winner] += share
+                if tie:
+                    self.high_ties[winner] += weight
+        if low_winners is not None:
+            tie = len(low_winners) > 1
+            if low_winners:
+                share = float(pot) / len(low_winners)
+            for winner in low_winners:
+                if winner >= self.number_of_hands:
                     raise IndexError(\
                         "Low winner #%d larger than number of hands (%d)" %
                         (winner, self.number_of_hands))
-                self.low_winners[winner] += 1
+                self.low_winners[winner] += weight
+                self.low_pot_shares[winner] += share
+                if tie:
+                    self.low_ties[winner] += weight
         # If we have one winner who won both high and low, we have a scooper
-        if (results.low_winners is not None) and \
-                (len(results.low_winners) == 1) and \
-                (results.high_winners is not None) and \
-                (len(results.high_winners) == 1) and \
-                (results.low_winners[0] == results.high_winners[0]):
-            self.scoops[results.low_winners[0]] += 1
+        if (low_winners is not None) and \
+                (len(low_winners) == 1) and \
+                (high_winners is not None) and \
+                (len(high_winners) == 1) and \
+                (low_winners[0] == high_winners[0]):
+            self.scoops[low_winners[0]] += weight
+        if low_winners:
+            # A hand may win part of both halves, so add them up per hand
+            for winner, share in self.get_pot_shares(results).items():
+                self.pot_shares[winner] += share * weight
+                self.pot_share_squares[winner] += share * share * weight
+        elif high_winners:
+            share = 1.0 / len(high_winners)
+            for winner in high_winners:
+                self.pot_shares[winner] += share * weight
+                self.pot_share_squares[winner] += share * share * weight
+
+    def record_batch(self, high_ranks=None, low_ranks=None):
+        """Record the winners of a batch of games.
+
+        high_ranks and low_ranks should be numpy arrays with a row of
+        integer ranks of each hand per game (see BatchRanker), or None
+        if there is no high or low. Low ranks of BatchRanker.NO_RANK
+        don't qualify. Equivalent to calling record_game() for each
+        game."""
+        if high_ranks is None:
+            games = len(low_ranks)
+        else:
+            games = len(high_ranks)
+        self.number_of_games += games
+        high_wins = low_wins = None
+        has_low = numpy.zeros(games, dtype=bool)
+        if low_ranks is not None:
+            qualified = low_ranks != BatchRanker.NO_RANK
+            masked = numpy.where(qualified, low_ranks,
+                                 numpy.iinfo(numpy.int64).max)
+            low_wins = qualified & (masked == masked.min(axis=1)[:, None])
+            has_low = qualified.any(axis=1)
+        # Pot is split if there are both high and low winners
+        if high_ranks is not None:
+            high_wins = high_ranks == high_ranks.max(axis=1)[:, None]
+            pot = numpy.where(has_low, 0.5, 1.0)
+        else:
+            pot = numpy.ones(games)
+        shares = numpy.zeros((games, self.number_of_hands))
+        for wins, winners, ties, pot_shares in (
+            (high_wins, self.high_winners, self.high_ties,
+             self.high_pot_shares),
+            (low_wins, self.low_winners, self.low_ties,
+             self.low_pot_shares)):
+            if wins is None:
+                continue
+            counts = wins.sum(axis=1)
+            share = wins * (pot / numpy.maximum(counts, 1))[:, None]
+            shares += share
+            self._add_columns(winners, wins.sum(axis=0))
+            self._add_columns(ties, (wins & (counts > 1)[:, None]).sum(axis=0))
+            self._add_columns(pot_shares, share.sum(axis=0))
+        if (high_wins is not None) and (low_wins is not None):
+            scoops = high_wins & low_wins & \
+                (high_wins.sum(axis=1) == 1)[:, None] & \
+                (low_wins.sum(axis=1) == 1)[:, None]
+            self._add_columns(self.scoops, scoops.sum(axis=0))
+        self._add_columns(self.pot_shares, shares.sum(axis=0))
+        self._add_columns(self.pot_share_squares, (shares * shares).sum(axis=0))
+
+    @staticmethod
+    def _add_columns(totals, sums):
+        """Add array of per-hand sums to list of totals in place."""
+        for index, value in enumerate(sums.tolist()):
+            totals[index] += value
+
+    @staticmethod
+    def get_pot_shares(results):
+        """Return dictionary mapping index of each winning hand in results
+        to the fraction of the pot it won.
+
+        If there are both high and low winners, the pot is split between
+        them, otherwise the high (or low) winners take all of it. Each
+        half is split evenly between tied hands, so a hand may be
+        quartered or win both halves."""
+        high_winners = results.high_winners or []
+        low_winners = results.low_winners or []
+        if high_winners and low_winners:
+            pot = 0.5
+        else:
+            pot = 1.0
+        shares = {}
+        for winners in (high_winners, low_winners):
+            for winner in winners:
+                shares[winner] = shares.get(winner, 0.0) + pot / len(winners)
+        return shares
+
+    def merge(self, other):
+        """Add the statistics from another Stats instance to this one.
+
+        Returns self."""
+        if other.number_of_hands != self.number_of_hands:
+            raise ValueError(\
+                "Cannot merge stats for %d hands with stats for %d hands" %
+                (other.number_of_hands, self.number_of_hands))
+        self.number_of_games += other.number_of_games
+        for index in range(self.number_of_hands):
+            self.high_winners[index] += other.high_winners[index]
+            self.low_winners[index] += other.low_winners[index]
+            self.scoops[index] += other.scoops[index]
+            self.high_ties[index] += other.high_ties[index]
+            self.low_ties[index] += other.low_ties[index]
+            self.pot_shares[index] += other.pot_shares[index]
+            self.pot_share_squares[index] += other.pot_share_squares[index]
+            self.high_pot_shares[index] += other.high_pot_shares[index]
+            self.low_pot_shares[index] += other.low_pot_shares[index]
+        return self
 
     def get_number_of_games(self):
         """Return number of games recorded"""
@@ -263,6 +919,64 @@ class Stats(object):
         """Return an array with number of scoops by each hand"""
         return self.scoops
 
+    def get_high_ties(self):
+        """Return an array with number of tied high wins by each hand"""
+        return self.high_ties
+
+    def get_low_ties(self):
+        """Return an array with number of tied low wins by each hand"""
+        return self.low_ties
+
+    def get_equities(self):
+        """Return an array with the average share of the pot won by each
+        hand, accounting for split pots."""
+        return self._per_game(self.pot_shares)
+
+    def get_high_equities(self):
+        """Return an array with the average share of the pot won by each
+        hand with high (the high half in a split pot game)."""
+        return self._per_game(self.high_pot_shares)
+
+    def get_low_equities(self):
+        """Return an array with the average share of the pot won by each
+        hand with low."""
+        return self._per_game(self.low_pot_shares)
+
+    def _per_game(self, totals):
+        """Return totals divided by number of games."""
+        if self.number_of_games == 0:
+            return [0.0] * self.number_of_hands
+        return [total / self.number_of_games for total in totals]
+
+    def get_standard_errors(self):
+        """Return an array with the standard error of each hand's equity."""
+        n = self.number_of_games
+        if n < 2:
+            return [float("inf")] * self.number_of_hands
+        errors = []
+        for share, square in zip(self.pot_shares, self.pot_share_squares):
+            mean = share / n
+            variance = max(square / n - mean * mean, 0.0) * n / (n - 1)
+            errors.append(math.sqrt(variance / n))
+        return errors
+
+    def get_confidence_intervals(self, confidence=0.95):
+        """Return an array with, for each hand, the half-width of the
+        confidence interval of its equity at the given confidence."""
+        z = z_score(confidence)
+        return [z * error for error in self.get_standard_errors()]
+
+    def has_precision(self, precision, confidence=0.95):
+        """Is every hand's equity known to within plus or minus precision
+        at the given confidence?"""
+        return max(self.get_confidence_intervals(confidence)) <= precision
+
+    def get_fractions(self, counts):
+        """Given an array of counts (e.g. from get_high_winners()), return
+        an array of Fractions of games they represent."""
+        return [fractions.Fraction(count, self.number_of_games)
+                for count in counts]
+
 ######################################################################
 
 class Game(object):
@@ -290,45 +1004,74 @@ class Game(object):
     def __init__(self,
                  table,
                  structure,
-                 console=None):
+                 console=None,
+                 rng=None,
+                 history=None):
         """table must be a Table instance.
 
         structure must be a Structure instance represent game structure.
 
         console must be a stream to which a copy of all messages
         should be delivered or None if messages should be discarded.
+
+        rng is the random number generator used for picking the dealer,
+        shuffling and by players making random decisions. If None, the
+        table's generator is used for the dealer and the random module
+        otherwise.
+
+        history, if not None, should be a HandHistory.HandHistoryWriter
+        to which every hand played is recorded.
         """
         # Todo: sanity check arguments
         self.table = table
         self.structure = structure
+        self.rng = rng
+        self.history = history
         self.message_handler = MessageHandler(table, console)
-        table.random_dealer()
+        # Bound methods for STEPS, looked up once rather than every hand
+        self._steps = [(step, getattr(self, step)) for step in self.STEPS]
+        table.random_dealer(rng=rng)
         self.message("New game")
-        self.debug("Table: %s" % table)
+        self.debug("Table: %s", table)
 
     def report_action(self, player, action):
         """Report on the given action"""
-        self.message("%s %s" % (player, action))
+        self.message("%s %s", player, action)
 
-    def message(self, msg):
-        """Handle a message about the game."""
-        self.message_handler.message(msg)
+    def message(self, msg, *args):
+        """Handle a message about the game.
 
-    def debug(self, msg):
-        """Handle a debug message about the game."""
-        self.message_handler.debug(msg)
+        If args are given, the message is msg % args, which is only
+        formatted if someone is listening."""
+        self.message_handler.message(msg, *args)
 
-    def play_hand(self):
-        """Play a hand."""
+    def debug(self, msg, *args):
+        """Handle a debug message about the game.
+
+        args are handled as with message()."""
+        self.message_handler.debug(msg, *args)
+
+    def play_hand(self, deck=None):
+        """Play a hand.
+
+        With no console and only players who discard messages, no
+        messages are formatted, so bots can play many hands quickly.
+
+        deck, if given, is the Deck to deal from, in the order cards
+        are to be dealt (e.g. to replay a hand), instead of a newly
+        shuffled one."""
         if len(self.table.get_active_players()) < 2:
             raise PokerGameStateException(\
                 "Need at least two active players to play a hand")
+        self.message_handler.update_listeners()
         self.message("New hand starting")
-        hand_state = HandState(self.table, self.message_handler)
-        for step in self.STEPS:
-            self.debug("Hand step: %s" % step)
-            code = "self.%s(hand_state)" % step
-            eval(code)
+        hand_state = HandState(self.table, self.message_handler, rng=self.rng,
+                               deck=deck, history=self.history)
+        for name, step in self._steps:
+            self.debug("Hand step: %s", name)
+            step(hand_state)
+        if self.history is not None:
+            self.history.end_hand()
         # Reset state of any all-in or folded players.
         # Make any players with stack of 0 sitting out.
         for player in self.table.get_seated_players():
@@ -347,7 +1090,7 @@ class Game(object):
         """Handle antes."""
         ante_amount = self.structure.get_ante()
         if ante_amount > 0:
-            self.message("Collecting ante of %d" % ante_amount)
+            self.message("Collecting ante of %d", ante_amount)
             active_players = self.table.get_active_players()
             betting = hand_state.new_betting_round()
             betting.set_action(active_players[0])
@@ -364,7 +1107,7 @@ class Game(object):
         action_is_on = self.table.get_next_player(
             self.table.get_dealer(),
             filter=lambda p: p.is_active() and p.stack > 0)
-        self.message("Action starts on %s" % action_is_on)
+        self.message("Action starts on %s", action_is_on)
         round = hand_state.new_betting_round()
         round.set_action(action_is_on)
 
@@ -386,8 +1129,9 @@ class Game(object):
     def deal_hands(self, hand_state):
         """Deal full hands to all players."""
         hand_state.deal_cards(self.HandClass.maxCards)
-        for player in self.table.get_active_players():
-            self.debug("{}: {}".format(player, player._hand))
+        if self.message_handler.wants_debug():
+            for player in self.table.get_active_players():
+                self.debug("%s: %s", player, player._hand)
 
     def betting_round(self, hand_state):
         """Handle betting"""
@@ -396,7 +1140,7 @@ class Game(object):
         while not betting_round.is_pot_good():
             player = betting_round.get_action_player()
             request = self._get_action_request(hand_state)
-            self.debug("Action is on {}: {}".format(player, request))
+            self.debug("Action is on %s: %s", player, request)
             action = player.get_action(request, self, hand_state)
             betting_round.process_action(action)
             self.report_action(player, action)
@@ -410,19 +1154,21 @@ class Game(object):
         high_ranks = {}
         for player in self.table.get_active_players():
             high_ranks[player] = self.HighRanker.rankHand(player._hand)
-            self.debug("{} has {} for a {}".format(player,
-                                                   player._hand,
-                                                   high_ranks[player]))
+            if hand_state.history is not None:
+                hand_state.history.record_rank(player, high_ranks[player])
+            self.debug("%s has %s for a %s",
+                       player, player._hand, high_ranks[player])
         # Now awarding pots starting with last side pot
         pot = hand_state.pot
         while pot is not None:
             winning_rank = max([high_ranks[p] for p in pot.contending_players])
-            winning_players = filter(lambda p: high_ranks[p] == winning_rank,
-                                     pot.contending_players)
-            self.message("%s to %s with %s" % \
-                             (pot,
-                              ",".join([str(p) for p in winning_players]),
-                              winning_rank))
+            winning_players = [p for p in pot.contending_players
+                               if high_ranks[p] == winning_rank]
+            if self.message_handler.wants_messages():
+                self.message("%s to %s with %s",
+                             pot,
+                             ",".join([str(p) for p in winning_players]),
+                             winning_rank)
             pot.distribute(high_winners = winning_players)
             pot = pot.parent
 
@@ -465,7 +1211,7 @@ class Pot(object):
         self.parent = parent
         self.amount = amount
         self.message_handler = message_handler
-        self._message("New " + str(self))
+        self._message("New %s", self)
 
     def fold_player(self, player):
         """Fold a player, removing them from contention of this pot and any parent pots"""
@@ -474,7 +1220,7 @@ class Pot(object):
         self.contending_players.remove(player)
         self.folded_players.append(player)
         if self.parent: self.parent.fold_player(player)
-        self._debug("Folding " + str(player))
+        self._debug("Folding %s", player)
 
     def pull_bets(self, maximum_pull=None):
         """Pull bets from all players who were or are in pot.
@@ -483,7 +1229,7 @@ class Pot(object):
         if maximum_pull is None:
             self._debug("Pulling bets (no maximum)")
         else:
-            self._debug("Pulling bets (%d maximum)" % maximum_pull)
+            self._debug("Pulling bets (%d maximum)", maximum_pull)
         for player in itertools.chain(self.contending_players,
                                       self.folded_players):
             if maximum_pull is not None:
@@ -500,8 +1246,8 @@ class Pot(object):
         the contending players in the new side pot. If None, all contending
         players with a bet greater than 0 will be contenders."""
         if contending_players is None:
-            contending_players = filter(lambda p: p.bet > 0,
-                                        self.contending_players)
+            contending_players = [p for p in self.contending_players
+                                  if p.bet > 0]
         # Todo: contending_players must be subset of self.contending_players
         new_parent = Pot(contending_players=contending_players,
                          amount=self.amount,
@@ -553,15 +1299,15 @@ class Pot(object):
             ")"
         return s
 
-    def _message(self, msg):
+    def _message(self, msg, *args):
         """Handle a message"""
         if self.message_handler:
-            self.message_handler.message(msg)
+            self.message_handler.message(msg, *args)
 
-    def _debug(self, msg):
+    def _debug(self, msg, *args):
         """Handle a debug message"""
         if self.message_handler:
-            self.message_handler.debug(msg)
+            self.message_handler.debug(msg, *args)
 
 ######################################################################
 
@@ -582,15 +1328,47 @@ class MessageHandler(object):
         """
         self.table = table
         self.console = console
-        
-    def message(self, msg):
-        """Deliver a message to all players and the console"""
+        self.update_listeners()
+
+    def update_listeners(self):
+        """Find the seated players who want messages.
+
+        Players who don't override Player.message() discard messages,
+        so they are not delivered to them. Should be called whenever
+        players are seated or leave."""
+        self.listeners = [player for player in self.table.get_seated_players()
+                          if type(player).message.im_func is not
+                          Player.message.im_func]
+
+    def wants_messages(self):
+        """Return True if anyone will receive messages."""
+        return bool(self.console or self.listeners)
+
+    def wants_debug(self):
+        """Return True if anyone will receive debug messages."""
+        return bool(self.console)
+
+    def message(self, msg, *args):
+        """Deliver a message to all players and the console.
+
+        If args are given, the message is msg % args, which is only
+        formatted if someone is listening."""
+        if not (self.console or self.listeners):
+            return
+        if args:
+            msg = msg % args
         self._write_to_console(msg)
-        for player in self.table.get_seated_players():
+        for player in self.listeners:
             player.message(msg)
 
-    def debug(self, msg):
-        """Handle a debug message only delivered to console."""
+    def debug(self, msg, *args):
+        """Handle a debug message only delivered to console.
+
+        args are handled as with message()."""
+        if not self.console:
+            return
+        if args:
+            msg = msg % args
         self._write_to_console("DEBUG: " + msg)
 
     def _write_to_console(self, msg):
@@ -607,23 +1385,38 @@ class HandState(object):
     with finish_processing() after which no more acctions should be processed.
     """
 
-    def __init__(self, table, message_handler=None):
+    def __init__(self, table, message_handler=None, rng=None,
+                 deck=None, history=None):
         """players should be array of players to be seated.
 
         deal must be the player who is the current dealer. If None, the
         lowest seated player will be the dealer.
 
-        message handler must be a MessageHandler instance or None."""
+        message handler must be a MessageHandler instance or None.
+
+        rng is the random number generator used to shuffle the deck.
+
+        deck, if not None, is a Deck to deal from without shuffling.
+
+        history, if not None, is a HandHistory.HandHistoryWriter to
+        record the hand to."""
         self.table = table
         self.message_handler = message_handler
+        self.history = history
 
         #
         # Private state not available to players
         #
-        self._deck = Deck()
-        self._deck.shuffle()
+        if deck is None:
+            deck = Deck(rng=rng)
+            deck.shuffle()
+        self._deck = deck
+        if history is not None:
+            history.start_hand(table, deck)
 
         active_players = self.table.get_active_players()
+        # Players seated for this hand, which don't change during it
+        self.players = self.table.get_seated_players()
 
         # Create main pot to start with
         self.pot = Pot(contending_players = active_players)
@@ -636,15 +1429,19 @@ class HandState(object):
 
     def deal_cards(self, number_of_cards=1):
         """Deal number_of_cards to each player."""
+        players = self.table.get_active_players()
         for card in range(number_of_cards):
-            for player in self.table.get_active_players():
+            for player in players:
                 player.deal_card(self._deck)
 
     def new_betting_round(self):
         """Create a new betting round"""
         new_round = BettingRound(self.table,
-                                   self.pot,
-                                   message_handler=self.message_handler)
+                                 self.pot,
+                                 message_handler=self.message_handler,
+                                 players=self.players,
+                                 number=len(self.betting_rounds),
+                                 history=self.history)
         self.betting_rounds.append(new_round)
         return new_round
 
@@ -660,31 +1457,49 @@ class HandState(object):
         s += "On betting round %d" % (len(self.betting_rounds) + 1)
         return s
 
-    def _message(self, msg):
+    def _message(self, msg, *args):
         """Handle a message"""
         if self.message_handler is not None:
-            self.message_handler.message(msg)
+            self.message_handler.message(msg, *args)
 
-    def _debug(self, msg):
+    def _debug(self, msg, *args):
         """Handle a debug message"""
         if self.message_handler is not None:
-            self.message_handler.debug(msg)
+            self.message_handler.debug(msg, *args)
 
 ######################################################################
 
 class BettingRound(object):
     """State and logic associated with a round of betting."""
 
-    def __init__(self, table, pot, message_handler=None):
+    def __init__(self, table, pot, message_handler=None, players=None,
+                 number=0, history=None):
         """
         pot must be a Pot instance that will be modified in place.
         
         action_is_on must a Player contending for pot
         indicating the player who is first to act.
+
+        players is the list of players seated at table, which must not
+        change during the round. If None, it is taken from table.
+
+        number is the number of the round in the hand, from zero, and
+        history a HandHistory.HandHistoryWriter to record actions to,
+        or None.
         """
         self.table = table
         self.pot = pot
         self.message_handler = message_handler
+        self.number = number
+        self.history = history
+        if players is None:
+            players = table.get_seated_players()
+        self.players = players
+        #
+        # Largest and total of bets not yet swept into pot, kept up
+        # to date by process_action()
+        self._max_bet = max([player.bet for player in players])
+        self._total_bets = sum([player.bet for player in players])
         #
         # Who is the action on?
         self.action_is_on = None
@@ -710,7 +1525,7 @@ class BettingRound(object):
 
     def set_action(self, player):
         """Set the action to the given player"""
-        if player not in self.table.get_seated_players():
+        if player not in self.players:
             raise ValueError("Player not at table")
         self.action_is_on = player
 
@@ -725,8 +1540,7 @@ class BettingRound(object):
                 "Player whom action is on is not defined")
         try:
             self.action_is_on = \
-                self.table.get_next_player(self.action_is_on,
-                                           filter=lambda p: p.is_active())
+                self.table.get_next_active_player(self.action_is_on)
         except IndexError:
             # No active players left, set action on last_to_bet to
             # trigger pot_is_good logic below
@@ -763,9 +1577,13 @@ class BettingRound(object):
         If player is None, calculates for current player action is on."""
         if player is None:
             player = self.action_is_on
-        bets = [player.bet for player in self.table.get_seated_players()]
+        contention_limit = player.bet + player.stack
+        if contention_limit >= self._max_bet:
+            # Player can contend for all bets
+            return self._total_bets + self.pot.amount
+        bets = [player.bet for player in self.players]
         # Figure out total of bets that player can contend for
-        bet_total = sum(map(lambda b: min(b, player.bet + player.stack), bets))
+        bet_total = sum(map(lambda b: min(b, contention_limit), bets))
         return bet_total + self.pot.amount
 
     def process_action(self, action):
@@ -778,6 +1596,7 @@ class BettingRound(object):
             raise PokeGameStateException(
                 "Player whom action is on is not defined")
         player = self.action_is_on  # For convienence
+        previous_bet = player.bet
         required_to_call = self.required_to_call(player)
         if action.is_ante():
             player.process_action(action)
@@ -817,8 +1636,12 @@ class BettingRound(object):
                 raise InvalidActionException("Raise too small")
             player.process_action(action)
             self.last_to_bet = player
+        self._total_bets += player.bet - previous_bet
+        self._max_bet = max(self._max_bet, player.bet)
         self.action_record.append((player, action))
-        self._debug("Action: %s by %s" % (action, player))
+        if self.history is not None:
+            self.history.record_action(self.number, player, action)
+        self._debug("Action: %s by %s", action, player)
         if action.is_all_in():
             player.status = player.STATUS_ALL_IN
         self.action_to_next_player()
@@ -835,7 +1658,7 @@ class BettingRound(object):
                 "sweep_bets_into_pot() called before pot is good")
         self._debug("Sweeping bets into pot")
         # Loop until no play has money to be put into pot
-        while self.max_bet() > 0:
+        while self._max_bet > 0:
             all_ins = filter(lambda p: p.is_all_in(), self.players_with_bets())
             if len(all_ins) == 0:
                 # No all-ins, just sweep bets into pot
@@ -849,42 +1672,44 @@ class BettingRound(object):
                 smallest_all_in_players = \
                     filter(lambda p: p.bet == smallest_all_in_bet_size,
                            all_ins)
-                self._debug("Handling all-in of %d: %s " % \
-                                (smallest_all_in_bet_size,
-                                 " ".join([str(p) for p in \
-                                               smallest_all_in_players])))
+                self._debug("Handling all-in of %d: %s ",
+                            smallest_all_in_bet_size,
+                            " ".join([str(p) for p in \
+                                          smallest_all_in_players]))
                 # Sanity check
                 if smallest_all_in_bet_size == 0:
                     raise PokerGameStateException("Smallest all-in bet is zero")
                 # Subtract this all-in bet from all bets and put
                 # into current pot
                 self.pot.pull_bets(maximum_pull = smallest_all_in_bet_size)
+                self._max_bet -= smallest_all_in_bet_size
                 if len(self.players_with_bets()) > 0:
                     # If we only have one one player left we go
                     # ahead and create another pot which that player will
                     # automatically win.
                     self.pot.new_side_pot()
+        self._max_bet = 0
+        self._total_bets = 0
         self._debug("Sweep into pot complete")
         return self.pot
 
     def max_bet(self):
         """Return the larger total bet by any player."""
-        return max([player.bet for player in self.table.get_seated_players()])
+        return self._max_bet
 
     def players_with_bets(self):
         """Return an array of players with non-zero bets."""
-        return filter(lambda p: (p is not None) and (p.bet > 0),
-                      self.table.get_seated_players())
+        return [p for p in self.players if p.bet > 0]
 
-    def _message(self, msg):
+    def _message(self, msg, *args):
         """Handle a message"""
         if self.message_handler is not None:
-            self.message_handler.message(msg)
+            self.message_handler.message(msg, *args)
 
-    def _debug(self, msg):
+    def _debug(self, msg, *args):
         """Handle a debug message"""
         if self.message_handler is not None:
-            self.message_handler.debug(msg)
+            self.message_handler.debug(msg, *args)
 
 ######################################################################
 class Structure(object):
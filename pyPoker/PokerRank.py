@@ -1,6 +1,5 @@
 """Class for representing a Hand's rank."""
 
-from BitField import BitField
 from PokerException import PokerException, PokerInternalException
 from Cards import Card, Cards, Rank, Suit
 from Hand import CommunityCardHand
@@ -20,14 +19,20 @@ class IncompleteHandException(PokerException):
 # PokerRank
 #
 
-class PokerRank(BitField):
-    # Poker rank is a bitfield that looks like the following (each field
+class PokerRank(int):
+    # Poker rank is an integer that looks like the following (each field
     # is a 4 bit nibble):
     #   -- Type PrimaryRank SecondaryRank Kicker1 Kicker2 Kicker3 Kicker4
     #
     # This is based on the strategy at:
     # See http://cowboyprogramming.com/2007/01/04/programming-poker-ai
     # With the modication that I have 4 kickers (for high card)
+    #
+    # Ranks compare as plain ints. Fields are only decoded when asked for
+    # by the accessors below or when converted to a string.
+
+    # No per-instance dictionary, a PokerRank is just its packed value.
+    __slots__ = ()
 
     HIGH_CARD = 0
     PAIR = 1
@@ -44,7 +49,7 @@ class PokerRank(BitField):
     BOAT = FULL_HOUSE
     QUADS = FOUR_OF_A_KIND
 
-    # Offsets into BitField
+    # Offsets of fields
     TYPE_OFFSET = 24
     PRIMARY_CARD_OFFSET =  20
     SECONDARY_CARD_OFFSET = 16
@@ -68,42 +73,66 @@ class PokerRank(BitField):
     @staticmethod
     def __new__(cls, rankValue, primaryCard=None,
 		 secondaryCard=None, kickers=None):
+        """Create a PokerRank from Card or Rank instances.
+
+        kickers may be in any order and is not modified. Rankers in the
+        inner loop should use fromRanks() instead."""
         # TODO: Add sanity checking of valyes
-        value = rankValue << cls.TYPE_OFFSET
-
-        # Alow primaryCard to be Card or Rank
-        # TODO: This slows us down, allow only Rank
-        if primaryCard:
-            if isinstance(primaryCard, Card):
-                rank = primaryCard.rank
-            else:
-                rank = primaryCard
-            value |= rank << cls.PRIMARY_CARD_OFFSET
-
-        if secondaryCard:
-            if isinstance(secondaryCard, Card):
-                rank = secondaryCard.rank
-            else:
-                rank = secondaryCard
-            value |= rank << cls.SECONDARY_CARD_OFFSET
-        
+        primaryRank = cls._toRank(primaryCard)
+        secondaryRank = cls._toRank(secondaryCard)
         if kickers:
-            kickers.sort(reverse=True)
-            offset = cls.FIRST_KICKER_OFFSET
-            for kicker in kickers:
-                # All for kicker to be both card or Rank
-                if isinstance(kicker, Card):
-                    kickerRank = kicker.rank
-                else:
-                    kickerRank = kicker
-                value |= kickerRank << offset
-                offset -= 4
+            kickers = sorted([cls._toRank(kicker) for kicker in kickers],
+                             reverse=True)
+        else:
+            kickers = ()
+        self = cls.fromRanks(rankValue, primaryRank, secondaryRank, kickers)
 
         # Sanity check
-        if value == 0:
+        if self == 0:
             raise PokerInternalException("Value == 0")
 
-        return BitField.__new__(cls, value)
+        return self
+
+    @classmethod
+    def fromRanks(cls, rankValue, primaryRank=0, secondaryRank=0, kickers=()):
+        """Create a PokerRank by packing integer ranks.
+
+        kickers must already be sorted from high to low. No checking is
+        done, this is the fast path for Rankers. Offsets are inlined
+        for speed."""
+        value = ((rankValue << 24) |
+                 (primaryRank << 20) |
+                 (secondaryRank << 16))
+        offset = 12
+        for kicker in kickers:
+            value |= kicker << offset
+            offset -= 4
+        return int.__new__(cls, value)
+
+    @classmethod
+    def fromValue(cls, value):
+        """Create a PokerRank from its integer value (e.g. from BatchRanker)."""
+        return int.__new__(cls, value)
+
+    @staticmethod
+    def _toRank(card):
+        """Return rank of given Card or Rank, with 0 for None."""
+        if not card:
+            return 0
+        if isinstance(card, Card):
+            return card.rank
+        return card
+
+    def __getnewargs__(self):
+        # Arguments to __new__() to recreate this rank when unpickling
+        return (self.getType(),
+                (self >> 20) & 0xf,
+                (self >> 16) & 0xf,
+                [int(kicker) for kicker in self.getKickerRanks()])
+
+    def __getstate__(self):
+        # Allow pickling with protocols 0 and 1 despite __slots__
+        return None
 
     @staticmethod
     def straightFlush(rank):
@@ -168,8 +197,8 @@ class PokerRank(BitField):
 
     def debugString(self):
         """Return descriptive string for debugging."""
-        string = "%0X" % self.value
-        if self.value:
+        string = "%0X" % self
+        if self:
             string += ":" + self.__str__()
         string += ":kickers " + self.kickersAsString()
         return string
@@ -184,14 +213,13 @@ class PokerRank(BitField):
 
     def getType(self):
         """Return the type of this instance as an integer."""
-        return self.getBitRange(numBits = 4, offset=self.TYPE_OFFSET, shift=True)
+        return (self >> 24) & 0xf
+
     def getPrimaryCardRank(self):
         """Get the rank of the primary card.
 
         Returns None if no rank defined."""
-        value = self.getBitRange(numBits = 4,
-                                 offset=self.PRIMARY_CARD_OFFSET,
-                                 shift=True)
+        value = (self >> 20) & 0xf
         if not value:
             return None
         return Rank(value)
@@ -200,9 +228,7 @@ class PokerRank(BitField):
         """Get the rank of the secodary card (e.g. the pair in a full house).
 
         Returns None if no rank defined."""
-        value = self.getBitRange(numBits = 4,
-                                 offset=self.SECONDARY_CARD_OFFSET,
-                                 shift=True)
+        value = (self >> 16) & 0xf
         if not value:
             return None
         return Rank(value)
@@ -212,9 +238,7 @@ class PokerRank(BitField):
         kickers = []
         offset = self.FIRST_KICKER_OFFSET
         while offset >= 0:
-            value = self.getBitRange(numBits=4,
-                                     offset=offset,
-                                     shift=True)
+            value = (self >> offset) & 0xf
             if value == 0:
                 break
             kickers.append(Rank(value))
@@ -1,6 +1,6 @@
 """Class for ranking poker hands"""
 
-from BitField import BitField
+from BitField import BitField, highestBit, highestNBits, popCount
 from Cards import Rank, Suit
 from PokerException import PokerInternalException
 from PokerRank import PokerRank
@@ -8,18 +8,52 @@ from PokerRank import PokerRank
 class RankerBase:
     """Base class for other Ranker classes (low and high)."""
 
+    @classmethod
+    def rankHands(cls, hands):
+        """Return list with rank of each of hands, as given by rankHand().
+
+        If all the hands share the same board, and the ranker supports
+        it, the board is analysed only once (see _analyzeBoard()) and
+        each hand's hole cards are then added to that analysis."""
+        board = hands[0].board if hands else None
+        analysis = None
+        if board is not None:
+            if all(hand.board is board for hand in hands):
+                analysis = cls._analyzeBoard(board, hands)
+        if analysis is None:
+            return [cls.rankHand(hand) for hand in hands]
+        return [cls._rankHoleCards(hand, analysis) for hand in hands]
+
+    @classmethod
+    def _analyzeBoard(cls, board, hands):
+        """Return analysis of board shared by hands for _rankHoleCards().
+
+        Returns None if the ranker can't rank the given hands this way,
+        which is the case unless overridden by a subclass."""
+        return None
+
+    @classmethod
+    def _rankHoleCards(cls, holeCards, analysis):
+        """Return rank of holeCards with board given by _analyzeBoard().
+
+        holeCards is the hand, with its board, so unless overridden by
+        a subclass this ignores analysis and uses rankHand()."""
+        return cls.rankHand(holeCards)
+
     @classmethod
     def _handToSuitedBitFields(cls, hand):
         """Given a hand, return a array of four BitFields, one per suit, indicating what card ranks the hand contains."""
-        bitfields = [None] * (Suit.SPADES + 1)
-        bitfields[Suit.CLUBS] = BitField(0)
-        bitfields[Suit.DIAMONDS] = BitField(0)
-        bitfields[Suit.HEARTS] = BitField(0)
-        bitfields[Suit.SPADES] = BitField(0)
+        return [BitField(mask)
+                for mask in cls._handToSuitedRankMasks(hand)]
+
+    @classmethod
+    def _handToSuitedRankMasks(cls, hand):
+        """Like _handToSuitedBitFields() but returns plain ints."""
+        masks = [0] * (Suit.SPADES + 1)
         for card in hand:
             # Set appropriate bit
-            bitfields[card.suit] += card.rank
-        return bitfields
+            masks[card.suit] |= 1 << card.rank
+        return masks
 
     @classmethod
     def _handToBitField(cls, hand):
@@ -32,7 +66,9 @@ class RankerBase:
 
     @classmethod
     def _suitedBitFieldsToRankedBitFields(cls, bitfields):
-        """Given an array of bitfields representing cards of the different suits, return a set of bitfields representing singletons, pairs, trips and quads."""
+        """Given an array of bitfields representing cards of the different suits, return a set of bitfields representing singletons, pairs, trips and quads.
+
+        Works equally with BitFields or plain ints."""
         # AND of all four fields results in bitfield of quads
         quadsBitField = (bitfields[Suit.CLUBS] & bitfields[Suit.DIAMONDS] &
                          bitfields[Suit.HEARTS] & bitfields[Suit.SPADES])
@@ -78,7 +114,7 @@ class RankerBase:
 
         Returns rank of highest straight or None if one not present."""
         for rank, bits in cls._straightBitFields:
-            if bitfield.testBits(bits):
+            if bitfield & bits == bits:
                 return rank
         return None
 
@@ -135,8 +171,7 @@ class Ranker(RankerBase):
         one) and the rank of those hands."""
         best_hands = []
         best_rank = None
-        for index, hand in enumerate(hands):
-            rank = cls.rankHand(hand)
+        for index, rank in enumerate(cls.rankHands(hands)):
             if (best_rank is None) or (rank > best_rank):
                 best_hands = [index]
                 best_rank = rank
@@ -153,10 +188,31 @@ class Ranker(RankerBase):
             raise ValueError("Hand has too many cards (%d > 7)" % len(cards))
         if len(cards) < 5:
             raise ValueError("Hand has too few cards (%d < 5)" % len(cards))
+        return cls._rankSuitedRankMasks(cls._handToSuitedRankMasks(cards))
+
+    @classmethod
+    def _analyzeBoard(cls, board, hands):
+        """Return rank masks by suit of board shared by hands.
 
-        # Array of bitfields of cards by suit
-        suitedBitFields = cls._handToSuitedBitFields(cards)
-        
+        Only supported when any hole cards may be used and hands have
+        six or seven cards including the board (five card hands are
+        ranked with _rankFiveCardHand())."""
+        for hand in hands:
+            if hand.requiredHoleCards or not (6 <= len(hand) + len(board) <= 7):
+                return None
+        return cls._handToSuitedRankMasks(board)
+
+    @classmethod
+    def _rankHoleCards(cls, holeCards, analysis):
+        """Return rank of holeCards with board rank masks from _analyzeBoard()."""
+        suitedRankMasks = list(analysis)
+        for card in holeCards:
+            suitedRankMasks[card.suit] |= 1 << card.rank
+        return cls._rankSuitedRankMasks(suitedRankMasks)
+
+    @classmethod
+    def _rankSuitedRankMasks(cls, suitedBitFields):
+        """Return PokerRank for best hand given rank masks of cards by suit."""
         # Check for straight-flush
         highRank = None
         for suit in Suit.suits:
@@ -164,7 +220,7 @@ class Ranker(RankerBase):
             if rank and ((highRank is None) or (rank > highRank)):
                 highRank = rank
         if highRank is not None:
-            return PokerRank.straightFlush(highRank)
+            return PokerRank.fromRanks(PokerRank.STRAIGHT_FLUSH, highRank)
 
         # Get bitfields representing singletons, pairs, trips and quads
         (singletonsBitField,
@@ -179,59 +235,62 @@ class Ranker(RankerBase):
                     suitedBitFields[Suit.SPADES])
 
         # Check for quads
-        if quadsBitField.setCount() > 0:
-            rank = quadsBitField.highestSet()
+        if quadsBitField:
+            rank = highestBit(quadsBitField)
             # Highest remaining card is our kicker
-            kickerRank = bitfield.filterBits(rank).highestSet()
-            return PokerRank.quads(rank, [kickerRank])
+            kickerRank = highestBit(bitfield & ~(1 << rank))
+            return PokerRank.fromRanks(PokerRank.QUADS, rank, 0, [kickerRank])
             
         # Check for full house
-        if ((tripsBitField > 0) & (pairsBitField > 0)):
-            return PokerRank.fullHouse(tripsBitField.highestSet(),
-                                       pairsBitField.highestSet())
+        if tripsBitField and pairsBitField:
+            return PokerRank.fromRanks(PokerRank.FULL_HOUSE,
+                                       highestBit(tripsBitField),
+                                       highestBit(pairsBitField))
 
         # Check for flush
         flushBitField = None
         for suit in Suit.suits:
-            if suitedBitFields[suit].setCount() >= 5:
+            if popCount(suitedBitFields[suit]) >= 5:
                 if ((flushBitField is None) or
                     (suitedBitFields[suit] > flushBitField)):
                     flushBitField = suitedBitFields[suit]
         if flushBitField:
-            rank = flushBitField.highestSet()
-            kickers = flushBitField.filterBits(rank).highestNSet(4)
-            return PokerRank.flush(rank, kickers)
+            rank = highestBit(flushBitField)
+            kickers = highestNBits(flushBitField & ~(1 << rank), 4)
+            return PokerRank.fromRanks(PokerRank.FLUSH, rank, 0, kickers)
 
         # Check for straight
         # We don't care about suit anymore so can just operate on bitfield
         rank = cls._hasStraight(bitfield)
         if rank:
-            return PokerRank.straight(rank)
+            return PokerRank.fromRanks(PokerRank.STRAIGHT, rank)
 
         # Check for trips
-        if (tripsBitField > 0):
-            rank = tripsBitField.highestSet()
-            kickers = bitfield.filterBits(rank).highestNSet(2)
-            kickers = bitfield.highestNSet(2)
-            return PokerRank.trips(rank, kickers)
+        if tripsBitField:
+            rank = highestBit(tripsBitField)
+            kickers = highestNBits(bitfield & ~(1 << rank), 2)
+            kickers = highestNBits(bitfield, 2)
+            return PokerRank.fromRanks(PokerRank.TRIPS, rank, 0, kickers)
 
         # Check for two pair
-        if (pairsBitField.setCount() > 1):
-            ranks = pairsBitField.highestNSet(2)
-            kickers = bitfield.filterBits(ranks[0], ranks[1])
-            kicker = kickers.highestSet()
-            return PokerRank.twoPair(ranks[0], ranks[1], [kicker])
+        if popCount(pairsBitField) > 1:
+            ranks = highestNBits(pairsBitField, 2)
+            kickers = bitfield & ~((1 << ranks[0]) | (1 << ranks[1]))
+            kicker = highestBit(kickers)
+            return PokerRank.fromRanks(PokerRank.TWO_PAIR,
+                                       ranks[0], ranks[1], [kicker])
 
         # Check for pair
-        if (pairsBitField > 0):
-            rank = pairsBitField.highestSet()
-            kickers = bitfield.filterBits(rank).highestNSet(3)
-            return PokerRank.pair(rank, kickers)
+        if pairsBitField:
+            rank = highestBit(pairsBitField)
+            kickers = highestNBits(bitfield & ~(1 << rank), 3)
+            return PokerRank.fromRanks(PokerRank.PAIR, rank, 0, kickers)
 
         # High card
-        highCard = bitfield.highestSet()
-        kickers = bitfield.filterBits(highCard).highestNSet(4)
-        return PokerRank.highCard(highCard, kickers)
+        highCard = highestBit(bitfield)
+        kickers = highestNBits(bitfield & ~(1 << highCard), 4)
+        return PokerRank.fromRanks(PokerRank.HIGH_CARD,
+                                   highCard, 0, kickers)
 
     @classmethod
     def _rankFiveCardHand(cls, cards):
@@ -242,12 +301,14 @@ class Ranker(RankerBase):
 	straightRank = cls._isStraight(cards)
 	# Do we have a straight flush?
 	if (straightRank and isFlush):
-	    return PokerRank.straightFlush(straightRank)
+	    return PokerRank.fromRanks(PokerRank.STRAIGHT_FLUSH, straightRank)
 	# Check for four of a kind
 	if (cards[0].rank == cards[1].rank == cards[2].rank == cards[3].rank):
-	    return PokerRank.quads(cards[0].rank, cards[4:])
+	    return PokerRank.fromRanks(PokerRank.QUADS, cards[0].rank, 0,
+				       [cards[4].rank])
 	if (cards[1].rank == cards[2].rank == cards[3].rank == cards[4].rank):
-	    return PokerRank.quads(cards[1].rank, cards[0:1])
+	    return PokerRank.fromRanks(PokerRank.QUADS, cards[1].rank, 0,
+				       [cards[0].rank])
 	# Check for full house
 	#   -First two and last two cards must match each other
 	#   -Then middle card either matches first two cards
@@ -256,16 +317,19 @@ class Ranker(RankerBase):
 	    (cards[3].rank == cards[4].rank)):
 	    if (cards[2].rank == cards[0].rank):
 		# XXXYY
-		return PokerRank.fullHouse(cards[0].rank, cards[3].rank)
+		return PokerRank.fromRanks(PokerRank.FULL_HOUSE,
+					   cards[0].rank, cards[3].rank)
 	    elif (cards[2].rank == cards[3].rank):
 		# XXYYY
-		return PokerRank.fullHouse(cards[2].rank, cards[0].rank)
+		return PokerRank.fromRanks(PokerRank.FULL_HOUSE,
+					   cards[2].rank, cards[0].rank)
 	# Check for flush, which we've already done
 	if isFlush:
-	    return PokerRank.flush(cards[0].rank, cards[1:])
+	    return PokerRank.fromRanks(PokerRank.FLUSH, cards[0].rank, 0,
+				       [card.rank for card in cards[1:]])
 	# Check for Straight, which we've already done
 	if straightRank:
-	    return PokerRank.straight(straightRank)
+	    return PokerRank.fromRanks(PokerRank.STRAIGHT, straightRank)
 	# Check for trips
 	if ((cards[0].rank == cards[1].rank == cards[2].rank) or
 	    (cards[1].rank == cards[2].rank == cards[3].rank) or
@@ -273,17 +337,24 @@ class Ranker(RankerBase):
 	    # cards[2] will always be one of the trips
 	    primaryRank = cards[2].rank
 	    cards.removeRank(primaryRank)
-	    return PokerRank.trips(primaryRank, cards)
+	    return PokerRank.fromRanks(PokerRank.TRIPS, primaryRank, 0,
+				       [card.rank for card in cards])
 	# Check for two pair	    
 	# At this point we know we don't have trips, so can optimize some
 	if (cards[0].rank == cards[1].rank):
 	    if (cards[2].rank == cards[3].rank):
-		return PokerRank.twoPair(cards[0].rank, cards[2].rank, cards[4:])
+		return PokerRank.fromRanks(PokerRank.TWO_PAIR,
+					   cards[0].rank, cards[2].rank,
+					   [cards[4].rank])
 	    if (cards[3].rank == cards[4].rank):
-		return PokerRank.twoPair(cards[0].rank, cards[3].rank, cards[2:3])
+		return PokerRank.fromRanks(PokerRank.TWO_PAIR,
+					   cards[0].rank, cards[3].rank,
+					   [cards[2].rank])
 	elif ((cards[1].rank == cards[2].rank) and
 	      (cards[3].rank == cards[4].rank)):
-	    return PokerRank.twoPair(cards[1].rank, cards[3].rank, cards[0:1])
+	    return PokerRank.fromRanks(PokerRank.TWO_PAIR,
+				       cards[1].rank, cards[3].rank,
+				       [cards[0].rank])
 	# Check for a pair
 	# At this point we know we don't have two pair or trips
 	foundPair = False
@@ -294,6 +365,8 @@ class Ranker(RankerBase):
 	if foundPair:
 	    pairRank = cards[index].rank
 	    del cards[index:index+2]
-	    return PokerRank.pair(pairRank, cards)
+	    return PokerRank.fromRanks(PokerRank.PAIR, pairRank, 0,
+				       [card.rank for card in cards])
 	# Just a high card
-	return PokerRank.highCard(cards[0].rank, cards[1:])
+	return PokerRank.fromRanks(PokerRank.HIGH_CARD, cards[0].rank, 0,
+				   [card.rank for card in cards[1:]])
@@ -0,0 +1,312 @@
+"""Write per-game simulation results to disk for offline analysis
+
+A writer from open_writer() passed as the output argument of
+Simulator.simulate_games() records every game simulated as a row with
+the following columns:
+
+game_number - number of game if games were seeded, else -1
+hands - card codes (see Card.code) of each hand, (hands, cards) per row
+board - card codes of board (absent for games without a board)
+winning_high_rank - value of winning high PokerRank, 0 if none
+winning_low_rank - value of winning low PokerRank, 0 if none
+high_winners - bitmask of indexes of hands winning high
+low_winners - bitmask of indexes of hands winning low
+
+Rows are buffered and written buffer_size at a time. Two formats are
+supported: Parquet, if the pyarrow module is available, and otherwise
+a fixed-width binary format, a header followed by rows laid out as
+numpy's packed structured array of row_dtype(), which read_results() maps
+into memory. Writing the fixed-width format needs neither module.
+Missing cards are given as NO_CARD."""
+
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from BatchRanker import BatchRanker
+
+FORMAT_FIXED = "fixed"
+FORMAT_PARQUET = "parquet"
+
+# First bytes of a file in the fixed-width format
+MAGIC = "pyPokRF1"
+
+# Magic, number of hands, cards per hand and cards in board
+HEADER = struct.Struct("<8sBBB")
+
+# Card code for missing cards
+NO_CARD = 0xff
+
+# Default number of rows buffered between writes
+DEFAULT_BUFFER_SIZE = 10000
+
+def row_dtype(number_of_hands, hand_cards, board_cards):
+    """Return numpy dtype of a row with the given dimensions."""
+    fields = [("game_number", "<i8"),
+              ("hands", "u1", (number_of_hands, hand_cards))]
+    if board_cards > 0:
+        fields.append(("board", "u1", (board_cards,)))
+    fields.extend([("winning_high_rank", "<u4"),
+                   ("winning_low_rank", "<u4"),
+                   ("high_winners", "<u8"),
+                   ("low_winners", "<u8")])
+    return numpy.dtype(fields)
+
+def read_results(filename):
+    """Return numpy structured array of the rows in given file.
+
+    Fixed-width files are mapped into memory rather than read.
+    Requires numpy, and pyarrow for Parquet files."""
+    if numpy is None:
+        raise ImportError("read_results() requires the numpy module")
+    with open(filename, "rb") as f:
+        header = f.read(HEADER.size)
+    if header[:len(MAGIC)] != MAGIC:
+        return _read_parquet(filename)
+    magic, number_of_hands, hand_cards, board_cards = HEADER.unpack(header)
+    return numpy.memmap(filename, mode="r", offset=HEADER.size,
+                        dtype=row_dtype(number_of_hands, hand_cards,
+                                        board_cards))
+
+def _read_parquet(filename):
+    """Return numpy structured array of rows in Parquet file."""
+    if pyarrow is None:
+        raise ImportError("Reading Parquet requires the pyarrow module")
+    parquet_file = pyarrow.parquet.ParquetFile(filename)
+    metadata = parquet_file.schema.to_arrow_schema().metadata
+    number_of_hands = int(metadata["number_of_hands"])
+    hand_cards = int(metadata["hand_cards"])
+    board_cards = int(metadata["board_cards"])
+    table = parquet_file.read()
+    rows = numpy.zeros(table.num_rows,
+                       dtype=row_dtype(number_of_hands, hand_cards,
+                                       board_cards))
+    for name in rows.dtype.names:
+        column = table.column(name).to_pylist()
+        if name in ("hands", "board"):
+            column = numpy.frombuffer("".join(column), dtype="u1")
+            column = column.reshape(rows[name].shape)
+        rows[name] = column
+    return rows
+
+######################################################################
+
+def open_writer(filename, simulator, format=None,
+                buffer_size=DEFAULT_BUFFER_SIZE):
+    """Return writer of games simulated by simulator to given file.
+
+    format is FORMAT_PARQUET or FORMAT_FIXED. If None, Parquet is used
+    if pyarrow is available."""
+    if format is None:
+        if pyarrow is None:
+            format = FORMAT_FIXED
+        else:
+            format = FORMAT_PARQUET
+    if format == FORMAT_PARQUET:
+        WriterClass = ParquetResultWriter
+    elif format == FORMAT_FIXED:
+        WriterClass = FixedResultWriter
+    else:
+        raise ValueError("Unknown format \"%s\"" % format)
+    board_cards = 0
+    if simulator.board is not None:
+        board_cards = simulator.board.maxCards
+    return WriterClass(filename, simulator.number_of_hands,
+                       simulator.HandClass.maxCards, board_cards,
+                       buffer_size=buffer_size)
+
+######################################################################
+
+class _ResultWriter(object):
+    """Buffering and conversion of results shared by FixedResultWriter
+    and ParquetResultWriter, which write rows with _write_rows() and
+    _write_array()."""
+
+    def __init__(self, filename, number_of_hands, hand_cards,
+                 board_cards=0, buffer_size=DEFAULT_BUFFER_SIZE):
+        """Create writer to given file for games with number_of_hands
+        hands of hand_cards cards and a board of board_cards cards."""
+        self.filename = filename
+        self.number_of_hands = number_of_hands
+        self.hand_cards = hand_cards
+        self.board_cards = board_cards
+        self.buffer_size = buffer_size
+        self.rows_written = 0
+        self._rows = []
+
+    def write(self, result):
+        """Buffer row for given Result."""
+        hands = "".join([self._codes(hand, self.hand_cards)
+                         for hand in result.hands])
+        board = self._codes(result.board, self.board_cards)
+        game_number = result.game_number
+        if game_number is None:
+            game_number = -1
+        self._rows.append((game_number, hands, board,
+                           result.winning_high_rank or 0,
+                           result.winning_low_rank or 0,
+                           self._winners_mask(result.high_winners),
+                           self._winners_mask(result.low_winners)))
+        if len(self._rows) >= self.buffer_size:
+            self.flush()
+
+    def write_batch(self, codes, high_ranks, low_ranks):
+        """Write rows for a batch of games from
+        Simulator._simulate_games_in_batches().
+
+        codes is the (games, hands, cards) array of card codes of each
+        hand followed by the board and high_ranks and low_ranks
+        (games, hands) arrays of rank values or None. Requires numpy."""
+        self.flush()
+        size = codes.shape[0]
+        rows = numpy.zeros(size, dtype=row_dtype(self.number_of_hands,
+                                                 self.hand_cards,
+                                                 self.board_cards))
+        rows["game_number"] = -1
+        rows["hands"] = NO_CARD
+        hole_cards = codes.shape[2] - self.board_cards
+        rows["hands"][:, :, :hole_cards] = codes[:, :, :hole_cards]
+        if self.board_cards > 0:
+            rows["board"] = codes[:, 0, hole_cards:]
+        bits = numpy.left_shift(numpy.uint64(1),
+                                numpy.arange(self.number_of_hands,
+                                             dtype=numpy.uint64))
+        if high_ranks is not None:
+            best = high_ranks.max(axis=1)
+            rows["winning_high_rank"] = best
+            winners = high_ranks == best[:, numpy.newaxis]
+            rows["high_winners"] = (winners * bits).sum(axis=1)
+        if low_ranks is not None:
+            qualified = low_ranks != BatchRanker.NO_RANK
+            low_ranks = numpy.where(qualified, low_ranks,
+                                    numpy.iinfo(low_ranks.dtype).max)
+            best = low_ranks.min(axis=1)
+            rows["winning_low_rank"] = numpy.where(qualified.any(axis=1),
+                                                   best, 0)
+            winners = (low_ranks == best[:, numpy.newaxis]) & qualified
+            rows["low_winners"] = (winners * bits).sum(axis=1)
+        self._write_array(rows)
+        self.rows_written += size
+
+    def flush(self):
+        """Write any buffered rows."""
+        if self._rows:
+            self._write_rows(self._rows)
+            self.rows_written += len(self._rows)
+            self._rows = []
+
+    def close(self):
+        """Write any buffered rows and close file."""
+        self.flush()
+
+    @staticmethod
+    def _codes(cards, number_of_cards):
+        """Return string of codes of cards padded to number_of_cards."""
+        codes = []
+        if cards is not None:
+            codes = [chr(card.code) for card in cards]
+        return "".join(codes) + chr(NO_CARD) * (number_of_cards - len(codes))
+
+    @staticmethod
+    def _winners_mask(winners):
+        """Return bitmask of list of indexes."""
+        mask = 0
+        for index in winners or []:
+            mask |= 1 << index
+        return mask
+
+######################################################################
+
+class FixedResultWriter(_ResultWriter):
+    """Write results in the fixed-width format."""
+
+    def __init__(self, filename, number_of_hands, hand_cards,
+                 board_cards=0, buffer_size=DEFAULT_BUFFER_SIZE):
+        _ResultWriter.__init__(self, filename, number_of_hands, hand_cards,
+                              board_cards, buffer_size)
+        self._row = struct.Struct("<q%ds%dsIIQQ" %
+                                  (number_of_hands * hand_cards,
+                                   board_cards))
+        self._file = open(filename, "wb")
+        self._file.write(HEADER.pack(MAGIC, number_of_hands, hand_cards,
+                                     board_cards))
+
+    def close(self):
+        """Write any buffered rows and close file."""
+        _ResultWriter.close(self)
+        self._file.close()
+
+    def _write_rows(self, rows):
+        pack = self._row.pack
+        self._file.write("".join([pack(*row) for row in rows]))
+
+    def _write_array(self, rows):
+        self._file.write(rows.tostring())
+
+######################################################################
+
+class ParquetResultWriter(_ResultWriter):
+    """Write results as Parquet with pyarrow.
+
+    hands and board are fixed size binary columns of card codes and
+    the dimensions are kept in the schema metadata."""
+
+    def __init__(self, filename, number_of_hands, hand_cards,
+                 board_cards=0, buffer_size=DEFAULT_BUFFER_SIZE):
+        if pyarrow is None:
+            raise ImportError("Writing Parquet requires the pyarrow module")
+        _ResultWriter.__init__(self, filename, number_of_hands, hand_cards,
+                              board_cards, buffer_size)
+        fields = [pyarrow.field("game_number", pyarrow.int64()),
+                  pyarrow.field("hands", pyarrow.binary(number_of_hands *
+                                                        hand_cards))]
+        if board_cards > 0:
+            fields.append(pyarrow.field("board",
+                                        pyarrow.binary(board_cards)))
+        fields.extend([pyarrow.field("winning_high_rank", pyarrow.uint32()),
+                       pyarrow.field("winning_low_rank", pyarrow.uint32()),
+                       pyarrow.field("high_winners", pyarrow.uint64()),
+                       pyarrow.field("low_winners", pyarrow.uint64())])
+        self._schema = pyarrow.schema(fields).with_metadata({
+                "number_of_hands" : str(number_of_hands),
+                "hand_cards" : str(hand_cards),
+                "board_cards" : str(board_cards),
+                })
+        self._writer = pyarrow.parquet.ParquetWriter(filename, self._schema)
+
+    def close(self):
+        """Write any buffered rows and close file."""
+        _ResultWriter.close(self)
+        self._writer.close()
+
+    def _write_rows(self, rows):
+        columns = zip(*rows)
+        if self.board_cards == 0:
+            # Drop empty board column
+            del columns[2]
+        self._write_columns([list(column) for column in columns])
+
+    def _write_array(self, rows):
+        columns = []
+        for name in self._schema.names:
+            column = rows[name]
+            if name in ("hands", "board"):
+                column = [row.tostring()
+                          for row in column.reshape(len(rows), -1)]
+            columns.append(column)
+        self._write_columns(columns)
+
+    def _write_columns(self, columns):
+        arrays = [pyarrow.array(column, type=field.type)
+                  for column, field in zip(columns, self._schema)]
+        table = pyarrow.Table.from_arrays(arrays, schema=self._schema)
+        self._writer.write_table(table)
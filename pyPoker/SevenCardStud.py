@@ -18,7 +18,8 @@ class Simulator(PokerGame.Simulator):
     def __init__(self,
                  number_of_hands=7,
                  predefined_hands=None,
-                 predefined_board=None):
+                 predefined_board=None,
+                 rng=None):
         """Initialize simulation.
 
         number_of_hands is number of hands total to simulate.
@@ -29,11 +30,15 @@ class Simulator(PokerGame.Simulator):
 
         predefined_board should be a predefined set of community cards.
         Setting this for a HandClass that doesn't support a board will
-        raise an error."""
+        raise an error.
+
+        rng is the random number generator to use (see
+        PokerGame.Simulator)."""
         PokerGame.Simulator.__init__(self,
                                      number_of_hands=number_of_hands,
                                      predefined_hands=predefined_hands,
-                                     predefined_board=predefined_board)
+                                     predefined_board=predefined_board,
+                                     rng=rng)
 
 class HiLoSimulator(PokerGame.Simulator):
     """Seven-card Stud HiLo Simulator"""
@@ -44,7 +49,8 @@ class HiLoSimulator(PokerGame.Simulator):
     def __init__(self,
                  number_of_hands=7,
                  predefined_hands=None,
-                 predefined_board=None):
+                 predefined_board=None,
+                 rng=None):
         """Initialize simulation.
 
         number_of_hands is number of hands total to simulate.
@@ -55,9 +61,13 @@ class HiLoSimulator(PokerGame.Simulator):
 
         predefined_board should be a predefined set of community cards.
         Setting this for a HandClass that doesn't support a board will
-        raise an error."""
+        raise an error.
+
+        rng is the random number generator to use (see
+        PokerGame.Simulator)."""
         PokerGame.Simulator.__init__(self,
                                      number_of_hands=number_of_hands,
                                      predefined_hands=predefined_hands,
-                                     predefined_board=predefined_board)
+                                     predefined_board=predefined_board,
+                                     rng=rng)
 
@@ -0,0 +1,229 @@
+"""Class for precomputed hold'em starting hand equities"""
+
+import mmap
+import os
+import struct
+
+from Cards import Card, Rank, Suit
+from Hands import Hands
+
+class StartingHandTable(object):
+    """Preflop equities of the 169 classes of hold'em starting hands.
+
+    Starting hands are reduced to classes by rank and suitedness (e.g.
+    AKs, AKo and AA). The table holds the heads-up equity of every
+    class against every other, averaged over all combinations of cards
+    from each (see HandRange), and the equity of every class against 1
+    to maxPlayers-1 random hands.
+
+    Tables are computed by generate(), which takes a long time, and
+    saved to a compact binary file with save() which load() maps into
+    memory, so loading it takes milliseconds regardless of its size.
+
+    The file holds a header, then the heads-up equities as a 169x169
+    matrix of little-endian unsigned 16-bit integers (equity of row
+    class against column class, times EQUITY_SCALE) and then, the same
+    way, a 169x(maxPlayers-1) matrix of equities against random hands
+    for 2 to maxPlayers players."""
+
+    # First bytes of a table file
+    MAGIC = "pyPokPF1"
+
+    # Magic, number of classes, maximum number of players and number of
+    # games simulated per equity
+    _header = struct.Struct("<8sHHI")
+
+    # Equities are stored as integers from 0 to EQUITY_SCALE, which is
+    # even so an equity of one half is exact
+    EQUITY_SCALE = 0xfffe
+    _equity = struct.Struct("<H")
+
+    NUM_CLASSES = 169
+
+    # File used by load() if none is given
+    DEFAULT_FILENAME = os.path.join(os.path.dirname(__file__),
+                                    "preflop-equity.dat")
+
+    def __init__(self, data):
+        """Create table from data in the file format (e.g. from an mmap).
+
+        Use load() or generate() instead of calling this directly."""
+        if len(data) < self._header.size:
+            raise ValueError("Starting hand table too short")
+        (magic, numClasses, self.maxPlayers,
+         self.number_of_games) = self._header.unpack_from(data)
+        if magic != self.MAGIC:
+            raise ValueError("Not a starting hand table")
+        if numClasses != self.NUM_CLASSES:
+            raise ValueError("Bad number of starting hand classes (%d)" %
+                             numClasses)
+        self._headsUpOffset = self._header.size
+        self._multiwayOffset = self._headsUpOffset + \
+            self._equity.size * numClasses * numClasses
+        size = self._multiwayOffset + \
+            self._equity.size * numClasses * (self.maxPlayers - 1)
+        if len(data) != size:
+            raise ValueError("Starting hand table has wrong size (%d != %d)" %
+                             (len(data), size))
+        self._data = data
+
+    @classmethod
+    def load(cls, filename=None):
+        """Map table in given file (default DEFAULT_FILENAME) into memory."""
+        if filename is None:
+            filename = cls.DEFAULT_FILENAME
+        with open(filename, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(data)
+
+    @classmethod
+    def generate(cls, number_of_games=1000, maxPlayers=10,
+                 seed=None, jobs=1, progress=None):
+        """Compute a new table by simulating number_of_games games for
+        every heads-up matchup and every number of players.
+
+        seed and jobs are passed to Simulator.simulate_games(). If
+        progress is not None it is called with the number of equities
+        computed and the total after each one."""
+        headsUp = [[None] * cls.NUM_CLASSES
+                   for index in range(cls.NUM_CLASSES)]
+        multiway = [[None] * (maxPlayers - 1)
+                    for index in range(cls.NUM_CLASSES)]
+        total = cls.NUM_CLASSES * (cls.NUM_CLASSES - 1) / 2 + \
+            cls.NUM_CLASSES * (maxPlayers - 1)
+        done = 0
+        for index in range(cls.NUM_CLASSES):
+            # Two hands of the same class have equal equity
+            headsUp[index][index] = 0.5
+            for other in range(index + 1, cls.NUM_CLASSES):
+                equity = cls.simulateEquity([index, other], 2,
+                                            number_of_games, seed, jobs)
+                headsUp[index][other] = equity
+                headsUp[other][index] = 1.0 - equity
+                done += 1
+                if progress is not None:
+                    progress(done, total)
+            for players in range(2, maxPlayers + 1):
+                multiway[index][players - 2] = cls.simulateEquity(
+                    [index], players, number_of_games, seed, jobs)
+                done += 1
+                if progress is not None:
+                    progress(done, total)
+        return cls.fromEquities(headsUp, multiway, number_of_games)
+
+    @classmethod
+    def fromEquities(cls, headsUp, multiway, number_of_games=0):
+        """Create table from matrices of equities.
+
+        headsUp is indexed by two class indexes (see classIndex()) and
+        multiway by class index and number of players minus two."""
+        maxPlayers = len(multiway[0]) + 1
+        data = bytearray(cls._header.pack(cls.MAGIC, cls.NUM_CLASSES,
+                                          maxPlayers, number_of_games))
+        for row in list(headsUp) + list(multiway):
+            for equity in row:
+                data += cls._equity.pack(
+                    int(round(equity * cls.EQUITY_SCALE)))
+        return cls(str(data))
+
+    @classmethod
+    def simulateEquity(cls, indexes, players, number_of_games,
+                       seed=None, jobs=1):
+        """Return equity of first of given classes against the others and
+        random hands, with players hands in total."""
+        # Avoid circular import, HoldEm uses this module
+        import HoldEm
+        hands = Hands([cls.classRange(index) for index in indexes])
+        simulator = HoldEm.Simulator(number_of_hands=players,
+                                     predefined_hands=hands)
+        stats = simulator.simulate_games(number_of_games=number_of_games,
+                                         seed=seed, jobs=jobs)
+        return stats.get_equities()[0]
+
+    def save(self, filename):
+        """Write table to given file."""
+        with open(filename, "wb") as f:
+            f.write(self._data[:])
+
+    def close(self):
+        """Release memory mapping, if any."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def getHeadsUpEquity(self, hand, otherHand):
+        """Return equity of hand against otherHand, both given as Cards
+        or class indexes, averaged over all cards of their classes."""
+        offset = self._headsUpOffset + self._equity.size * \
+            (self._index(hand) * self.NUM_CLASSES + self._index(otherHand))
+        return self._getEquity(offset)
+
+    def getEquity(self, hand, players=2):
+        """Return equity of hand (Cards or class index) against
+        players-1 random hands."""
+        if (players < 2) or (players > self.maxPlayers):
+            raise ValueError("Number of players (%d) out of range" % players)
+        offset = self._multiwayOffset + self._equity.size * \
+            (self._index(hand) * (self.maxPlayers - 1) + players - 2)
+        return self._getEquity(offset)
+
+    def _getEquity(self, offset):
+        """Return equity stored at offset in data."""
+        return float(self._equity.unpack_from(self._data, offset)[0]) / \
+            self.EQUITY_SCALE
+
+    @classmethod
+    def _index(cls, hand):
+        """Return class index of hand, which may already be an index."""
+        if isinstance(hand, (int, long)):
+            return hand
+        return cls.classIndex(hand)
+
+    @staticmethod
+    def classIndex(cards):
+        """Return index from 0 to 168 of the class of two hole cards.
+
+        Classes are laid out as the usual 13x13 grid, aces first, with
+        pairs on the diagonal, suited hands above it and offsuit hands
+        below it."""
+        rank1, rank2 = cards[0].rank, cards[1].rank
+        if rank1 < rank2:
+            rank1, rank2 = rank2, rank1
+        row, column = Rank.ACE - rank1, Rank.ACE - rank2
+        if cards[0].suit != cards[1].suit:
+            row, column = column, row
+        return row * len(Rank.ranks) + column
+
+    @staticmethod
+    def _classRanks(index):
+        """Return high rank, low rank and whether class is suited."""
+        row, column = divmod(index, len(Rank.ranks))
+        suited = row < column
+        if row > column:
+            row, column = column, row
+        return Rank.ACE - row, Rank.ACE - column, suited
+
+    @classmethod
+    def className(cls, index):
+        """Return name of class with given index (e.g. "AKs")."""
+        high, low, suited = cls._classRanks(index)
+        name = str(Rank(high)) + str(Rank(low))
+        if high == low:
+            return name
+        return name + ("s" if suited else "o")
+
+    @classmethod
+    def classRange(cls, index):
+        """Return HandRange of all hands in class with given index."""
+        # Avoid circular import, HoldEm uses this module
+        import HoldEm
+        high, low, suited = cls._classRanks(index)
+        handRange = HoldEm.HandRange()
+        for suit1 in Suit.suits:
+            for suit2 in Suit.suits:
+                if (high == low) and (suit1 >= suit2):
+                    continue
+                if suited != (suit1 == suit2):
+                    continue
+                handRange.addHand([Card((high, suit1)), Card((low, suit2))])
+        handRange.setName(cls.className(index))
+        return handRange
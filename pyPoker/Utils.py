@@ -2,6 +2,8 @@
 
 import collections
 import itertools
+import math
+import random
 import sys
 
 def assertInstance(obj, cls):
@@ -52,6 +54,48 @@ def combinations(set, n):
         for comb in itertools.combinations(set, n):
             yield set.__class__(comb)
 
+def random_stream(seed, stream=0, cls=random.Random):
+    """Return a random number generator for the given seed and stream.
+
+    Streams with different numbers are seeded independently, so work can
+    be split between processes (or individual games replayed) by giving
+    each piece its own stream number. seed and stream must be
+    non-negative integers, stream less than 2**64.
+
+    cls is the generator class to instantiate. It is passed a single
+    integer seed and must provide the methods of random.Random used by
+    pyPoker: random(), randint(), choice() and shuffle()."""
+    if (stream < 0) or (stream >= 1 << 64):
+        raise ValueError("Stream out of range: %d" % stream)
+    return cls((seed << 64) | stream)
+
+def get_rng(rng):
+    """Return rng, or the random module if rng is None.
+
+    Used by classes accepting an optional random number generator so
+    they fall back to the shared global generator."""
+    if rng is None:
+        return random
+    return rng
+
+def z_score(confidence):
+    """Return z such that a normally distributed value lies within z
+    standard deviations of its mean with the given probability.
+
+    e.g. z_score(0.95) is about 1.96."""
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence must be between 0 and 1: %s" %
+                         confidence)
+    # Bisect on the normal CDF, math has erf() but no inverse
+    low, high = 0.0, 40.0
+    for i in range(100):
+        z = (low + high) / 2
+        if math.erf(z / math.sqrt(2)) < confidence:
+            low = z
+        else:
+            high = z
+    return high
+
 class UserSelection(object):
     """Present a user with a menu of options, each selectable with a single
     keystroke. Get and return the user's selection."""
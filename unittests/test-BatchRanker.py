@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""Unittests for BatchRanker module"""
+
+import random
+
+from pyPoker.Cards import Cards
+from pyPoker.Deck import Deck
+from pyPoker import SevenCardStud
+from pyPoker.LookupRanker import LookupRanker
+from pyPoker.LowRanker import LowRanker, EightLowRanker
+from pyPoker.PokerRank import PokerRank
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from pyPoker.BatchRanker import BatchRanker
+
+@unittest.skipIf(numpy is None, "numpy not available")
+class TestSequenceFunctions(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(42)
+        deck = Deck()
+        self.hands = dict((numCards,
+                           [Cards(rng.sample(deck, numCards))
+                            for trial in range(500)])
+                          for numCards in [5, 6, 7])
+
+    def testRankCodes(self):
+        """Test rankCodes() matches LookupRanker."""
+        for numCards, hands in self.hands.items():
+            codes = BatchRanker.codesFromCards(hands)
+            self.assertEqual(codes.shape, (len(hands), numCards))
+            ranks = BatchRanker.rankCodes(codes)
+            self.assertEqual(len(ranks), len(hands))
+            for cards, rank in zip(hands, ranks):
+                expectedRank = LookupRanker._rankCards(cards)
+                self.assertEqual(rank, expectedRank,
+                                 "%s: %s != %s" % (cards, rank, expectedRank))
+
+    def testFlushes(self):
+        """Test rankCodes() with flushes."""
+        hands = [Cards.fromString(s) for s in [
+                "AS KS QS JS TS 2C 2D",
+                "5H 4H 3H 2H AH AC AD",
+                "KD 9D 7D 4D 2D AC AH",
+                "KD 9D 7D 4D 2D 3D QC",
+                "KD KH KC 4D 2D 3C QC",
+                ]]
+        ranks = BatchRanker.rankCodes(BatchRanker.codesFromCards(hands))
+        self.assertEqual(ranks[0] >> PokerRank.TYPE_OFFSET,
+                         PokerRank.STRAIGHT_FLUSH)
+        self.assertEqual(ranks[1] >> PokerRank.TYPE_OFFSET,
+                         PokerRank.STRAIGHT_FLUSH)
+        self.assertEqual(ranks[2] >> PokerRank.TYPE_OFFSET, PokerRank.FLUSH)
+        self.assertEqual(ranks[3] >> PokerRank.TYPE_OFFSET, PokerRank.FLUSH)
+        self.assertEqual(ranks[4] >> PokerRank.TYPE_OFFSET,
+                         PokerRank.THREE_OF_A_KIND)
+
+    def testRankLowCodes(self):
+        """Test rankLowCodes() and rankEightLowCodes() match LowRanker."""
+        for numCards, hands in self.hands.items():
+            codes = BatchRanker.codesFromCards(hands)
+            lowRanks = BatchRanker.rankLowCodes(codes)
+            eightLowRanks = BatchRanker.rankEightLowCodes(codes)
+            for cards, lowRank, eightLowRank in zip(hands, lowRanks,
+                                                   eightLowRanks):
+                expectedRank = LowRanker.rankHand(SevenCardStud.Hand(cards))
+                self.assertEqual(lowRank, expectedRank,
+                                 "%s: %s != %s" % (cards, lowRank,
+                                                   expectedRank))
+                expectedRank = EightLowRanker.rankHand(SevenCardStud.Hand(cards))
+                if expectedRank is None:
+                    self.assertEqual(eightLowRank, BatchRanker.NO_RANK)
+                else:
+                    self.assertEqual(eightLowRank, expectedRank,
+                                     "%s: %s != %s" % (cards, eightLowRank,
+                                                       expectedRank))
+
+    def testBadCodes(self):
+        """Test bad arrays of codes."""
+        self.assertRaises(ValueError, BatchRanker.rankCodes,
+                          numpy.zeros((10, 4), dtype=numpy.uint8))
+        self.assertRaises(ValueError, BatchRanker.rankCodes,
+                          numpy.zeros((10, 8), dtype=numpy.uint8))
+        self.assertRaises(ValueError, BatchRanker.rankCodes,
+                          numpy.zeros(10, dtype=numpy.uint8))
+        self.assertRaises(ValueError, BatchRanker.rankLowCodes,
+                          numpy.array([[0, 1, 2, 3, 52]], dtype=numpy.uint8))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 """Unit tests for BitField module."""
 
-from pyPoker.BitField import BitField
+from pyPoker.BitField import BitField, highestBit, highestNBits, popCount
 import unittest
 
 class TestBitField(unittest.TestCase):
@@ -191,5 +191,18 @@ class TestBitField(unittest.TestCase):
         expectedValue = self.fullMask.toInt() - 255
         self.assertEqual(value, expectedValue, "Value is %s != %s" % (value, expectedValue))
 
+    def testIntHelpers(self):
+        """Test popCount(), highestBit() and highestNBits() on plain ints."""
+        for value in [1, 6, 96, 167, 255, 0x7ffe, 1 << 15, (1 << 40) | 5]:
+            bitfield = BitField(value)
+            self.assertEqual(popCount(value), bitfield.setCount())
+            self.assertEqual(highestBit(value), bitfield.highestSet())
+            for n in range(4):
+                self.assertListEqual(highestNBits(value, n),
+                                     bitfield.highestNSet(n))
+        self.assertEqual(popCount(0), 0)
+        self.assertListEqual(highestNBits(0, 2), [])
+        self.assertListEqual(highestNBits((1 << 40) | 5, 3), [40, 2, 0])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""Unittests for Canonicalizer module"""
+
+from pyPoker.Canonicalizer import Canonicalizer
+from pyPoker.Cards import Card, Cards
+from pyPoker.Hand import Board
+from pyPoker import HoldEm
+
+import testing
+
+class TestSequenceFunctions(testing.TestCase):
+
+    def test_permutations(self):
+        """Test Canonicalizer.permutations"""
+        self.assertEqual(len(Canonicalizer.permutations), 24)
+        self.assertListEqual(Canonicalizer.permutations[0],
+                             range(Card.numCodes))
+        for table in Canonicalizer.permutations:
+            self.assertListEqual(sorted(table), range(Card.numCodes))
+
+    def test_canonicalCards(self):
+        """Test Canonicalizer.canonicalCards()"""
+        form = Canonicalizer.canonicalCards([Cards.fromString("AS KS"),
+                                             Cards.fromString("QS QD")])
+        self.assertEqual(form,
+                         Canonicalizer.canonicalCards(
+                [Cards.fromString("KH AH"), Cards.fromString("QC QH")]))
+        self.assertNotEqual(form,
+                            Canonicalizer.canonicalCards(
+                [Cards.fromString("AS KS"), Cards.fromString("QH QD")]))
+        # Order of sets matters
+        self.assertNotEqual(form,
+                            Canonicalizer.canonicalCards(
+                [Cards.fromString("QS QD"), Cards.fromString("AS KS")]))
+
+    def test_canonicalSituation(self):
+        """Test Canonicalizer.canonicalSituation()"""
+        hands = [HoldEm.Hand.fromString("AS KS"),
+                 HoldEm.Hand.fromString("7D 7C")]
+        form = Canonicalizer.canonicalSituation(
+            hands, Board.fromString("2S 8D JH"))
+        self.assertEqual(form, Canonicalizer.canonicalSituation(
+                [HoldEm.Hand.fromString("AC KC"),
+                 HoldEm.Hand.fromString("7H 7S")],
+                Board.fromString("JD 8H 2C")))
+        self.assertNotEqual(form, Canonicalizer.canonicalSituation(
+                hands, Board.fromString("2S 8D JS")))
+        self.assertNotEqual(form, Canonicalizer.canonicalSituation(hands))
+        # Ranges
+        hg1 = HoldEm.HandGenerator(HoldEm.Hands.fromGroups("AKs"))
+        hg2 = HoldEm.HandGenerator(HoldEm.Hands.fromGroups("AKs"))
+        hg2.hands.reverse()
+        self.assertEqual(
+            Canonicalizer.canonicalSituation([hg1, hands[1]]),
+            Canonicalizer.canonicalSituation([hg2,
+                                              HoldEm.Hand.fromString("7S 7H")]))
+
+    def test_stabilizer(self):
+        """Test Canonicalizer.stabilizer()"""
+        self.assertEqual(len(Canonicalizer.stabilizer([])), 24)
+        tables = Canonicalizer.stabilizer([Cards.fromString("AS AD"),
+                                           Cards.fromString("2C 7C 9C")])
+        # Identity and swapping spades and diamonds
+        self.assertEqual(len(tables), 2)
+        self.assertIs(tables[0], Canonicalizer.permutations[0])
+
+if __name__ == "__main__":
+    testing.main()
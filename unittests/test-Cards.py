@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 """Unittests for Cards module"""
 
-from pyPoker.Cards import Card, Cards, Suit, Rank, BadRankException
+from pyPoker.Cards import Card, Cards, Suit, Rank, BadRankException, cardsMask
 
 import testing
 
@@ -51,20 +51,58 @@ class TestSequenceFunctions(testing.TestCase):
         """Test making Aces high and low."""
         c = Card.fromString("AC")
         self.assertEquals(c.rank, Rank.ACE)
-        c.makeAcesLow()
+        c = c.makeAcesLow()
         self.assertEquals(c.rank, Rank.ACE_LOW)
-        c.makeAcesHigh()
+        c = c.makeAcesHigh()
         self.assertEquals(c.rank, Rank.ACE)
 
     def testAceLowHighNonAce(self):
         """Test making sure makeAcesLow() and makeAcesHigh() have no effect on non-ace"""
         c = Card.fromString("9D")
         self.assertEquals(c.rank, Rank.NINE)
-        c.makeAcesLow()
+        c = c.makeAcesLow()
         self.assertEquals(c.rank, Rank.NINE)
-        c.makeAcesHigh()
+        c = c.makeAcesHigh()
         self.assertEquals(c.rank, Rank.NINE)
 
+    def testFlyweight(self):
+        """Test that each card has one immutable instance."""
+        c = Card.fromString("QH")
+        self.assertIs(c, Card((Rank.QUEEN, Suit.HEARTS)))
+        self.assertIs(c, c.copy())
+        with self.assertRaises(AttributeError):
+            c.rank = Rank(Rank.KING)
+        with self.assertRaises(BadRankException):
+            Card((Rank.ACE + 1, Suit.HEARTS))
+
+    def testCodes(self):
+        """Test integer card codes."""
+        codes = set()
+        for suit in Suit.suits:
+            for rank in Rank.ranks:
+                c = Card((rank, suit))
+                self.assertIs(c, Card.fromCode(c.code))
+                codes.add(c.code)
+        self.assertEqual(codes, set(range(Card.numCodes)))
+        ace = Card.fromString("AS")
+        self.assertEqual(ace.makeAcesLow().code, ace.code)
+        cards = Cards.fromString("7D AH KS")
+        self.assertListEqual(Cards.fromCodes(cards.codes()), cards)
+
+    def testMasks(self):
+        """Test card masks."""
+        cards = Cards.fromString("7D AH KS 2C")
+        mask = cards.getMask()
+        self.assertEqual(mask, cardsMask(cards))
+        for card in cards:
+            self.assertEqual(card.mask, 1 << card.code)
+            self.assertTrue(mask & card.mask)
+        self.assertFalse(mask & Card.fromString("7S").mask)
+        fromMask = Cards.fromMask(mask)
+        self.assertEqual(len(fromMask), 4)
+        self.assertEqual(sorted(fromMask.codes()), sorted(cards.codes()))
+        self.assertEqual(Cards.fromMask(0), [])
+
     def testIsEightOrLower(self):
         """Test IsEightOrLower() method"""
         for rank in range(Rank.ACE_LOW, Rank.NINE):
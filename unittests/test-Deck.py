@@ -1,9 +1,12 @@
 #!/usr/bin/env python
 """Unittests for Deck module"""
 
+import random
+
+from pyPoker.Cards import Card, Cards, cardsMask
 from pyPoker.Hand import Hand
 from pyPoker import HoldEm
-from pyPoker.Deck import Deck
+from pyPoker.Deck import Deck, CardNotFoundException, NotEnoughCardsException
 import unittest
 
 class TestSequenceFunctions(unittest.TestCase):
@@ -44,5 +47,125 @@ class TestSequenceFunctions(unittest.TestCase):
 	for hand in hands:
 	    self.assertEquals(len(hand), 2)
 
+    def testShuffleRng(self):
+	"""Test shuffling with a random number generator."""
+	deck = Deck(rng=random.Random(1))
+	deck.shuffle()
+	deck2 = Deck()
+	deck2.shuffle(random.Random(1))
+	self.assertListEqual(deck, deck2)
+	# Copies should share the generator
+	self.assertIs(deck.copy().rng, deck.rng)
+
+    def testSample(self):
+	"""Test sample() method."""
+	deck = Deck()
+	deck.removeCards(Cards.fromString("AS KS"))
+	excluded = Cards.fromString("QS JS TS")
+	excludeMask = excluded.getMask()
+	seen = 0
+	for trial in range(200):
+	    cards = deck.sample(7, rng=random.Random(trial),
+				excludeMask=excludeMask)
+	    self.assertEqual(len(cards), 7)
+	    mask = cards.getMask()
+	    # No duplicates, all in deck and none excluded
+	    self.assertEqual(len(Cards.fromMask(mask)), 7)
+	    self.assertTrue(deck.maskInDeck(mask))
+	    self.assertFalse(mask & excludeMask)
+	    seen |= mask
+	# Every other card should have been seen
+	self.assertEqual(seen, deck.mask & ~excludeMask)
+	# Deck should be unchanged
+	self.assertEqual(len(deck), 50)
+	# Same generator state gives same cards
+	self.assertListEqual(deck.sample(9, rng=random.Random(1)),
+			     deck.sample(9, rng=random.Random(1)))
+	# Buffer should follow changes to deck
+	deck.removeCards(Cards.fromString("2C"))
+	for trial in range(100):
+	    self.assertTrue(deck.maskInDeck(deck.sample(10).getMask()))
+	self.assertRaises(NotEnoughCardsException, deck.sample, 50)
+	self.assertRaises(NotEnoughCardsException, deck.sample, 47,
+			  excludeMask=excludeMask)
+	# And to reordering of deck
+	deck.sample(5)
+	for reorder in [lambda: deck.shuffle(random.Random(2)),
+			deck.sort,
+			deck.reverse,
+			lambda: deck.__setitem__(slice(0, 2), [deck[1], deck[0]])]:
+	    reorder()
+	    self.assertListEqual(deck.sample(9, rng=random.Random(1)),
+				 Deck(deck).sample(9, rng=random.Random(1)))
+
+    def testMask(self):
+	"""Test deck mask is maintained."""
+	deck = Deck()
+	self.assertEqual(deck.mask, Deck.fullMask)
+	deck.shuffle()
+	self.assertEqual(deck.mask, Deck.fullMask)
+	hands = deck.createHands(4, handClass=HoldEm.Hand)
+	self.assertEqual(deck.mask, cardsMask(deck))
+	deck.burn(3)
+	self.assertEqual(deck.mask, cardsMask(deck))
+	del deck[0]
+	del deck[2:5]
+	self.assertEqual(deck.mask, cardsMask(deck))
+	deck[0] = hands[0][0]
+	self.assertEqual(deck.mask, cardsMask(deck))
+	deck.append(hands[1][0])
+	deck.insert(3, hands[1][1])
+	deck.remove(deck[10])
+	self.assertEqual(deck.mask, cardsMask(deck))
+	deck.reset()
+	self.assertEqual(deck.mask, Deck.fullMask)
+
+    def testInPlaceOperators(self):
+	"""Test deck mask is maintained by += and *=."""
+	deck = Deck()
+	card = deck.pop()
+	deck += [card]
+	self.assertIsInstance(deck, Deck)
+	self.assertEqual(len(deck), 52)
+	self.assertEqual(deck.mask, Deck.fullMask)
+	self.assertTrue(deck.cardsInDeck([card]))
+	deck.removeCards([card])
+	self.assertEqual(deck.mask, cardsMask(deck))
+	deck *= 0
+	self.assertEqual(len(deck), 0)
+	self.assertEqual(deck.mask, 0)
+
+    def testCardsInDeck(self):
+	"""Test cardsInDeck() and removeCards() methods."""
+	deck = Deck()
+	cards = Cards.fromString("AS KD 2C")
+	self.assertTrue(deck.cardsInDeck(cards))
+	deck.removeCards(cards)
+	self.assertEqual(len(deck), 49)
+	self.assertFalse(deck.cardsInDeck(cards))
+	self.assertFalse(deck.cardInDeck(Card.fromString("KD")))
+	self.assertTrue(deck.cardInDeck(Card.fromString("KS")))
+	self.assertRaises(CardNotFoundException, deck.removeCards,
+			  Cards.fromString("KS KD"))
+	# Failed removal should leave deck untouched
+	self.assertEqual(len(deck), 49)
+	self.assertTrue(deck.cardInDeck(Card.fromString("KS")))
+	deck.removeCards(Card.fromString("KS"))
+	self.assertEqual(len(deck), 48)
+	self.assertEqual(deck.mask, cardsMask(deck))
+	self.assertRaises(CardNotFoundException, deck.findCard,
+			  Card.fromString("KS"))
+
+    def testCopy(self):
+	"""Test copy() method."""
+	deck = Deck()
+	deck.removeCards(Cards.fromString("AS KD"))
+	deckCopy = deck.copy()
+	self.assertIsInstance(deckCopy, Deck)
+	self.assertEqual(deckCopy.mask, deck.mask)
+	deckCopy.burn()
+	self.assertNotEqual(deckCopy.mask, deck.mask)
+	self.assertEqual(len(deck), 50)
+
 if __name__ == "__main__":
     unittest.main()
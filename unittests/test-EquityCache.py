@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""Unittests for EquityCache module"""
+
+import os
+import shutil
+import tempfile
+
+from pyPoker.EquityCache import EquityCache
+from pyPoker.Hand import Board
+from pyPoker import HoldEm
+
+import testing
+
+class TestSequenceFunctions(testing.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _simulator(self, hands, board):
+        return HoldEm.Simulator(
+            number_of_hands=len(hands),
+            predefined_hands=HoldEm.Hands([HoldEm.Hand.fromString(h)
+                                           for h in hands]),
+            predefined_board=Board.fromString(board))
+
+    def test_enumerate_games(self):
+        """Test EquityCache.enumerate_games()"""
+        simulator = self._simulator(["AS AD", "KS KD"], "2C 7C 9C KH")
+        with EquityCache(self.filename) as cache:
+            self.assertEqual(len(cache), 0)
+            stats = cache.enumerate_games(simulator)
+            self.assertEqual(len(cache), 1)
+            self.assertListEqual(stats.get_high_winners(), [2, 42])
+        # Reopen and use an isomorphic situation
+        simulator = self._simulator(["AH AC", "KC KH"], "2D 7D 9D KS")
+        with EquityCache(self.filename) as cache:
+            stats = cache.enumerate_games(simulator)
+            self.assertEqual(len(cache), 1)
+            self.assertListEqual(stats.get_high_winners(), [2, 42])
+            # Different situation should add an entry
+            simulator = self._simulator(["AH AC", "KC KH"], "2D 7D 9D KD")
+            cache.enumerate_games(simulator)
+            self.assertEqual(len(cache), 2)
+            cache.clear()
+            self.assertEqual(len(cache), 0)
+
+    def test_simulate_games(self):
+        """Test EquityCache.simulate_games()"""
+        simulator = self._simulator(["AS AD", "KS KD"], "2C 7C 9C")
+        with EquityCache(self.filename) as cache:
+            stats = cache.simulate_games(simulator, number_of_games=50)
+            self.assertEqual(stats.get_number_of_games(), 50)
+            stats2 = cache.simulate_games(simulator, number_of_games=50)
+            self.assertListEqual(stats2.get_high_winners(),
+                                 stats.get_high_winners())
+            self.assertEqual(len(cache), 1)
+            cache.simulate_games(simulator, number_of_games=20)
+            self.assertEqual(len(cache), 2)
+
+    def test_format_version(self):
+        """Test results cached in another format aren't used"""
+        simulator = self._simulator(["AS AD", "KS KD"], "2C 7C 9C KH")
+        with EquityCache(self.filename) as cache:
+            cache.enumerate_games(simulator)
+            cache.FORMAT_VERSION = EquityCache.FORMAT_VERSION - 1
+            stats = cache.enumerate_games(simulator)
+            self.assertEqual(len(cache), 2)
+            self.assertListEqual(stats.get_high_winners(), [2, 42])
+
+if __name__ == "__main__":
+    testing.main()
@@ -1,10 +1,12 @@
 #!/usr/bin/env python
 """Unittests for HandGenerator module"""
 
+import random
+
 from pyPoker.HandGenerator import HandGenerationException
 from pyPoker import HoldEm
 from pyPoker.Deck import Deck
-from pyPoker.Cards import Card, Rank, Suit
+from pyPoker.Cards import Card, Cards, Rank, Suit, cardsMask
 from pyPoker.slanskyHands import SlanskyHand
 import unittest
 
@@ -40,5 +42,58 @@ class TestSequenceFunctions(unittest.TestCase):
 	    if not SlanskyHand['class1'].containsHand(hand):
 		self.fail("Generated hand (%s) not valid." % hand)
 
+    def testRng(self):
+	"""Test generating hands with a random number generator."""
+	hg = HoldEm.HandGenerator()
+	hg.addHands(SlanskyHand['class4'])
+	hands = [hg.generateHand(rng=random.Random(7)) for i in range(5)]
+	for hand in hands:
+	    self.assertListEqual(hand, hands[0])
+	deck = Deck(rng=random.Random(7))
+	hand = hg.generateHand(deck=deck)
+	deck = Deck()
+	self.assertListEqual(hg.generateHand(deck=deck, rng=random.Random(7)),
+			     hand)
+
+    def testWeights(self):
+        """Test hands are generated by (non-integer) percentage."""
+        hg = HoldEm.HandGenerator()
+        hg.addHands([Cards.fromString("AS AD")], 12.5)
+        hg.addHands([Cards.fromString("KS KD"), Cards.fromString("QS QD")],
+                    87.5)
+        self.assertRaises(ValueError, hg.addHands,
+                          [Cards.fromString("JS JD")], 0.5)
+        rng = random.Random(42)
+        counts = {}
+        for trial in range(8000):
+            hand = str(hg.generateHand(rng=rng))
+            counts[hand] = counts.get(hand, 0) + 1
+        self.assertAlmostEqual(counts["AS AD"] / 8000.0, 0.125, delta=0.02)
+        self.assertAlmostEqual(counts["KS KD"] / 8000.0, 0.4375, delta=0.02)
+        self.assertAlmostEqual(counts["QS QD"] / 8000.0, 0.4375, delta=0.02)
+
+    def testBadPercentage(self):
+        """Test generating with percentages not adding up to 100."""
+        hg = HoldEm.HandGenerator()
+        hg.addHands([Cards.fromString("AS AD")], 99.5)
+        self.assertRaises(HandGenerationException, hg.generateHand)
+        hg.addHands([Cards.fromString("KS KD")], 0.5)
+        self.assertEqual(len(hg.generateHand()), 2)
+
+    def testExcludeMask(self):
+        """Test generating hands with most hands unavailable."""
+        hg = HoldEm.HandGenerator()
+        hg.addHands(SlanskyHand['class1'])
+        hg.MAX_ATTEMPTS = 1
+        excludeMask = cardsMask(Cards.fromString("AS AH AD KS KH KD QS QH"))
+        rng = random.Random(42)
+        for trial in range(100):
+            hand = hg.generateHand(rng=rng, excludeMask=excludeMask)
+            self.assertEqual(cardsMask(hand) & excludeMask, 0)
+            self.assertTrue(SlanskyHand['class1'].containsHand(hand))
+        excludeMask |= cardsMask(Cards.fromString("AC KC QD QC JS JH JD JC"))
+        self.assertRaises(HandGenerationException, hg.generateHand,
+                          rng=rng, excludeMask=excludeMask)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Unittests for HandHistory module"""
+
+import os
+import StringIO
+import tempfile
+
+from pyPoker.Action import Action
+from pyPoker.HandHistory import HandHistory, HandHistoryException, \
+    HandHistoryWriter, MAGIC
+from pyPoker.Player import Player, Table
+from pyPoker.PokerGame import Game, Structure
+from pyPoker.Utils import random_stream
+import unittest
+
+class TestSequenceFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.structure = Structure(Structure.LIMIT, ante=5, blinds=[10])
+
+    def record(self, number_of_hands, stacks=(1000, 1000, 50, 1000)):
+        """Play hands recording them, return stream and players."""
+        stream = StringIO.StringIO()
+        players = [Player(name="Player %d" % index, stack=stack)
+                   for index, stack in enumerate(stacks)]
+        table = Table()
+        table.seat_players(players, in_order=True)
+        game = Game(table, self.structure, rng=random_stream(7),
+                    history=HandHistoryWriter(stream))
+        for hand in range(number_of_hands):
+            game.play_hand()
+        return stream.getvalue(), players
+
+    def testRecord(self):
+        """Test recording hands."""
+        data, players = self.record(10)
+        history = HandHistory(data)
+        self.assertEqual(len(history), 10)
+        for number, record in enumerate(history):
+            self.assertEqual(record.number, number)
+            self.assertEqual(record.number_of_seats, 9)
+            self.assertEqual(record.names, dict([(seat, "Player %d" % index)
+                                                 for index, seat in
+                                                 enumerate(range(1, 5))]))
+            self.assertEqual(len(record.deck), 52)
+            self.assertEqual(sum(record.get_winnings().values()), 0)
+            antes = [action for betting_round, seat, action in record.actions
+                     if action.is_ante()]
+            self.assertEqual(len(antes),
+                             len([player for player in record.players
+                                  if player[1] == Player.STATUS_ACTIVE]))
+        record = history[9]
+        self.assertEqual([stack for seat, rank, stack in record.results],
+                         [player.stack for player in players])
+        # Somebody shows down every hand
+        self.assertTrue(any([rank is not None
+                             for seat, rank, stack in record.results]))
+
+    def testReplay(self):
+        """Test replaying recorded hands."""
+        data, players = self.record(20)
+        history = HandHistory(data)
+        for index, record in enumerate(history):
+            game = history.replay(index, self.structure)
+            table = game.table
+            for seat, rank, stack in record.results:
+                self.assertEqual(table.get_player_by_seat(seat).stack, stack)
+
+    def testLoad(self):
+        """Test loading hand history from a file."""
+        data, players = self.record(5)
+        fd, filename = tempfile.mkstemp()
+        try:
+            os.write(fd, data)
+            os.close(fd)
+            history = HandHistory.load(filename)
+            self.assertEqual(len(history), 5)
+            self.assertEqual(history[4].results, HandHistory(data)[4].results)
+            history.close()
+        finally:
+            os.remove(filename)
+
+    def testErrors(self):
+        """Test invalid hand histories."""
+        data, players = self.record(2)
+        self.assertRaises(HandHistoryException, HandHistory, "Not a history")
+        self.assertRaises(HandHistoryException, HandHistory, data[:-1])
+        self.assertEqual(len(HandHistory(MAGIC)), 0)
+
+if __name__ == "__main__":
+    unittest.main()
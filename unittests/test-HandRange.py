@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""Unittests for HandRange module"""
+
+import random
+
+from pyPoker import HoldEm
+from pyPoker.Canonicalizer import Canonicalizer
+from pyPoker.Cards import Cards, cardsMask
+from pyPoker.Hand import Board
+from pyPoker.HandRange import EmptyRangeException, HandRange, RangeDealer
+from pyPoker.Hands import Hands
+from pyPoker.slanskyHands import SlanskyHand
+import unittest
+
+class TestSequenceFunctions(unittest.TestCase):
+
+    def testAddHand(self):
+        """Test adding hands to a HandRange"""
+        handRange = HoldEm.HandRange()
+        handRange.addHand(Cards.fromString("AS KS"))
+        handRange.addHand(Cards.fromString("QH QD"), 3)
+        handRange.addHand(Cards.fromString("KS AS"), 2)
+        self.assertEqual(len(handRange), 2)
+        self.assertEqual(handRange.getTotalWeight(), 6)
+        mask, hand, weight = handRange.combos[0]
+        self.assertIsInstance(hand, HoldEm.Hand)
+        self.assertEqual(weight, 3)
+        combos = handRange.getCombos(
+            excludeMask=cardsMask(Cards.fromString("AS")))
+        self.assertEqual(len(combos), 1)
+        self.assertEqual(str(combos[0][1]), "QH QD")
+        self.assertRaises(ValueError, handRange.addHand,
+                          Cards.fromString("2C 2D"), -1)
+
+    def testFromHandGenerator(self):
+        """Test creating a HandRange from a HandGenerator"""
+        hands = HoldEm.Hands()
+        hands.addHandGroup("AA")
+        generator = HoldEm.HandGenerator()
+        generator.addHands(hands, 50)
+        generator.addHands(SlanskyHand["class1"], 50)
+        generator.setName("test")
+        handRange = HoldEm.HandRange.fromHandGenerator(generator)
+        self.assertEqual(str(handRange), "test")
+        # AA is in both groups, so gets weight from each
+        weights = dict((mask, weight)
+                       for mask, hand, weight in handRange.combos)
+        size = len(SlanskyHand["class1"])
+        self.assertEqual(len(weights), size)
+        aces = weights[cardsMask(Cards.fromString("AS AH"))]
+        kings = weights[cardsMask(Cards.fromString("KS KH"))]
+        self.assertEqual(6 * aces, (6 + size) * kings)
+        for weight in weights.values():
+            self.assertIsInstance(weight, (int, long))
+
+    def testCombinations(self):
+        """Test RangeDealer.combinations() removes conflicting hands"""
+        aces = HoldEm.HandRange([Cards.fromString("AS AD"),
+                                 Cards.fromString("AH AC")])
+        other = HoldEm.HandRange()
+        other.addHand(Cards.fromString("AS KS"), 2)
+        other.addHand(Cards.fromString("QH QD"), 3)
+        dealer = RangeDealer([aces, other])
+        combinations = sorted((str(hands[0]), str(hands[1]), weight)
+                              for weight, hands in dealer.combinations())
+        self.assertEqual(combinations,
+                         [("AH AC", "AS KS", 2),
+                          ("AH AC", "QH QD", 3),
+                          ("AS AD", "QH QD", 3)])
+        # Known cards remove hands up front
+        dealer = RangeDealer([aces, other],
+                             excludeMask=cardsMask(Cards.fromString("QH")))
+        self.assertEqual(len(list(dealer.combinations())), 1)
+        self.assertRaises(EmptyRangeException, RangeDealer, [aces],
+                          cardsMask(Cards.fromString("AS AH")))
+
+    def testDealHands(self):
+        """Test RangeDealer.dealHands() deals combinations by weight"""
+        aces = HoldEm.HandRange([Cards.fromString("AS AD"),
+                                 Cards.fromString("AH AC")])
+        other = HoldEm.HandRange([Cards.fromString("AS KS"),
+                                  Cards.fromString("QH QD")])
+        dealer = RangeDealer([aces, other])
+        rng = random.Random(42)
+        counts = {}
+        for trial in range(3000):
+            hands = dealer.dealHands(rng)
+            self.assertEqual(hands[0][0] & hands[1][0], 0)
+            key = tuple(str(hand) for mask, hand in hands)
+            counts[key] = counts.get(key, 0) + 1
+        # Each of three valid combinations equally likely
+        self.assertEqual(len(counts), 3)
+        for count in counts.values():
+            self.assertAlmostEqual(count / 3000.0, 1 / 3.0, delta=0.04)
+        dealer = RangeDealer([HoldEm.HandRange([Cards.fromString("AS AD")]),
+                              HoldEm.HandRange([Cards.fromString("AS KS")])])
+        dealer.MAX_ATTEMPTS = 10
+        self.assertRaises(EmptyRangeException, dealer.dealHands, rng)
+
+    def testSimulator(self):
+        """Test Simulator with HandRanges"""
+        aces = HoldEm.HandRange([Cards.fromString("AS AD"),
+                                 Cards.fromString("AH AC")])
+        other = HoldEm.HandRange()
+        other.addHand(Cards.fromString("AS KS"), 2)
+        other.addHand(Cards.fromString("QH QD"), 3)
+        board = Board.fromString("KH 7S 2D 3C")
+        hands = Hands([aces, other])
+        simulator = HoldEm.Simulator(number_of_hands=2,
+                                     predefined_hands=hands,
+                                     predefined_board=board)
+        stats = simulator.enumerate_games()
+        # Compare with weighted exact results for each combination
+        high_winners = [0, 0]
+        games = 0
+        for hand1, hand2, weight in [("AH AC", "AS KS", 2),
+                                     ("AH AC", "QH QD", 3),
+                                     ("AS AD", "QH QD", 3)]:
+            hands = Hands([HoldEm.Hand.fromString(hand1),
+                           HoldEm.Hand.fromString(hand2)])
+            expected = HoldEm.Simulator(number_of_hands=2,
+                                        predefined_hands=hands,
+                                        predefined_board=board)
+            expected = expected.enumerate_games()
+            games += weight * expected.get_number_of_games()
+            for index in range(2):
+                high_winners[index] += \
+                    weight * expected.get_high_winners()[index]
+        self.assertEqual(stats.get_number_of_games(), games)
+        self.assertEqual(stats.get_high_winners(), high_winners)
+        self.assertEqual(simulator.enumerate_games(suit_isomorphism=True)
+                         .get_high_winners(), high_winners)
+        stats = simulator.simulate_games(number_of_games=100, seed=1)
+        self.assertEqual(stats.get_number_of_games(), 100)
+        form = Canonicalizer.canonicalSituation([aces, other], board)
+        self.assertEqual(form[0][0], "weighted")
+
+if __name__ == "__main__":
+    unittest.main()
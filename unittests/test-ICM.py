@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""Unittests for ICM module"""
+
+import itertools
+import random
+
+from pyPoker import ICM
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def bruteForce(stacks):
+    """Place probabilities by summing over every finishing order."""
+    numPlayers = len(stacks)
+    probabilities = [[0.0] * numPlayers for player in range(numPlayers)]
+    for order in itertools.permutations(range(numPlayers)):
+        chance = 1.0
+        chips = float(sum(stacks))
+        for player in order:
+            chance *= stacks[player] / chips
+            chips -= stacks[player]
+        for place, player in enumerate(order):
+            probabilities[player][place] += chance
+    return probabilities
+
+class TestSequenceFunctions(unittest.TestCase):
+
+    def assertProbabilitiesEqual(self, probabilities, expected, places=7):
+        self.assertEqual(len(probabilities), len(expected))
+        for row, expectedRow in zip(probabilities, expected):
+            self.assertEqual(len(row), len(expectedRow))
+            for value, expectedValue in zip(row, expectedRow):
+                self.assertAlmostEqual(value, expectedValue, places=places)
+
+    def testPlaceProbabilities(self):
+        """Test exact place probabilities."""
+        rng = random.Random(42)
+        for numPlayers in range(1, 7):
+            stacks = [rng.randint(1, 1000) for player in range(numPlayers)]
+            expected = bruteForce(stacks)
+            self.assertProbabilitiesEqual(ICM.placeProbabilities(stacks),
+                                          expected)
+            # Fewer places just drops columns
+            self.assertProbabilitiesEqual(ICM.placeProbabilities(stacks, 2),
+                                          [row[:2] for row in expected])
+
+    def testBusted(self):
+        """Test players with no chips."""
+        probabilities = ICM.placeProbabilities([100, 0, 300, 0])
+        self.assertProbabilitiesEqual(probabilities,
+                                      [[0.25, 0.75, 0.0, 0.0],
+                                       [0.0, 0.0, 0.5, 0.5],
+                                       [0.75, 0.25, 0.0, 0.0],
+                                       [0.0, 0.0, 0.5, 0.5]])
+
+    def testEquities(self):
+        """Test equities."""
+        self.assertEqual(ICM.equities([100, 300], [100]), [25.0, 75.0])
+        equities = ICM.equities([100, 200, 300, 400], [50, 30, 20])
+        self.assertAlmostEqual(sum(equities), 100.0)
+        self.assertEqual([round(equity, 2) for equity in equities],
+                         [13.32, 23.59, 29.49, 33.60])
+        # Many players, few places paid, is still exact
+        stacks = range(100, 3100, 100)
+        equities = ICM.equities(stacks, [50, 30, 20])
+        self.assertAlmostEqual(sum(equities), 100.0)
+        self.assertLess(ICM.numSubproblems(len(stacks), 3),
+                        ICM.MAX_SUBPROBLEMS)
+
+    def testSimulate(self):
+        """Test simulated place probabilities."""
+        stacks = [100, 200, 300, 400]
+        probabilities = ICM.simulatePlaceProbabilities(
+            stacks, trials=20000, rng=random.Random(42))
+        self.assertProbabilitiesEqual(probabilities,
+                                      ICM.placeProbabilities(stacks),
+                                      places=1)
+        probabilities = ICM.simulatePlaceProbabilities(
+            [100, 0, 300], places=3, trials=100, rng=random.Random(42))
+        self.assertEqual(probabilities[1], [0.0, 0.0, 1.0])
+        # Too many sets of players to compute exactly
+        stacks = [1000] * 200
+        equities = ICM.equities(stacks, [10] * 10, trials=1000,
+                                rng=random.Random(42))
+        self.assertAlmostEqual(sum(equities), 100.0)
+
+    def testNumSubproblems(self):
+        """Test numSubproblems()."""
+        self.assertEqual(ICM.numSubproblems(4, 4), 15)
+        self.assertEqual(ICM.numSubproblems(10, 2), 11)
+        self.assertEqual(ICM.numSubproblems(3, 10), 7)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def testBatchEquities(self):
+        """Test batchEquities()."""
+        rng = random.Random(42)
+        payouts = [50, 30, 20]
+        stackVectors = [[rng.randint(1, 1000) for player in range(6)]
+                        for vector in range(20)]
+        results = ICM.batchEquities(stackVectors, payouts)
+        self.assertEqual(results.shape, (20, 6))
+        for stacks, result in zip(stackVectors, results.tolist()):
+            for equity, expected in zip(result,
+                                        ICM.equities(stacks, payouts)):
+                self.assertAlmostEqual(equity, expected)
+        self.assertRaises(ValueError, ICM.batchEquities, [[100, 0]], payouts)
+        self.assertRaises(ValueError, ICM.batchEquities, [100, 200], payouts)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""Unittests for LookupRanker module"""
+
+import random
+
+from pyPoker.Cards import Cards, Rank
+from pyPoker.Deck import Deck
+from pyPoker.Hand import Board, Hand
+from pyPoker.Hands import Hands
+from pyPoker import HoldEm
+from pyPoker import Omaha
+from pyPoker import SevenCardStud
+from pyPoker.LookupRanker import LookupRanker
+from pyPoker.PokerGame import Simulator, Stats
+from pyPoker.PokerRank import PokerRank
+from pyPoker.Ranker import Ranker
+import unittest
+
+class TestSequenceFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.ranker = LookupRanker()
+
+    def testRankHand(self):
+        """Test rankHand() method."""
+        rank = self.ranker.rankHand(Hand.fromString("JC TS 9D 6H 2C"))
+        self.assertIsNotNone(rank)
+        self.assertIsInstance(rank, PokerRank, type(rank))
+        self.assertEqual(rank.getType(), PokerRank.HIGH_CARD)
+
+    def testMatchesRanker(self):
+        """Test LookupRanker returns same ranks as Ranker."""
+        rng = random.Random(42)
+        deck = Deck()
+        for numCards in [5, 6, 7]:
+            for trial in range(500):
+                cards = Cards(rng.sample(deck, numCards))
+                rank = self.ranker._rankCards(cards)
+                if numCards == 5:
+                    expectedRank = Ranker._rankFiveCardHand(cards)
+                else:
+                    expectedRank = Ranker._rankSixOrSevenCardHand(cards)
+                self.assertEqual(rank, expectedRank,
+                                 "%s: %s != %s" % (cards, rank, expectedRank))
+
+    def testFlushes(self):
+        """Test ranking of flushes and straight flushes."""
+        tests = [
+            # cards as string, expected type, expected primary rank
+            ("AS KS QS JS TS 2C 2D", PokerRank.STRAIGHT_FLUSH, 14),
+            ("5H 4H 3H 2H AH AC AD", PokerRank.STRAIGHT_FLUSH, 5),
+            ("KD 9D 7D 4D 2D AC AH", PokerRank.FLUSH, 13),
+            ("KD 9D 7D 4D 2D 3D QC", PokerRank.FLUSH, 13),
+            ("9C 8C 7C 6C 4C 5D", PokerRank.FLUSH, 9),
+            ]
+        for cards, rankType, primaryRank in tests:
+            rank = self.ranker._rankCards(Cards.fromString(cards))
+            self.assertEqual(rank.getType(), rankType, "%s: %s" % (cards, rank))
+            self.assertEqual(rank.getPrimaryCardRank(), primaryRank)
+
+    def testLowAces(self):
+        """Test hands with aces made low are ranked with aces high."""
+        tests = [
+            # cards as string, whether Ranker ranks it the same aces low
+            ("AH 2H 3H 4H 5H", True),
+            ("AH 2H 3H 4H 5H 9H", True),
+            ("AS 2C 3D 4H 5S KD", True),
+            ("AH KH 9H 4H 2H 7H 3C", False),
+            ("AS AC 2D 9H 9S KD", False),
+            ]
+        for cards, sameAcesLow in tests:
+            hand = SevenCardStud.Hand.fromString(cards)
+            hand.makeAcesLow()
+            rank = self.ranker.rankHand(hand)
+            acesHigh = SevenCardStud.Hand.fromString(cards)
+            self.assertEqual(rank, Ranker.rankHand(acesHigh),
+                             "%s: %s" % (cards, rank))
+            if sameAcesLow:
+                self.assertEqual(rank, Ranker.rankHand(hand))
+        # Shared board with low aces
+        board = Board.fromString("AH 2H 3H")
+        board.makeAcesLow()
+        hands = [HoldEm.Hand.fromString("4H 5H"),
+                 HoldEm.Hand.fromString("KH 9H")]
+        for hand in hands:
+            hand.setBoard(board)
+        ranks = self.ranker.rankHands(hands)
+        self.assertEqual(ranks, [self.ranker.rankHand(hand) for hand in hands])
+        self.assertEqual(ranks[0], Ranker.rankHand(hands[0]))
+        self.assertFalse([bits for bits in LookupRanker._flushTable
+                          if bits & (1 << Rank.ACE_LOW)])
+
+    def testBadNumberOfCards(self):
+        """Test ranking too few or too many cards."""
+        self.assertRaises(ValueError, self.ranker._rankCards,
+                          Cards.fromString("AS KS QS JS"))
+        self.assertRaises(ValueError, self.ranker._rankCards,
+                          Cards.fromString("AS KS QS JS TS 9S 8S 7S"))
+
+    def testBoard(self):
+        """Verify ranking with board."""
+        board = Board.fromString("5C 2S 4D")
+        hand = HoldEm.Hand.fromString("AC 2C")
+        hand.setBoard(board)
+        board.addCardFromString("AD")
+        rank = self.ranker.rankHand(hand)
+        self.assertEqual(rank.getType(), PokerRank.TWO_PAIR)
+        board.addCardFromString("3H")
+        rank = self.ranker.rankHand(hand)
+        self.assertEqual(rank.getType(), PokerRank.STRAIGHT)
+
+    def testRankHandsSharedBoard(self):
+        """Test rankHands() with a shared board matches Ranker."""
+        rng = random.Random(42)
+        for trial in range(100):
+            deck = Deck()
+            deck.shuffle(rng)
+            board = Board(deck[:3 + trial % 3])
+            hands = [HoldEm.Hand(deck[5 + 2 * i:7 + 2 * i], board=board)
+                     for i in range(6)]
+            self.assertEqual(self.ranker.rankHands(hands),
+                             [Ranker.rankHand(hand) for hand in hands])
+
+    def testOmaha(self):
+        """Test basic Omaha hand ranking."""
+        hand = Omaha.Hand.fromString("7S QD 2D TD")
+        board = Board.fromString("AS AD 4H TH 8D")
+        hand.setBoard(board)
+        rank = self.ranker.rankHand(hand)
+        self.assertEqual(rank, Ranker.rankHand(hand))
+        self.assertEqual(rank.getType(), PokerRank.TWO_PAIR)
+
+    def testBestHand(self):
+        """Test bestHand() method"""
+        hands = [
+            Hand.fromString("AC 9D KS 3D KH"), # Pair of Kings
+            Hand.fromString("AD JD 8D 4D 2D"), # A-high flush
+            Hand.fromString("7S QD QS QC 6D"), # Trip queens
+            ]
+        best_hands, best_rank = self.ranker.bestHand(hands)
+        self.assertEqual(best_hands, [1])
+        self.assertEqual(best_rank.getType(), PokerRank.FLUSH)
+
+    def testSimulator(self):
+        """Test selecting LookupRanker with Simulator.HighRankerClass"""
+        class LookupSimulator(HoldEm.Simulator):
+            HighRankerClass = LookupRanker
+        simulator = LookupSimulator(number_of_hands=4)
+        self.assertIsInstance(simulator.high_ranker, LookupRanker)
+        stats = simulator.simulate_games(number_of_games=10)
+        self.assertIsInstance(stats, Stats)
+        self.assertEqual(stats.get_number_of_games(), 10)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,9 @@
 #!/usr/bin/env python
 """Unittests for LowRanker module"""
 
+from pyPoker import HoldEm
 from pyPoker import Omaha
-from pyPoker.Cards import Cards, Rank, Suit
+from pyPoker.Cards import Card, Cards, Rank, Suit
 from pyPoker.Hand import Board, Hand
 from pyPoker.Hands import Hands
 from pyPoker.LowRanker import EightLowRanker, LowRanker
@@ -130,6 +131,21 @@ class TestSequenceFunctions(unittest.TestCase):
         self.assertEqual(best_rank.getType(), PokerRank.HIGH_CARD)
         self.assertEqual(best_rank.getPrimaryCardRank(), Rank.EIGHT)
 
+    def testRankHandsSharedBoard(self):
+        """Test rankHands() and bestHand() with a shared board"""
+        board = Board.fromString("AS 7D 4H KH 2D")
+        hands = [HoldEm.Hand.fromString(cards)
+                 for cards in ["3C 5C", "AC 8C", "KS QS", "6C 3D"]]
+        for hand in hands:
+            hand.setBoard(board)
+        ranks = self.ranker.rankHands(hands)
+        self.assertEqual(ranks, [self.ranker.rankHand(hand) for hand in hands])
+        best_hands, best_rank = self.ranker.bestHand(hands)
+        self.assertEqual(best_hands, [0])
+        self.assertEqual(best_rank.getType(), PokerRank.HIGH_CARD)
+        self.assertEqual(best_rank.getPrimaryCardRank(), Rank.FIVE)
+        self.assertEqual(ranks[2].getPrimaryCardRank(), Rank.QUEEN)
+
     def testOmahaLow(self):
 	"""Test Omaha low hand ranking with EightLowRanker."""
         ranker = EightLowRanker()
@@ -186,6 +202,43 @@ class TestSequenceFunctions(unittest.TestCase):
 	rank = ranker.rankHand(hand)
         self.assertIsNone(rank)
 
+    def testOmahaLowBoardAce(self):
+        """Test Omaha 8-low using an ace on the board."""
+        ranker = EightLowRanker()
+        hand = Omaha.Hand.fromString("3S 4C QD KH")
+        board = Board.fromString("7D 4H 2H AC 6D")
+        hand.setBoard(board)
+        rank = ranker.rankHand(hand)
+        self.assertIsNotNone(rank)
+        self.assertEqual(rank.getPrimaryCardRank(), Rank.SIX)
+        self.assertEqual(rank.getKickerRanks(),
+                         [Rank.FOUR, Rank.THREE, Rank.TWO, Rank.ACE_LOW])
+
+    def testOmahaPairedNoLow(self):
+        """Test Omaha hand which can only make a paired low doesn't qualify."""
+        ranker = EightLowRanker()
+        hand = Omaha.Hand.fromString("AS 2C KD KH")
+        board = Board.fromString("AD 3H 4H QC JD")
+        hand.setBoard(board)
+        self.assertIsNone(ranker.rankHand(hand))
+
+    def testEightLowTable(self):
+        """Test EightLowRanker table against LowRanker."""
+        ranks = [Rank.ACE, Rank.TWO, Rank.THREE, Rank.FOUR,
+                 Rank.FIVE, Rank.SIX, Rank.SEVEN, Rank.EIGHT]
+        for mask in range(256):
+            cards = Cards([Card((rank, Suit.suits[index % 4]))
+                           for index, rank in enumerate(ranks)
+                           if mask & (1 << index)])
+            self.assertEqual(EightLowRanker.lowRankMask(cards), mask)
+            rank = EightLowRanker._lowTable[mask]
+            if len(cards) < 5:
+                self.assertIsNone(rank)
+            else:
+                cards.makeAcesLow()
+                cards.sort()
+                self.assertEqual(rank, LowRanker._rankHand(cards[:5]))
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -1,10 +1,14 @@
 #!/usr/bin/env python
 """Unittests for Omaha module"""
 
+import random
+
 from pyPoker.Deck import Deck
 from pyPoker.Hand import Board
 from pyPoker import Omaha
 from pyPoker.PokerGame import Result, Stats
+from pyPoker.PokerRank import PokerRank
+from pyPoker.Ranker import Ranker
 
 import testing
 
@@ -93,6 +97,42 @@ class TestSequenceFunctions(testing.TestCase):
 			      "%s == %d != %d points" % (hand, value, 
 							 hands[hand]))
 
+    def test_Ranker(self):
+        """Test Omaha.Ranker returns same ranks as Ranker"""
+        rng = random.Random(42)
+        for trial in range(200):
+            deck = Deck()
+            deck.shuffle(rng)
+            board = Board(deck[:3 + trial % 3])
+            hand = Omaha.Hand(deck[5:9], board=board)
+            self.assertEqual(Omaha.Ranker.rankHand(hand),
+                             Ranker.rankHand(hand), str(hand))
+
+    def test_Ranker_flush(self):
+        """Test Omaha.Ranker requires two suited hole cards for a flush"""
+        board = Board.fromString("AS KS QS 3D 2C")
+        hand = Omaha.Hand.fromString("JS TD 7C 6H")
+        hand.setBoard(board)
+        rank = Omaha.Ranker.rankHand(hand)
+        self.assertEqual(rank.getType(), PokerRank.STRAIGHT)
+        hand = Omaha.Hand.fromString("JS TS 7C 6H")
+        hand.setBoard(board)
+        rank = Omaha.Ranker.rankHand(hand)
+        self.assertEqual(rank.getType(), PokerRank.STRAIGHT_FLUSH)
+
+    def test_Ranker_bestHand(self):
+        """Test Omaha.Ranker.bestHand() with a shared board"""
+        board = Board.fromString("AS KS QS 3D 2C")
+        hands = [Omaha.Hand.fromString(cards)
+                 for cards in ["JS TD 7C 6H", "AC AD 4H 5H", "JD TC 9D 9C"]]
+        for hand in hands:
+            hand.setBoard(board)
+        ranks = Omaha.Ranker.rankHands(hands)
+        self.assertEqual(ranks, [Ranker.rankHand(hand) for hand in hands])
+        best_hands, best_rank = Omaha.Ranker.bestHand(hands)
+        self.assertEqual(best_hands, [0, 2])
+        self.assertEqual(best_rank.getType(), PokerRank.STRAIGHT)
+
     def test_Simulator(self):
         """Test HoldEm.Simulator"""
         simulator = Omaha.Simulator()
@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 """Unittests for player module"""
 
+import random
+
 import testing
 
 from pyPoker.Action import Action, InvalidActionException
@@ -132,5 +134,51 @@ class TestSequenceFunctions(testing.TestCase):
         self.assertEqual(table.get_dealer(), players[1])
         self.assertEqual(str(table), "1: One 2: Two* 3: Three 4: Four")
 
+    def test_Table_status_tracking(self):
+        """Test Table keeps track of player status changes."""
+        players = [ Player(name="One", stack=100),
+                    Player(name="Two", stack=200),
+                    Player(name="Three", stack=500),
+                    Player(name="Four", stack=0)
+                    ]
+        table = Table()
+        table.seat_players(players, in_order=True)
+        self.assertListEqual(table.get_active_players(), players[:3])
+        self.assertListEqual(
+            table.get_players_with_status(Player.STATUS_SITTING_OUT),
+            players[3:])
+        self.assertEqual(table.get_next_active_player(players[2]),
+                         players[0])
+        players[0].muck_hand()
+        players[1].status = Player.STATUS_ALL_IN
+        self.assertListEqual(table.get_active_players(), players[1:3])
+        self.assertListEqual(
+            table.get_players_with_status(Player.STATUS_FOLDED),
+            players[:1])
+        self.assertEqual(table.get_next_active_player(players[3]),
+                         players[2])
+        self.assertEqual(table.get_next_active_player(players[2]),
+                         players[2])
+        players[2].sit_out()
+        self.assertRaises(IndexError,
+                          table.get_next_active_player, players[0])
+        for player in players:
+            player.new_hand()
+        self.assertListEqual(table.get_active_players(), players)
+        self.assertRaises(ValueError, table.get_player_seat, Player())
+
+    def test_Table_rng(self):
+        """Test Table with random number generator."""
+        dealers = []
+        for i in range(2):
+            players = [ Player(name="One", stack=100),
+                        Player(name="Two", stack=200),
+                        Player(name="Three", stack=500) ]
+            table = Table(players=players, rng=random.Random(3))
+            seats = [table.get_player_seat(p) for p in players]
+            table.random_dealer()
+            dealers.append((seats, table.get_dealer().name))
+        self.assertEqual(dealers[0], dealers[1])
+
 if __name__ == "__main__":
     testing.main(doctest_modules=[pyPoker.Player])
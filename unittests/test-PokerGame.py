@@ -2,8 +2,16 @@
 """Unittests for PokerGame module"""
 
 import StringIO
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 from pyPoker import HoldEm
+from pyPoker import Omaha
+from pyPoker import SevenCardStud
 from pyPoker.Action import Action, ActionRequest, InvalidActionException
 from pyPoker.Cards import Cards, Rank
 from pyPoker.Deck import Deck
@@ -18,6 +26,7 @@ from pyPoker.PokerGame import \
     PokerGameStateException
 from pyPoker.PokerRank import PokerRank
 from pyPoker.Ranker import Ranker
+from pyPoker.Utils import random_stream
 
 import testing
 
@@ -50,6 +59,101 @@ class TestSimulator(testing.TestCase):
         self.assertIsNotNone(stats)
         self.assertIsInstance(stats, Stats)
 
+    def test_simulate_games_parallel(self):
+        """Test Simulator.simulate_games() with jobs and seed"""
+        hands = Hands()
+        hands.addHand(HoldEm.Hand.fromString("AS AD"))
+        hands.addHand(HoldEm.Hand.fromString("7C 8C"))
+        simulator = HoldEm.Simulator(number_of_hands=4,
+                                     predefined_hands=hands)
+        simulator.GAMES_PER_SHARD = 40
+        results = []
+        def callback(simulator, result, results):
+            results.append(result)
+        stats = simulator.simulate_games(number_of_games=100, seed=1,
+                                         callback=callback,
+                                         callbackArg=results)
+        self.assertEqual(stats.get_number_of_games(), 100)
+        self.assertEqual(len(results), 100)
+        self.assertIsInstance(results[0], Result)
+        parallel_results = []
+        parallel_stats = simulator.simulate_games(number_of_games=100,
+                                                  seed=1, jobs=3,
+                                                  callback=callback,
+                                                  callbackArg=parallel_results)
+        self.assertEqual(parallel_stats.get_number_of_games(), 100)
+        self.assertListEqual(parallel_stats.get_high_winners(),
+                             stats.get_high_winners())
+        self.assertListEqual([r.high_winners for r in parallel_results],
+                             [r.high_winners for r in results])
+        # Same seed in one process should give same results again
+        stats2 = simulator.simulate_games(number_of_games=100, seed=1)
+        self.assertListEqual(stats2.get_high_winners(),
+                             stats.get_high_winners())
+
+    def test_enumerate_games(self):
+        """Test Simulator.enumerate_games()"""
+        hands = Hands()
+        hands.addHand(HoldEm.Hand.fromString("AS AD"))
+        hands.addHand(HoldEm.Hand.fromString("KS KD"))
+        board = Board.fromString("2C 7C 9C KH")
+        simulator = HoldEm.Simulator(number_of_hands=2,
+                                     predefined_hands=hands,
+                                     predefined_board=board)
+        stats = simulator.enumerate_games()
+        # 44 possible rivers, AA only wins with one of the two other aces
+        self.assertEqual(stats.get_number_of_games(), 44)
+        self.assertListEqual(stats.get_high_winners(), [2, 42])
+        self.assertListEqual(stats.get_high_ties(), [0, 0])
+        fractions = stats.get_fractions(stats.get_high_winners())
+        self.assertEqual(fractions[0] + fractions[1], 1)
+        self.assertEqual(fractions[0] * 22, 1)
+        # Board should not have been changed
+        self.assertEqual(len(board), 4)
+
+    def test_enumerate_games_suit_isomorphism(self):
+        """Test Simulator.enumerate_games() with suit_isomorphism"""
+        hands = Hands()
+        hands.addHand(HoldEm.Hand.fromString("AS AD"))
+        hands.addHand(HoldEm.Hand.fromString("KS KD"))
+        hands.addHand(HoldEm.Hand.fromString("QS QD"))
+        board = Board.fromString("2C 7C 9C")
+        simulator = HoldEm.Simulator(number_of_hands=3,
+                                     predefined_hands=hands,
+                                     predefined_board=board)
+        stats = simulator.enumerate_games()
+        self.assertEqual(stats.get_number_of_games(), 43 * 42 / 2)
+        iso_stats = simulator.enumerate_games(suit_isomorphism=True)
+        self.assertEqual(iso_stats.get_number_of_games(),
+                         stats.get_number_of_games())
+        self.assertListEqual(iso_stats.get_high_winners(),
+                             stats.get_high_winners())
+        self.assertListEqual(iso_stats.get_high_ties(),
+                             stats.get_high_ties())
+        self.assertListEqual(iso_stats.get_scoops(), stats.get_scoops())
+        # Flush on board gives ties
+        self.assertTrue(stats.get_high_ties()[0] > 0)
+
+    def test_simulate_game_rng(self):
+        """Test replaying a seeded game with Simulator.simulate_game()"""
+        simulator = HoldEm.Simulator(number_of_hands=5)
+        results = []
+        def callback(simulator, result, results):
+            results.append(result)
+        simulator.simulate_games(number_of_games=20, seed=5,
+                                 callback=callback, callbackArg=results)
+        result = results[13]
+        self.assertEqual(result.game_number, 13)
+        replay = simulator.simulate_game(rng=random_stream(5, 13))
+        self.assertListEqual(replay.hands, result.hands)
+        self.assertListEqual(replay.board, result.board)
+        self.assertListEqual(replay.high_winners, result.high_winners)
+        # Generator given to simulator should be used
+        simulator = HoldEm.Simulator(number_of_hands=5,
+                                     rng=random_stream(5, 13))
+        replay = simulator.simulate_game()
+        self.assertListEqual(replay.hands, result.hands)
+
 class TestResult(testing.TestCase):
 
     def test_Result(self):
@@ -145,6 +249,147 @@ class TestStats(testing.TestCase):
             self.assertEqual(0, stats.low_winners[index])
             self.assertEqual(0, stats.scoops[index])
 
+    def test_merge(self):
+        """Test Stats.merge()"""
+        simulator = Simulator(number_of_hands=5)
+        stats = simulator.simulate_games(number_of_games=20)
+        other_stats = simulator.simulate_games(number_of_games=30)
+        high_winners = [a + b for a, b in zip(stats.high_winners,
+                                              other_stats.high_winners)]
+        self.assertIs(stats.merge(other_stats), stats)
+        self.assertEqual(stats.get_number_of_games(), 50)
+        self.assertListEqual(stats.get_high_winners(), high_winners)
+        self.assertRaises(ValueError, stats.merge, Stats(number_of_hands=4))
+
+    def test_pot_shares(self):
+        """Test Stats.get_pot_shares() and Stats.get_equities()"""
+        stats = Stats(number_of_hands=4)
+        # Hand 0 wins high outright, hands 1 and 2 split low
+        result = Result(hands=None, high_winners=[0], low_winners=[1, 2])
+        self.assertEqual(Stats.get_pot_shares(result),
+                         {0: 0.5, 1: 0.25, 2: 0.25})
+        stats.record_game(result)
+        # Hand 0 scoops
+        result = Result(hands=None, high_winners=[0], low_winners=[0])
+        self.assertEqual(Stats.get_pot_shares(result), {0: 1.0})
+        stats.record_game(result)
+        # No low, hands 0 and 3 split high
+        result = Result(hands=None, high_winners=[0, 3], low_winners=[])
+        self.assertEqual(Stats.get_pot_shares(result), {0: 0.5, 3: 0.5})
+        stats.record_game(result, weight=2)
+        self.assertEqual(stats.get_number_of_games(), 4)
+        self.assertListEqual(stats.get_equities(),
+                             [0.625, 0.0625, 0.0625, 0.25])
+        self.assertAlmostEqual(sum(stats.get_equities()), 1.0)
+        self.assertListEqual(stats.get_high_equities(),
+                             [0.5, 0.0, 0.0, 0.25])
+        self.assertListEqual(stats.get_low_equities(),
+                             [0.125, 0.0625, 0.0625, 0.0])
+        # Hand 0 shares: 0.5, 1, 0.5, 0.5
+        errors = stats.get_standard_errors()
+        self.assertAlmostEqual(errors[0], 0.125)
+        intervals = stats.get_confidence_intervals(0.95)
+        self.assertAlmostEqual(intervals[0], 0.125 * 1.96, places=3)
+        self.assertTrue(stats.has_precision(0.5))
+        self.assertFalse(stats.has_precision(0.1))
+        other = Stats(number_of_hands=4)
+        other.record_game(result)
+        stats.merge(other)
+        self.assertEqual(stats.get_equities()[3], 0.3)
+
+    def test_equities_hilo(self):
+        """Test equities from a hi/lo simulation add up"""
+        simulator = Omaha.HiLoSimulator(number_of_hands=4)
+        stats = simulator.simulate_games(number_of_games=50)
+        self.assertAlmostEqual(sum(stats.get_equities()), 1.0)
+        for equity, high, low in zip(stats.get_equities(),
+                                     stats.get_high_equities(),
+                                     stats.get_low_equities()):
+            self.assertAlmostEqual(equity, high + low)
+
+    def test_simulate_games_precision(self):
+        """Test Simulator.simulate_games() stopping at a precision"""
+        hands = Hands()
+        hands.addHand(HoldEm.Hand.fromString("AS AD"))
+        hands.addHand(HoldEm.Hand.fromString("7C 2D"))
+        simulator = HoldEm.Simulator(number_of_hands=2,
+                                     predefined_hands=hands)
+        simulator.PRECISION_CHECK_GAMES = 100
+        stats = simulator.simulate_games(number_of_games=100000,
+                                         precision=0.05)
+        self.assertLess(stats.get_number_of_games(), 100000)
+        self.assertEqual(stats.get_number_of_games() % 100, 0)
+        self.assertTrue(stats.has_precision(0.05))
+        simulator.GAMES_PER_SHARD = 100
+        stats = simulator.simulate_games(number_of_games=100000,
+                                         precision=0.05, seed=1)
+        self.assertLess(stats.get_number_of_games(), 100000)
+        self.assertTrue(stats.has_precision(0.05))
+        # Without precision all the games are played
+        stats = simulator.simulate_games(number_of_games=200, seed=1)
+        self.assertEqual(stats.get_number_of_games(), 200)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_simulate_games_batch(self):
+        """Test Simulator.simulate_games() with batch_size"""
+        hands = Hands()
+        hands.addHand(HoldEm.Hand.fromString("AS KS"))
+        hands.addHand(HoldEm.Hand.fromString("QH QD"))
+        board = Board.fromString("QS JS 2C")
+        for simulator in [
+            HoldEm.Simulator(number_of_hands=3, predefined_hands=hands),
+            HoldEm.Simulator(number_of_hands=2, predefined_hands=hands,
+                             predefined_board=board),
+            Omaha.HiLoSimulator(number_of_hands=4),
+            SevenCardStud.HiLoSimulator(number_of_hands=3),
+            ]:
+            results = []
+            def callback(simulator, result):
+                results.append(result)
+            stats = simulator.simulate_games(number_of_games=250,
+                                             callback=callback,
+                                             batch_size=100, seed=1)
+            self.assertEqual(stats.get_number_of_games(), 250)
+            self.assertEqual(len(results), 250)
+            # Batch statistics must match those of the Results
+            expected = Stats(number_of_hands=simulator.number_of_hands)
+            for result in results:
+                expected.record_game(result)
+                # And Results the same as ranking the hands normally
+                other = simulator._rank_hands(result.hands, result.board)
+                self.assertEqual(result.high_winners, other.high_winners)
+                self.assertEqual(result.winning_high_rank,
+                                 other.winning_high_rank)
+                self.assertEqual(result.low_winners, other.low_winners)
+                self.assertEqual(result.winning_low_rank,
+                                 other.winning_low_rank)
+            for attr in ["high_winners", "low_winners", "scoops",
+                         "high_ties", "low_ties"]:
+                self.assertEqual(getattr(stats, attr),
+                                 getattr(expected, attr))
+            for attr in ["pot_shares", "pot_share_squares",
+                         "high_pot_shares", "low_pot_shares"]:
+                for value, expected_value in zip(getattr(stats, attr),
+                                                 getattr(expected, attr)):
+                    self.assertAlmostEqual(value, expected_value)
+            # Same seed, same games
+            again = simulator.simulate_games(number_of_games=250,
+                                             batch_size=100, seed=1)
+            self.assertEqual(again.pot_shares, stats.pot_shares)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_simulate_games_batch_errors(self):
+        """Test Simulator.simulate_games() with unsupported batch_size"""
+        simulator = HoldEm.Simulator(number_of_hands=2)
+        self.assertRaises(ValueError, simulator.simulate_games,
+                          number_of_games=10, batch_size=5, jobs=2)
+        hands = Hands()
+        hands.addHand(HoldEm.HandGenerator(["AA", "KK"]))
+        simulator = HoldEm.Simulator(number_of_hands=2,
+                                     predefined_hands=hands)
+        self.assertRaises(ValueError, simulator.simulate_games,
+                          number_of_games=10, batch_size=5)
+
 class TestMessageHandler(testing.TestCase):
 
     def setUp(self):
@@ -631,5 +876,56 @@ class TestGame(testing.TestCase):
             else:
                 self.assertTrue(player.is_sitting_out())
 
+    def test_Game_rng(self):
+        """Test Game with a random number generator is reproducible"""
+        stacks = []
+        for i in range(2):
+            players = [ Player(name="Player One", stack=1000),
+                        Player(name="Player Two", stack=1000),
+                        Player(name="Player Three", stack=1000) ]
+            table = Table()
+            table.seat_players(players, in_order=True)
+            structure = Structure(Structure.LIMIT, ante=5, blinds=[10])
+            game = Game(table, structure, console=self.console,
+                        rng=random_stream(11))
+            for hand in range(3):
+                game.play_hand()
+            stacks.append([player.stack for player in players])
+        self.assertListEqual(stacks[0], stacks[1])
+
+    def test_Game_headless(self):
+        """Test Game without anyone listening for messages"""
+        class ListeningPlayer(Player):
+            def message(self, string):
+                self.messages.append(string)
+        stacks = []
+        for console, PlayerClass in [(self.console, Player),
+                                     (None, Player),
+                                     (None, ListeningPlayer)]:
+            players = [ PlayerClass(name="Player One", stack=1000),
+                        PlayerClass(name="Player Two", stack=1000),
+                        PlayerClass(name="Player Three", stack=1000) ]
+            for player in players:
+                player.messages = []
+            table = Table()
+            table.seat_players(players, in_order=True)
+            structure = Structure(Structure.LIMIT, ante=5, blinds=[10])
+            game = Game(table, structure, console=console,
+                        rng=random_stream(5))
+            self.assertEqual(game.message_handler.wants_messages(),
+                             (console is not None) or
+                             (PlayerClass is ListeningPlayer))
+            self.assertEqual(game.message_handler.wants_debug(),
+                             console is not None)
+            for hand in range(20):
+                game.play_hand()
+            stacks.append([player.stack for player in players])
+            if PlayerClass is ListeningPlayer:
+                self.assertIn("New hand starting", players[0].messages)
+                self.assertListEqual(players[0].messages, players[1].messages)
+        # Playing is the same whether or not anyone is listening
+        self.assertListEqual(stacks[0], stacks[1])
+        self.assertListEqual(stacks[0], stacks[2])
+
 if __name__ == "__main__":
     testing.main()
@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 """Unittests for PokerRank module"""
 
+import pickle
+
 from pyPoker.Cards import Rank, Cards
 from pyPoker.Hand import Hand
 from pyPoker.Hands import Hands
@@ -67,5 +69,32 @@ class TestSequenceFunctions(unittest.TestCase):
         self.assertEqual(kickerRanks[2], Rank.ACE_LOW,
                          "kickerRanks[2] == %s != A" % kickerRanks[2])
 
+    def testFromRanks(self):
+        """Test fromRanks() matches regular construction."""
+        rank = PokerRank.fromRanks(PokerRank.TWO_PAIR, Rank.KING, Rank.FOUR,
+                                   [Rank.NINE])
+        self.assertIsInstance(rank, PokerRank)
+        self.assertEqual(rank,
+                         PokerRank.twoPair(Rank.KING, Rank.FOUR,
+                                           Cards.fromString("9C")))
+        self.assertEqual(rank.getType(), PokerRank.TWO_PAIR)
+        self.assertEqual(rank.getSecondaryCardRank(), Rank.FOUR)
+        self.assertEqual(rank.getKickerRanks(), [Rank.NINE])
+        self.assertEqual(str(rank), "Two Pair kings and fours")
+
+    def testKickersNotModified(self):
+        """Test creating a PokerRank doesn't reorder kickers passed in."""
+        kickers = Cards.fromString("8C KS AH")
+        PokerRank.pair(Rank.QUEEN, kickers)
+        self.assertEqual(str(kickers), "8C KS AH")
+
+    def testPickle(self):
+        """Test pickling of PokerRank."""
+        rank = PokerRank.straight(Rank.TEN)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copy = pickle.loads(pickle.dumps(rank, protocol))
+            self.assertIsInstance(copy, PokerRank)
+            self.assertEqual(copy, rank)
+
 if __name__ == "__main__":
     unittest.main()
@@ -8,7 +8,7 @@ from pyPoker.Hands import Hands
 from pyPoker import HoldEm
 from pyPoker import Omaha
 from pyPoker.PokerRank import PokerRank
-from pyPoker.Ranker import Ranker
+from pyPoker.Ranker import Ranker, RankerBase
 import unittest
 
 class TestSequenceFunctions(unittest.TestCase):
@@ -227,6 +227,32 @@ class TestSequenceFunctions(unittest.TestCase):
         self.assertEqual(best_rank.getType(), PokerRank.FLUSH)
         self.assertEqual(best_rank.getPrimaryCardRank(), Rank.ACE)
 
+    def testRankHandsSharedBoard(self):
+        """Test rankHands() and bestHand() with a shared board"""
+        board = Board.fromString("5C 2C 4D AD 9C")
+        hands = [HoldEm.Hand.fromString(cards)
+                 for cards in ["AC 3S", "3H 6H", "KC QC", "7S 3D"]]
+        for hand in hands:
+            hand.setBoard(board)
+        ranks = self.ranker.rankHands(hands)
+        self.assertEqual(ranks, [self.ranker.rankHand(hand) for hand in hands])
+        self.assertEqual(ranks[0].getType(), PokerRank.STRAIGHT)
+        self.assertEqual(ranks[1].getType(), PokerRank.STRAIGHT)
+        best_hands, best_rank = self.ranker.bestHand(hands)
+        self.assertEqual(best_hands, [2])
+        self.assertEqual(best_rank.getType(), PokerRank.FLUSH)
+        self.assertEqual(best_rank.getPrimaryCardRank(), Rank.KING)
+        # A ranker which analyzes the board but doesn't rank hole cards
+        # with it falls back on rankHand()
+        class BoardOnlyRanker(RankerBase):
+            @classmethod
+            def rankHand(cls, hand):
+                return Ranker.rankHand(hand)
+            @classmethod
+            def _analyzeBoard(cls, board, hands):
+                return board
+        self.assertEqual(BoardOnlyRanker.rankHands(hands), ranks)
+
     def testOmaha(self):
 	"""Test basic Omaha hand ranking."""
 	hand = Omaha.Hand.fromString("7S QD 2D TD")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""Unittests for ResultWriter module"""
+
+import os
+import tempfile
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from pyPoker import HoldEm
+from pyPoker import Omaha
+from pyPoker import SevenCardStud
+from pyPoker.Hands import Hands
+from pyPoker.ResultWriter import FixedResultWriter, open_writer, \
+    read_results, FORMAT_FIXED, FORMAT_PARQUET, NO_CARD
+from pyPoker import ResultWriter as ResultWriterModule
+import unittest
+
+class TestSequenceFunctions(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def simulators(self):
+        hands = Hands()
+        hands.addHand(HoldEm.Hand.fromString("AS KS"))
+        return [
+            HoldEm.Simulator(number_of_hands=3, predefined_hands=hands),
+            Omaha.HiLoSimulator(number_of_hands=4),
+            SevenCardStud.HiLoSimulator(number_of_hands=3),
+            ]
+
+    def assertRowsMatch(self, rows, results, simulator):
+        """Check rows read back match Results."""
+        self.assertEqual(len(rows), len(results))
+        for row, result in zip(rows, results):
+            if result.game_number is None:
+                self.assertEqual(row["game_number"], -1)
+            else:
+                self.assertEqual(row["game_number"], result.game_number)
+            for codes, hand in zip(row["hands"].tolist(), result.hands):
+                self.assertEqual(codes[:len(hand)],
+                                 [card.code for card in hand])
+                self.assertTrue(all([code == NO_CARD
+                                     for code in codes[len(hand):]]))
+            if simulator.board is not None:
+                self.assertEqual(row["board"].tolist(),
+                                 [card.code for card in result.board])
+            self.assertEqual(row["winning_high_rank"],
+                             result.winning_high_rank or 0)
+            self.assertEqual(row["winning_low_rank"],
+                             result.winning_low_rank or 0)
+            self.assertEqual(row["high_winners"],
+                             sum([1 << index
+                                  for index in result.high_winners or []]))
+            self.assertEqual(row["low_winners"],
+                             sum([1 << index
+                                  for index in result.low_winners or []]))
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def testFixed(self):
+        """Test writing results in the fixed-width format."""
+        for simulator in self.simulators():
+            for kwargs in [{}, { "seed" : 3 }, { "batch_size" : 64 }]:
+                results = []
+                def callback(simulator, result):
+                    results.append(result)
+                output = open_writer(self.filename, simulator,
+                                     format=FORMAT_FIXED, buffer_size=50)
+                self.assertIsInstance(output, FixedResultWriter)
+                simulator.simulate_games(number_of_games=200,
+                                         callback=callback,
+                                         output=output, **kwargs)
+                output.close()
+                self.assertEqual(output.rows_written, 200)
+                rows = read_results(self.filename)
+                self.assertRowsMatch(rows, results, simulator)
+                del rows
+
+    @unittest.skipIf(ResultWriterModule.pyarrow is None,
+                     "pyarrow not available")
+    def testParquet(self):
+        """Test writing results as Parquet."""
+        for simulator in self.simulators():
+            results = []
+            def callback(simulator, result):
+                results.append(result)
+            output = open_writer(self.filename, simulator,
+                                 format=FORMAT_PARQUET, buffer_size=50)
+            simulator.simulate_games(number_of_games=200, callback=callback,
+                                     output=output)
+            output.close()
+            self.assertRowsMatch(read_results(self.filename), results,
+                                 simulator)
+
+    def testBadFormat(self):
+        """Test an unknown format."""
+        self.assertRaises(ValueError, open_writer, self.filename,
+                          HoldEm.Simulator(), format="csv")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""Unittests for StartingHandTable module"""
+
+import os
+import tempfile
+
+from pyPoker import HoldEm
+from pyPoker.Cards import Cards
+from pyPoker.StartingHandTable import StartingHandTable
+import unittest
+
+class TestSequenceFunctions(unittest.TestCase):
+
+    def setUp(self):
+        # Synthetic equities which are easy to check
+        size = StartingHandTable.NUM_CLASSES
+        self.headsUp = [[(row + 0.5 * column) / (2.0 * size)
+                         for column in range(size)]
+                        for row in range(size)]
+        self.multiway = [[1.0 / players for players in range(2, 7)]
+                         for row in range(size)]
+        self.table = StartingHandTable.fromEquities(self.headsUp,
+                                                    self.multiway, 10)
+        fd, self.filename = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def testClasses(self):
+        """Test mapping hands to classes and back."""
+        tests = [
+            # hand, index, name, number of hands in class
+            ("AS AD", 0, "AA", 6),
+            ("KS AS", 1, "AKs", 4),
+            ("AH KD", 13, "AKo", 12),
+            ("2C 2D", 168, "22", 6),
+            ("7C 2D", 163, "72o", 12),
+            ]
+        for hand, index, name, size in tests:
+            self.assertEqual(StartingHandTable.classIndex(
+                    Cards.fromString(hand)), index)
+            self.assertEqual(StartingHandTable.className(index), name)
+            self.assertEqual(len(StartingHandTable.classRange(index)), size)
+        total = 0
+        for index in range(StartingHandTable.NUM_CLASSES):
+            handRange = StartingHandTable.classRange(index)
+            for mask, hand, weight in handRange.combos:
+                self.assertEqual(StartingHandTable.classIndex(hand), index)
+            total += len(handRange)
+        self.assertEqual(total, 1326)
+
+    def testEquities(self):
+        """Test looking up equities."""
+        table = self.table
+        self.assertEqual(table.maxPlayers, 6)
+        self.assertEqual(table.number_of_games, 10)
+        self.assertAlmostEqual(table.getHeadsUpEquity(3, 7),
+                               self.headsUp[3][7], places=4)
+        self.assertAlmostEqual(
+            table.getHeadsUpEquity(Cards.fromString("AS KS"),
+                                   Cards.fromString("7C 2D")),
+            self.headsUp[1][163], places=4)
+        self.assertAlmostEqual(table.getEquity(Cards.fromString("AH KD"), 5),
+                               0.2, places=4)
+        self.assertRaises(ValueError, table.getEquity, 0, 1)
+        self.assertRaises(ValueError, table.getEquity, 0, 7)
+
+    def testSaveLoad(self):
+        """Test saving and loading a table file."""
+        self.table.save(self.filename)
+        table = StartingHandTable.load(self.filename)
+        for index in [0, 50, 168]:
+            self.assertEqual(table.getHeadsUpEquity(index, 168 - index),
+                             self.table.getHeadsUpEquity(index, 168 - index))
+            self.assertEqual(table.getEquity(index, 4),
+                             self.table.getEquity(index, 4))
+        table.close()
+        with open(self.filename, "wb") as f:
+            f.write("Not a table" * 10)
+        self.assertRaises(ValueError, StartingHandTable.load, self.filename)
+
+    def testSimulateEquity(self):
+        """Test simulating equity of starting hand classes."""
+        aces = StartingHandTable.classIndex(Cards.fromString("AS AD"))
+        trash = StartingHandTable.classIndex(Cards.fromString("7C 2D"))
+        equity = StartingHandTable.simulateEquity([aces, trash], 2, 200,
+                                                  seed=1)
+        self.assertGreater(equity, 0.8)
+        equity = StartingHandTable.simulateEquity([trash], 4, 200, seed=1)
+        self.assertLess(equity, 0.25)
+
+    def testStartingHandRanker(self):
+        """Test StartingHandRanker equities from a table."""
+        self.table.save(self.filename)
+        try:
+            HoldEm.StartingHandRanker.loadTable(self.filename)
+            self.assertAlmostEqual(
+                HoldEm.StartingHandRanker.equity(Cards.fromString("AS AD")),
+                0.5, places=4)
+            self.assertAlmostEqual(
+                HoldEm.StartingHandRanker.headsUpEquity(
+                    Cards.fromString("KS KD"), Cards.fromString("AS AD")),
+                self.headsUp[14][0], places=4)
+        finally:
+            HoldEm.StartingHandRanker.table = None
+
+if __name__ == "__main__":
+    unittest.main()
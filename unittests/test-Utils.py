@@ -1,14 +1,37 @@
 #!/usr/bin/env python
 """Unittests for Utils module"""
 
+import random
 import StringIO
 
 import testing
 
-from pyPoker.Utils import UserSelection
+from pyPoker.Utils import get_rng, random_stream, UserSelection, z_score
 
 class TestSequenceFunctions(testing.TestCase):
 
+    def test_random_stream(self):
+        """Test random_stream() and get_rng()"""
+        rng = random_stream(42)
+        self.assertIsInstance(rng, random.Random)
+        values = [rng.random() for i in range(5)]
+        rng = random_stream(42, 0)
+        self.assertListEqual([rng.random() for i in range(5)], values)
+        rng = random_stream(42, 1)
+        self.assertNotEqual([rng.random() for i in range(5)], values)
+        rng = random_stream(43, 0)
+        self.assertNotEqual([rng.random() for i in range(5)], values)
+        self.assertRaises(ValueError, random_stream, 42, -1)
+        self.assertIs(get_rng(None), random)
+        self.assertIs(get_rng(rng), rng)
+
+    def test_z_score(self):
+        """Test z_score()"""
+        self.assertAlmostEqual(z_score(0.95), 1.95996, places=4)
+        self.assertAlmostEqual(z_score(0.99), 2.57583, places=4)
+        self.assertRaises(ValueError, z_score, 1.0)
+        self.assertRaises(ValueError, z_score, 0)
+
     def test_UserSelection(self):
         """Test basic UserSelction functionality"""
         with self.pipe_to_stdin() as input: